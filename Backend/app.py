@@ -1,25 +1,240 @@
-from flask import Flask, jsonify, request
+import click
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from dotenv import load_dotenv
+from sqlalchemy import DDL, and_, bindparam, case, column, event, inspect, literal, or_, select, table, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import configure_mappers
+import hashlib
+import math
 import os
+import secrets
+import time
+from datetime import datetime, timezone
+from functools import partial, wraps
 from werkzeug.security import generate_password_hash, check_password_hash
+from auth import TokenError, TokenService, needs_rehash
+from bulk_import import import_campaigns, import_influencers, read_records
+from cache import MemoryBackend, ResponseCache, SharedFileBackend
+from events import EventFeed, MemoryBroker, SharedFileBroker
+from geo import RTREE_DDL, RTREE_REBUILD, bounding_boxes, cell_ranges, geo_columns, geocode, rtree_available, rtree_ddl, within_radius_sql
+from json_provider import json_provider_class
+from metrics import Metrics
+from search import REBUILD_SQL, SEARCH_DDL, search_public_campaigns
+from snapshot import ROW_COLUMNS, InfluencerSnapshot
+from matching import KeywordIndex, location_prefixes, locations_match, normalize_location, tokenize_brief
+
+# Every route and CLI command is registered on this blueprint; create_app() builds the app.
+api = Blueprint('api', __name__, cli_group=None)
+
+# --- CONFIGURATION ---
+def load_config(app, overrides=None):
+    """Reads the settings from the environment (and `overrides`) into app.config."""
+    # Read the database URL from the environment variable
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Optional read replica. Read-only routes query it, everything else uses DATABASE_URL.
+    app.config['DATABASE_REPLICA_URL'] = os.environ.get('DATABASE_REPLICA_URL')
+    # After a request commits, the client is sent to the primary for this many seconds,
+    # so it reads its own writes while the replica catches up.
+    app.config['REPLICA_LAG_WINDOW'] = int(os.environ.get('REPLICA_LAG_WINDOW', 5))
+    # Connection pool settings (per engine and worker). Pool sizing is ignored for SQLite.
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true')
+    # Server-side statement timeout in milliseconds (PostgreSQL only; 0 disables it).
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    # Signs access/refresh tokens. Must be set (and shared by all workers) in production;
+    # the random fallback only suits a single development process.
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+    app.config['ACCESS_TOKEN_TTL'] = int(os.environ.get('ACCESS_TOKEN_TTL', 15 * 60))
+    app.config['REFRESH_TOKEN_TTL'] = int(os.environ.get('REFRESH_TOKEN_TTL', 7 * 24 * 3600))
+    # Views that act for one account reject tokens of other accounts. Anonymous clients that
+    # still pass ids in the URL are served unless AUTH_REQUIRED is set.
+    app.config['AUTH_REQUIRED'] = os.environ.get('AUTH_REQUIRED', '').lower() in ('1', 'true')
+    # werkzeug hashing method and cost, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'.
+    # Stored hashes made with other parameters are upgraded on the next successful login.
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # How long (in seconds) a worker's in-memory keyword index is trusted before it is
+    # rebuilt from the database, so writes handled by other workers are picked up.
+    app.config['MATCH_INDEX_MAX_AGE'] = int(os.environ.get('MATCH_INDEX_MAX_AGE', 300))
+    # Default and maximum number of candidates returned by the match endpoint.
+    app.config['MATCH_DEFAULT_LIMIT'] = int(os.environ.get('MATCH_DEFAULT_LIMIT', 50))
+    app.config['MATCH_MAX_LIMIT'] = int(os.environ.get('MATCH_MAX_LIMIT', 500))
+    # Number of best matches stored per campaign in the CampaignMatch table. Requests for
+    # more than this many matches are scored live.
+    app.config['MATCH_TABLE_SIZE'] = int(os.environ.get('MATCH_TABLE_SIZE', 100))
+    # Seconds the match worker (flask match-worker) sleeps when its job queue is empty.
+    app.config['MATCH_WORKER_INTERVAL'] = float(os.environ.get('MATCH_WORKER_INTERVAL', 2))
+    # Maximum number of campaigns accepted by the batch match endpoint.
+    app.config['MATCH_BATCH_MAX_CAMPAIGNS'] = int(os.environ.get('MATCH_BATCH_MAX_CAMPAIGNS', 100))
+    # Maximum number of influencers accepted by the bulk invite endpoint.
+    app.config['BULK_INVITE_MAX'] = int(os.environ.get('BULK_INVITE_MAX', 1000))
+    # Default and maximum page size for list endpoints called with ?limit= / ?after=.
+    app.config['PAGE_DEFAULT_LIMIT'] = int(os.environ.get('PAGE_DEFAULT_LIMIT', 50))
+    app.config['PAGE_MAX_LIMIT'] = int(os.environ.get('PAGE_MAX_LIMIT', 500))
+    # Characters of a campaign brief sent by list endpoints; the full text is served by
+    # /api/campaigns/<id>/brief.
+    app.config['BRIEF_PREVIEW_LENGTH'] = int(os.environ.get('BRIEF_PREVIEW_LENGTH', 280))
+    # JSON encoder: 'auto' uses orjson when it is installed, 'std' the json module.
+    app.config['JSON_ENCODER'] = os.environ.get('JSON_ENCODER', 'auto')
+    # Rows fetched per round trip (and emitted per chunk) when a list endpoint is streamed.
+    app.config['STREAM_CHUNK_SIZE'] = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+    # Response cache for hot read endpoints: 'memory' (per worker), 'file' (shared by all
+    # workers through a SQLite file at CACHE_PATH) or 'none'. gunicorn.conf.py makes 'file'
+    # the default when it runs several workers.
+    app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'memory')
+    app.config['CACHE_PATH'] = os.environ.get('CACHE_PATH', os.path.join(app.instance_path, 'response_cache.db'))
+    app.config['CACHE_TTL'] = int(os.environ.get('CACHE_TTL', 60))
+    app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    # Memory-mapped columnar snapshot of the influencer catalog that answers influencer
+    # searches without SQL, shared by every worker on the host through SNAPSHOT_PATH. It is
+    # rebuilt after writes and when older than SNAPSHOT_MAX_AGE seconds (or by
+    # flask refresh-snapshot); searches fall back to SQL while it is stale.
+    app.config['SNAPSHOT_ENABLED'] = os.environ.get('SNAPSHOT_ENABLED', '1').lower() in ('1', 'true')
+    app.config['SNAPSHOT_PATH'] = os.environ.get('SNAPSHOT_PATH', os.path.join(app.instance_path, 'influencer_snapshot.bin'))
+    app.config['SNAPSHOT_MAX_AGE'] = int(os.environ.get('SNAPSHOT_MAX_AGE', 300))
+    # Seconds a rebuild waits after a write, so a burst of profile edits costs one rebuild.
+    app.config['SNAPSHOT_REFRESH_DELAY'] = float(os.environ.get('SNAPSHOT_REFRESH_DELAY', 0.5))
+    # Largest radius_km accepted by the search and match endpoints.
+    app.config['GEO_MAX_RADIUS_KM'] = float(os.environ.get('GEO_MAX_RADIUS_KM', 500))
+    # Most niche and location values listed by /api/influencers/facets (largest counts first).
+    app.config['FACET_MAX_VALUES'] = int(os.environ.get('FACET_MAX_VALUES', 100))
+    # Change feed of invite, application and submission updates, streamed as server-sent
+    # events from /api/influencer/<id>/events and /api/brand/<id>/events (see events.py):
+    # 'memory' (per worker, so only for a single worker process), 'file' (shared by all
+    # workers through a SQLite file at EVENTS_PATH) or 'none'. Events are kept for
+    # EVENTS_RETENTION seconds so reconnecting clients can catch up.
+    app.config['EVENTS_BACKEND'] = os.environ.get('EVENTS_BACKEND', 'memory')
+    app.config['EVENTS_PATH'] = os.environ.get('EVENTS_PATH', os.path.join(app.instance_path, 'events.db'))
+    app.config['EVENTS_RETENTION'] = int(os.environ.get('EVENTS_RETENTION', 3600))
+    app.config['EVENTS_MAX_ENTRIES'] = int(os.environ.get('EVENTS_MAX_ENTRIES', 10000))
+    # Seconds one event stream stays open before the client reconnects and resumes; keep it
+    # below GUNICORN_TIMEOUT. Idle streams get a comment line every EVENTS_HEARTBEAT seconds.
+    app.config['EVENTS_STREAM_TIMEOUT'] = float(os.environ.get('EVENTS_STREAM_TIMEOUT', 25))
+    app.config['EVENTS_HEARTBEAT'] = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+    # How often streams look for new events in the shared file (and on the async path).
+    app.config['EVENTS_POLL_INTERVAL'] = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5))
+    # Whether the WSGI app holds streams open. An open stream occupies a worker (or one of
+    # its threads), so gunicorn.conf.py turns this off for sync workers: each request then
+    # returns the missed events at once and the client reconnects after EVENTS_POLL_RETRY_MS.
+    # The ASGI server (asgi.py) always streams, without tying up a thread.
+    app.config['EVENTS_WSGI_STREAMING'] = os.environ.get('EVENTS_WSGI_STREAMING', '1').lower() in ('1', 'true')
+    app.config['EVENTS_POLL_RETRY_MS'] = int(os.environ.get('EVENTS_POLL_RETRY_MS', 10000))
+    # Opt-in request/SQL instrumentation served from /api/_metrics. With several workers, set
+    # METRICS_DIR to a directory they share so the endpoint reports all of them.
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true')
+    app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
+    # Statements slower than this are logged together with their SQL text.
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 200))
+    app.config.update(overrides or {})
+    # Radius searches look candidates up in the SQLite R-tree when the SQLite build has the
+    # module, and by grid cell otherwise (see geo.py).
+    app.config.setdefault('GEO_RTREE', (app.config['SQLALCHEMY_DATABASE_URI'] or '').startswith('sqlite') and rtree_available())
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, app.config['SQLALCHEMY_DATABASE_URI'])
+    if app.config['DATABASE_REPLICA_URL']:
+        app.config['SQLALCHEMY_BINDS'] = {
+            'replica': {'url': app.config['DATABASE_REPLICA_URL'], **engine_options(app.config, app.config['DATABASE_REPLICA_URL'])}
+        }
+
+def engine_options(config, url):
+    """create_engine() options for `url`, built from the DB_* settings."""
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    if url and not url.startswith('sqlite'):
+        options.update(
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    if url and url.startswith('postgres') and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+class RoutingSession(Session):
+    """
+    Sends the queries of read-only requests (see read_only()) to the replica bind, if
+    one is configured. Flushes, and any query after the request has committed, always
+    go to the primary.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context()
+                and g.get('use_replica') and 'replica' in self._db.engines):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
-load_dotenv()
-
-# --- DATABASE SETUP ---
-app = Flask(__name__)
-# This explicitly tells the server that for any route starting with /api/,
-# it should accept requests from any origin (*), allowing all standard methods.
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-# Read the database URL from the environment variable
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# --- READ REPLICA ROUTING ---
+READ_PRIMARY_COOKIE = 'read_primary_until'
 
-db = SQLAlchemy(app)
+def wants_primary():
+    """
+    True if this request must read from the primary: the client committed a write
+    within the last REPLICA_LAG_WINDOW seconds (cookie set below) or asks for it
+    explicitly with an `X-Read-Your-Writes: 1` header.
+    """
+    if request.headers.get('X-Read-Your-Writes', '').lower() in ('1', 'true'):
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_source():
+    """'replica' if the current read-only request is served by the replica, else 'primary'."""
+    if current_app.config['DATABASE_REPLICA_URL'] and not wants_primary():
+        return 'replica'
+    return 'primary'
+
+def read_only(view):
+    """Marks a view as read-only, so its queries may be served by the replica."""
+    @wraps(view)
+    def wrapper(**kwargs):
+        g.use_replica = not wants_primary()
+        return view(**kwargs)
+    return wrapper
+
+@event.listens_for(RoutingSession, 'after_commit')
+def remember_commit(session):
+    if has_request_context():
+        g.use_replica = False
+        g.committed = True
+
+@api.after_app_request
+def set_read_primary_cookie(response):
+    """After a write, pins the client to the primary until the replica has caught up."""
+    if g.get('committed') and current_app.config['DATABASE_REPLICA_URL']:
+        until = time.time() + current_app.config['REPLICA_LAG_WINDOW']
+        response.set_cookie(READ_PRIMARY_COOKIE, f'{until:.3f}', max_age=current_app.config['REPLICA_LAG_WINDOW'],
+                            httponly=True, samesite='Lax')
+        response.headers['X-Read-Primary-Until'] = f'{until:.3f}'
+    return response
 
 # --- DATABASE MODELS ---
+class Versioned:
+    """
+    Mixin adding a `version` counter that every ORM update of the row increments.
+    Conditional GETs derive their ETags from these counters, see conditional().
+    """
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+VERSIONED_TABLES = ['influencer', 'campaign', 'invite', 'submission', 'application']
+
+@event.listens_for(Versioned, 'before_update', propagate=True)
+def bump_row_version(mapper, connection, target):
+    # Incremented in SQL, so concurrent updates never end up with the same version.
+    if inspect(target).session.is_modified(target, include_collections=False):
+        target.version = type(target).version + 1
+
 class BrandUser(db.Model):
     """
     Model for brand users who create campaigns
@@ -32,15 +247,15 @@ class BrandUser(db.Model):
 
     def set_password(self, password):
         # Creates a secure hash of the password
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
         # Checks if the provided password matches the stored hash
-        return check_password_hash(self.password_hash, password)
+        return bool(self.password_hash) and check_password_hash(self.password_hash, password)
 
 # --- Find and replace the entire Influencer model class ---
 
-class Influencer(db.Model):
+class Influencer(Versioned, db.Model):
     # This part remains the same
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -50,23 +265,54 @@ class Influencer(db.Model):
     # --- THESE ARE THE CHANGES ---
     # We make these fields optional (nullable=True) so a new user can be created
     # without this information. We also remove nullable=False where it's not needed.
-    followers = db.Column(db.Integer, nullable=True, default=0) # Now optional, defaults to 0
+    followers = db.Column(db.Integer, nullable=True, default=0, index=True) # Now optional, defaults to 0
     location = db.Column(db.String(80), nullable=True)
+    # Lower-cased, whitespace-collapsed copy of `location`, filled in automatically on
+    # every write so location filters can use indexed equality lookups.
+    location_normalized = db.Column(db.String(80), nullable=True, index=True)
+    # Coordinates of `location` from the bundled gazetteer and their grid cell (see geo.py),
+    # filled in together with location_normalized. NULL when the location is unknown.
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geo_cell = db.Column(db.Integer, nullable=True, index=True)
     keywords = db.Column(db.String(200), nullable=True)
-    niche = db.Column(db.String(80), nullable=True)
+    niche = db.Column(db.String(80), nullable=True, index=True)
     engagement_rate = db.Column(db.Float, nullable=True)
     audience_age_range = db.Column(db.String(50), nullable=True)
     audience_gender_split = db.Column(db.String(50), nullable=True)
 
     # The password methods remain the same
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        # Accounts imported without a password have no hash and cannot log in.
+        return bool(self.password_hash) and check_password_hash(self.password_hash, password)
+
 
+# On SQLite builds with the R-tree module, an R-tree of influencer points (see geo.py).
+for statement in RTREE_DDL:
+    event.listen(Influencer.__table__, 'after_create', rtree_ddl(statement))
 
-class Campaign(db.Model):
+class Location(db.Model):
+    """
+    Lookup table of every distinct normalized influencer location.
+    It stays tiny compared to Influencer, so fuzzy matching a target location
+    against it is cheap; the matches are then used for indexed equality lookups.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), unique=True, nullable=False)
+
+# On PostgreSQL, a trigram index lets the substring match on location names use an index.
+# SQLite has no trigram operator class; its Location table is small enough to scan.
+LOCATION_TRIGRAM_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_location_name_trgm ON location USING gin (name gin_trgm_ops)',
+]
+for statement in LOCATION_TRIGRAM_DDL:
+    event.listen(Location.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+class Campaign(Versioned, db.Model):
     """
     Model for marketing campaigns created by brands
     Contains campaign details, targeting, and requirements
@@ -84,26 +330,46 @@ class Campaign(db.Model):
     goal = db.Column(db.String(100), nullable=True) # e.g., "Brand Awareness", "Website Clicks"
     # Specific notes about the target audience for this campaign.
     target_audience_notes = db.Column(db.Text, nullable=True) # Detailed audience targeting description
-    target_location = db.Column(db.String(100), nullable=True) # Geographic targeting for influencer matching
+    target_location = db.Column(db.String(100), nullable=True, index=True) # Geographic targeting for influencer matching
+    # Coordinates of target_location from the bundled gazetteer, for radius matching.
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
     # If true, this campaign will appear on the Project Exchange for influencers to apply to.
-    is_public = db.Column(db.Boolean, default=False, nullable=False)
-
-class Invite(db.Model):
+    is_public = db.Column(db.Boolean, default=False, nullable=False, index=True)
+
+# Full-text index over the campaign's name, goal, brief and audience notes (see search.py).
+for dialect_name, statements in SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Campaign.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect_name))
+
+class Invite(Versioned, db.Model):
+    # An influencer can only be invited to a campaign once; the unique index also serves
+    # lookups by campaign. Influencer dashboards look invites up by influencer_id.
+    __table_args__ = (
+        db.Index('uq_invite_campaign_influencer', 'campaign_id', 'influencer_id', unique=True),
+        db.Index('ix_invite_influencer_id', 'influencer_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
     influencer_id = db.Column(db.Integer, db.ForeignKey('influencer.id'), nullable=False)
     status = db.Column(db.String(50), nullable=False, default='pending')
-    campaign = db.relationship('Campaign', backref='invites')
+    # A campaign lists its invites in the order they were sent.
+    campaign = db.relationship('Campaign', backref=db.backref('invites', order_by='Invite.id'))
     influencer = db.relationship('Influencer', backref='invites')
 
-class Submission(db.Model):
+class Submission(Versioned, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    invite_id = db.Column(db.Integer, db.ForeignKey('invite.id'), nullable=False)
+    invite_id = db.Column(db.Integer, db.ForeignKey('invite.id'), nullable=False, index=True)
     content_url = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(50), nullable=False, default='pending_review')
     invite = db.relationship('Invite', backref='submission', uselist=False)
 
-class Application(db.Model):
+class Application(Versioned, db.Model):
+    # An influencer can only apply to a campaign once.
+    __table_args__ = (
+        db.Index('uq_application_campaign_influencer', 'campaign_id', 'influencer_id', unique=True),
+        db.Index('ix_application_influencer_id', 'influencer_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     # The ID of the campaign the influencer is applying to.
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
@@ -116,21 +382,883 @@ class Application(db.Model):
     campaign = db.relationship('Campaign', backref='applications')
     influencer = db.relationship('Influencer', backref='applications')
 
+class CampaignMatch(db.Model):
+    """
+    A campaign's precomputed best matches (up to MATCH_TABLE_SIZE rows per campaign),
+    kept up to date by the match worker, see process_match_jobs().
+    """
+    __table_args__ = (db.Index('ix_campaign_match_influencer_id', 'influencer_id'),)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), primary_key=True)
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencer.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    matched_keywords = db.Column(db.Integer, nullable=False)
+    influencer = db.relationship('Influencer')
+
+class CampaignMatchStatus(db.Model):
+    # One row per campaign whose CampaignMatch rows have been built. Until then the
+    # match endpoint scores the campaign live.
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), primary_key=True)
+    built_at = db.Column(db.DateTime, nullable=False)
+
+class MatchJob(db.Model):
+    # Queue of pending match table updates, written in the same transaction as the
+    # change that caused them and consumed by the match worker.
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False) # 'campaign' or 'influencer'
+    target_id = db.Column(db.Integer, nullable=False)
+
+def first_submission(invite):
+    """Returns the earliest submission for an eager-loaded invite, or None."""
+    if not invite.submission:
+        return None
+    return min(invite.submission, key=lambda submission: submission.id)
+
+def insert_ignore(table, dialect_name):
+    """An INSERT that silently skips rows violating a unique index (ON CONFLICT DO NOTHING)."""
+    if dialect_name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect_name == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return table.insert().prefix_with('IGNORE')
+
+def insert_new_rows(model, rows, *returning):
+    """
+    Inserts `rows` in a single INSERT ... ON CONFLICT DO NOTHING statement in the current
+    session and returns the `returning` columns of the rows that were actually created.
+    Rows clashing with a unique index (e.g. an existing invite) are skipped atomically,
+    so there is no check-then-insert race between concurrent requests.
+    """
+    statement = insert_ignore(model.__table__, db.session.get_bind().dialect.name).values(rows)
+    return db.session.execute(statement.returning(*returning)).all()
+
+@event.listens_for(Influencer, 'before_insert')
+@event.listens_for(Influencer, 'before_update')
+def normalize_influencer_location(mapper, connection, influencer):
+    """Keeps location_normalized, the coordinates and the Location lookup table in sync with `location`."""
+    normalized = normalize_location(influencer.location) or None
+    if normalized == influencer.location_normalized:
+        return
+    influencer.location_normalized = normalized
+    for name, value in geo_columns(normalized).items():
+        setattr(influencer, name, value)
+    if normalized:
+        connection.execute(insert_ignore(Location.__table__, connection.dialect.name), {"name": normalized})
+
+@event.listens_for(Campaign, 'before_insert')
+@event.listens_for(Campaign, 'before_update')
+def geocode_campaign_target(mapper, connection, campaign):
+    """Keeps a campaign's coordinates in sync with its target location."""
+    point = geocode(campaign.target_location) if campaign.target_location else None
+    campaign.latitude, campaign.longitude = point or (None, None)
+
+def register_sqlite_math_functions(dbapi_connection, connection_record):
+    """
+    Radius filters need sin() and cos(), which SQLite only has when built with its math
+    functions. Listens for the 'connect' event of the app's engines, see create_app().
+    """
+    if not hasattr(dbapi_connection, 'create_function'):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('SELECT sin(0), cos(0)')
+    except Exception:
+        dbapi_connection.create_function('sin', 1, math.sin, deterministic=True)
+        dbapi_connection.create_function('cos', 1, math.cos, deterministic=True)
+    finally:
+        cursor.close()
+
+def influencer_location_filter(target_location):
+    """
+    Builds the filter for influencers in a target location without a leading-wildcard
+    scan over Influencer: the (small) Location table resolves which normalized
+    locations match, then Influencer is hit through its location_normalized index.
+    "Austin" matches "Austin, TX", and "Austin, TX" also matches plain "Austin".
+    """
+    names = db.session.execute(location_names_query(target_location)).scalars()
+    return Influencer.location_normalized.in_(list(names))
+
+def location_names_query(target_location):
+    """Selects the normalized Location names influencer_location_filter() accepts."""
+    target = normalize_location(target_location)
+    return select(Location.name).where(or_(
+        Location.name.contains(target, autoescape=True),
+        Location.name.in_(location_prefixes(target))
+    ))
+
+# --- RESPONSE CACHE ---
+def make_cache_backend():
+    """The response cache backend selected by CACHE_BACKEND (None disables caching)."""
+    backend = current_app.config['CACHE_BACKEND']
+    if backend == 'memory':
+        return MemoryBackend(max_entries=current_app.config['CACHE_MAX_ENTRIES'])
+    if backend == 'file':
+        os.makedirs(os.path.dirname(current_app.config['CACHE_PATH']), exist_ok=True)
+        return SharedFileBackend(current_app.config['CACHE_PATH'], max_entries=current_app.config['CACHE_MAX_ENTRIES'])
+    return None
+
+# Cached views declare the entities they depend on; writes bump those entities'
+# version counters right after committing, which retires every affected entry.
+# The backend is chosen by create_app().
+response_cache = ResponseCache(read_source=read_source)
+
+def use_shared_cache():
+    """
+    Makes a CLI command that writes bump the cache versions in the shared file at
+    CACHE_PATH: the web workers never see a bump made in this process's memory backend.
+    (A single development server with CACHE_BACKEND=memory still only notices after CACHE_TTL.)
+    """
+    if isinstance(response_cache.backend, MemoryBackend):
+        os.makedirs(os.path.dirname(current_app.config['CACHE_PATH']), exist_ok=True)
+        response_cache.backend = SharedFileBackend(current_app.config['CACHE_PATH'], max_entries=current_app.config['CACHE_MAX_ENTRIES'])
+
+# --- CHANGE FEED ---
+def make_event_broker():
+    """The change feed broker selected by EVENTS_BACKEND (None disables the feed)."""
+    backend = current_app.config['EVENTS_BACKEND']
+    if backend == 'memory':
+        return MemoryBroker(retention=current_app.config['EVENTS_RETENTION'],
+                            max_entries=current_app.config['EVENTS_MAX_ENTRIES'])
+    if backend == 'file':
+        os.makedirs(os.path.dirname(current_app.config['EVENTS_PATH']), exist_ok=True)
+        return SharedFileBroker(current_app.config['EVENTS_PATH'], retention=current_app.config['EVENTS_RETENTION'],
+                                poll_interval=current_app.config['EVENTS_POLL_INTERVAL'])
+    return None
+
+# Writes publish their changes to the feeds of the users concerned right after committing.
+# The broker is chosen by create_app().
+event_feed = EventFeed()
+
+def publish_changes(kind, changes):
+    """
+    Publishes `kind` events (e.g. 'invite.updated') for `changes`, dicts with at least
+    campaign_id and influencer_id, to the feeds of that influencer and of the campaign's
+    brand. Call after committing, so subscribers never hear of a rolled-back write.
+    """
+    if not event_feed.enabled or not changes:
+        return
+    brands = dict(db.session.query(Campaign.id, Campaign.brand_id).filter(
+        Campaign.id.in_({change['campaign_id'] for change in changes})))
+    entries = []
+    for change in changes:
+        entries.append((f"influencer:{change['influencer_id']}", kind, change))
+        if change['campaign_id'] in brands:
+            entries.append((f"brand:{brands[change['campaign_id']]}", kind, change))
+    event_feed.publish(entries)
+
+def event_stream_params():
+    """
+    (last_event_id, timeout) of an event stream request. The id comes from the
+    Last-Event-ID header EventSource sends when it reconnects, or from ?last_event_id=
+    for a client resuming after a page load. ?timeout= (seconds, at most
+    EVENTS_STREAM_TIMEOUT) shortens the stream; 0 returns the missed events and closes.
+    Raises ValueError for invalid values.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            raise ValueError("last_event_id must be an integer.")
+    max_timeout = current_app.config['EVENTS_STREAM_TIMEOUT']
+    try:
+        timeout = float(request.args.get('timeout', max_timeout))
+    except ValueError:
+        raise ValueError("timeout must be a number.")
+    if not 0 <= timeout <= max_timeout:
+        raise ValueError(f"timeout must be between 0 and {max_timeout:g}.")
+    return last_event_id, timeout
+
+# Event streams must reach the client unbuffered and uncached.
+EVENT_STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def event_stream_response(channel):
+    """The text/event-stream response of `channel`, see events.py."""
+    if not event_feed.enabled:
+        return jsonify({"error": "The change feed is disabled."}), 404
+    try:
+        last_event_id, timeout = event_stream_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    retry = None
+    if not current_app.config['EVENTS_WSGI_STREAMING']:
+        # Answer with what the client missed and let it poll instead of holding the worker.
+        timeout, retry = 0, current_app.config['EVENTS_POLL_RETRY_MS']
+    return Response(event_feed.stream(channel, last_event_id, timeout, retry), mimetype='text/event-stream',
+                    headers=EVENT_STREAM_HEADERS)
+
+# --- LIST HELPERS ---
+def list_response(query, id_column, serialize):
+    """
+    Sends the rows of a list query in one of three shapes:
+    - ?stream=1: a JSON array streamed in chunks from a server-side cursor.
+    - ?limit=N&after=<cursor>: one keyset page, {"items": [...], "next_cursor": ...},
+      where next_cursor is the id to pass as `after` (null on the last page).
+    - neither: the plain JSON array the frontend has always received.
+    Rows come in `id_column` order in every shape, as they do from the influencer snapshot.
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return stream_json_array(query.order_by(id_column), serialize)
+
+    if 'limit' not in request.args and 'after' not in request.args:
+        return jsonify([serialize(row) for row in query.order_by(id_column).all()])
+
+    try:
+        limit, after = page_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if after is not None:
+        query = query.filter(id_column > after)
+    # Fetch one extra row to learn whether there is another page.
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return jsonify({"items": [serialize(row) for row in rows[:limit]], "next_cursor": next_cursor})
+
+def page_params():
+    """Parses ?limit=&after= into (limit, after); raises ValueError with a message for the client."""
+    try:
+        limit = int(request.args.get('limit', current_app.config['PAGE_DEFAULT_LIMIT']))
+        after = request.args.get('after')
+        after = int(after) if after else None
+    except ValueError:
+        raise ValueError("limit and after must be integers.")
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return min(limit, current_app.config['PAGE_MAX_LIMIT']), after
+
+def brief_preview_columns():
+    """
+    Columns for a list endpoint's brief: the first BRIEF_PREVIEW_LENGTH characters
+    (cut in SQL, so the full text never leaves the database) and whether it was cut.
+    """
+    length = current_app.config['BRIEF_PREVIEW_LENGTH']
+    return (
+        db.func.substr(Campaign.brief, 1, length).label('brief'),
+        (db.func.length(Campaign.brief) > length).label('brief_truncated'),
+    )
+
+def split_keywords(keywords):
+    """Turns a comma-separated keyword string (possibly NULL) into a clean list."""
+    if not keywords:
+        return []
+    return [kw.strip() for kw in keywords.split(',')]
+
+def row_dict(row):
+    """Serializes a column-projected row as a dict keyed by its column labels."""
+    return row._asdict()
+
+def stream_json_array(query, serialize):
+    """Streams a query as a JSON array without holding the whole result in memory."""
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+
+    def generate():
+        yield '['
+        chunk = []
+        first = True
+        for row in query.yield_per(chunk_size):
+            chunk.append(current_app.json.dumps(serialize(row)))
+            if len(chunk) >= chunk_size:
+                yield ('' if first else ',') + ','.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else ',') + ','.join(chunk)
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+# --- CONDITIONAL GET ---
+def row_versions(model, *criteria):
+    """
+    Scalar subqueries summarizing the `model` rows matching `criteria`: their count,
+    the sum of their versions and the highest id. Any insert, update or delete of
+    such a row changes at least one of them.
+    """
+    return [
+        select(db.func.count()).select_from(model).where(*criteria).scalar_subquery(),
+        select(db.func.coalesce(db.func.sum(model.version), 0)).where(*criteria).scalar_subquery(),
+        select(db.func.max(model.id)).where(*criteria).scalar_subquery(),
+    ]
+
+def conditional(signature):
+    """
+    Decorator for GET views whose response only depends on the rows summarized by
+    `signature(**view_args)`, a list of row_versions() style expressions. They are
+    read in a single query and hashed into the ETag; a matching If-None-Match is
+    answered with 304 Not Modified before the view loads or serializes anything.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            state = db.session.execute(select(*signature(**kwargs))).first()
+            etag = etag_for(state, kwargs)
+            response = not_modified(etag)
+            if response is not None:
+                return response
+            return tag_response(current_app.make_response(view(**kwargs)), etag)
+        return wrapper
+    return decorator
+
+def etag_for(state, view_args):
+    """The ETag of the current request given the row_versions() `state` it depends on."""
+    return hashlib.sha1(repr((
+        request.endpoint, sorted(view_args.items()), sorted(request.args.items(multi=True)), tuple(state)
+    )).encode()).hexdigest()[:24]
+
+def not_modified(etag):
+    """A 304 response if the client already holds `etag`, else None."""
+    if request.if_none_match.star_tag or not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def tag_response(response, etag):
+    if response.status_code == 200:
+        response.set_etag(etag)
+        # Let clients keep the response but revalidate it on every use.
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# --- MATCHING INDEX ---
+# One inverted keyword index per worker process, built lazily on the first match request.
+keyword_index = KeywordIndex()
+
+def get_keyword_index():
+    """
+    Returns the worker's keyword index, (re)building it from the database if needed.
+    Besides its age, the index is rebuilt whenever the 'influencers' cache version moved
+    without this worker seeing the write, which with the shared file cache means another
+    worker changed an influencer.
+    """
+    version = response_cache.version('influencers')
+    if keyword_index.is_stale or keyword_index.source_version != version:
+        # Read from the primary even on read-only routes: an index built from a lagging
+        # replica would be kept, under the new version, long after the replica caught up.
+        with db.engine.connect() as connection:
+            rows = connection.execute(select(
+                Influencer.id, Influencer.location, Influencer.keywords,
+                Influencer.followers, Influencer.engagement_rate,
+                Influencer.latitude, Influencer.longitude
+            )).all()
+        keyword_index.build(rows)
+        keyword_index.source_version = version
+    return keyword_index
+
+def influencer_changed(influencer):
+    """
+    Called after an influencer has been committed: updates the keyword index in place,
+    retires cached responses that were built from the old data and has the catalog
+    snapshot rebuilt.
+    """
+    version = response_cache.version('influencers')
+    in_sync = not keyword_index.is_stale and keyword_index.source_version == version
+    if in_sync:
+        keyword_index.upsert(
+            influencer.id, influencer.location, influencer.keywords,
+            influencer.followers, influencer.engagement_rate,
+            influencer.latitude, influencer.longitude
+        )
+    response_cache.bump('influencers')
+    if in_sync:
+        keyword_index.source_version = response_cache.version('influencers')
+    if current_app.config['SNAPSHOT_ENABLED']:
+        influencer_snapshot.invalidate()
+        influencer_snapshot.refresh_in_background(partial(refresh_influencer_snapshot, current_app._get_current_object()),
+                                                  delay=current_app.config['SNAPSHOT_REFRESH_DELAY'])
+
+# --- INFLUENCER SEARCH FILTERS ---
+def influencer_search_filters():
+    """
+    The influencer search filters of the request (niche, location, min_followers,
+    max_followers; None when absent). With ?radius_km=, the location is geocoded and
+    replaced by `near`, a (latitude, longitude, radius_km) circle. Raises ValueError
+    with a message for the client.
+    """
+    try:
+        min_followers = int(request.args['min_followers']) if request.args.get('min_followers') else None
+        max_followers = int(request.args['max_followers']) if request.args.get('max_followers') else None
+    except ValueError:
+        raise ValueError("min_followers and max_followers must be integers.")
+    location = request.args.get('location') or None
+    near = None
+    radius_km = parse_radius()
+    if radius_km is not None:
+        if not location:
+            raise ValueError("radius_km requires a location.")
+        point = geocode(location)
+        if point is None:
+            raise ValueError(f"Unknown location: {location}")
+        location, near = None, (*point, radius_km)
+    return {
+        "niche": request.args.get('niche') or None,
+        "location": location,
+        "min_followers": min_followers,
+        "max_followers": max_followers,
+        "near": near,
+    }
+
+def parse_radius():
+    """Parses the optional ?radius_km= parameter (None when absent); raises ValueError."""
+    if not request.args.get('radius_km'):
+        return None
+    try:
+        radius_km = float(request.args['radius_km'])
+    except ValueError:
+        raise ValueError("radius_km must be a number.")
+    if not 0 < radius_km <= current_app.config['GEO_MAX_RADIUS_KM']:
+        raise ValueError(f"radius_km must be greater than 0 and at most {current_app.config['GEO_MAX_RADIUS_KM']:g}.")
+    return radius_km
+
+def influencer_filter_criteria(filters, location_names=None):
+    """
+    The SQL criteria on Influencer for influencer_search_filters(). Callers that have
+    already resolved the location filter (see location_names_query()) pass the names.
+    """
+    criteria = []
+    # A niche filter is a case-insensitive substring match.
+    if filters["niche"]:
+        criteria.append(Influencer.niche.ilike(f'%{filters["niche"]}%'))
+    # A location filter goes through the indexed, normalized location.
+    if filters["location"]:
+        if location_names is None:
+            criteria.append(influencer_location_filter(filters["location"]))
+        else:
+            criteria.append(Influencer.location_normalized.in_(location_names))
+    # Follower bounds are inclusive.
+    if filters["min_followers"] is not None:
+        criteria.append(Influencer.followers >= filters["min_followers"])
+    if filters["max_followers"] is not None:
+        criteria.append(Influencer.followers <= filters["max_followers"])
+    # A radius filter goes through the spatial index.
+    if filters["near"] is not None:
+        criteria += influencer_near_criteria(*filters["near"])
+    return criteria
+
+# The R-tree of influencer points on SQLite, see geo.RTREE_DDL.
+influencer_geo = table('influencer_geo', column('id'), column('min_lat'), column('max_lat'), column('min_lon'), column('max_lon'))
+
+def influencer_near_criteria(latitude, longitude, radius_km):
+    """
+    The criteria for influencers within `radius_km` of a point: candidates come from the
+    R-tree (SQLite) or from the grid cell ranges around the point through the geo_cell
+    index; the exact great-circle distance then drops the corners.
+    """
+    if current_app.config['GEO_RTREE']:
+        boxes = [and_(influencer_geo.c.max_lat >= min_lat, influencer_geo.c.min_lat <= max_lat,
+                      influencer_geo.c.max_lon >= min_lon, influencer_geo.c.min_lon <= max_lon)
+                 for min_lat, max_lat, min_lon, max_lon in bounding_boxes(latitude, longitude, radius_km)]
+        candidates = Influencer.id.in_(select(influencer_geo.c.id).where(or_(*boxes)))
+    else:
+        candidates = or_(*[Influencer.geo_cell.between(first, last)
+                           for first, last in cell_ranges(latitude, longitude, radius_km)])
+    return [candidates, within_radius_sql(Influencer.latitude, Influencer.longitude, latitude, longitude, radius_km)]
+
+# --- INFLUENCER SNAPSHOT ---
+# Its path and max age are set by create_app().
+influencer_snapshot = InfluencerSnapshot()
+
+def snapshot_source_version():
+    """
+    The 'influencers' version a snapshot is tagged with. Only the shared cache backend
+    has versions every worker agrees on; otherwise snapshots rely on each worker's own
+    invalidation and SNAPSHOT_MAX_AGE.
+    """
+    if isinstance(response_cache.backend, SharedFileBackend):
+        return response_cache.version('influencers')
+    return None
+
+def refresh_influencer_snapshot(app=None):
+    """
+    Rebuilds the snapshot file from the database (False if another process is already
+    rebuilding it). Background threads pass the app, which they cannot reach as current_app.
+    """
+    with (app or current_app).app_context():
+        # Read the version first: rows committed after it can only make the snapshot newer.
+        version = snapshot_source_version()
+
+        def load_rows():
+            # Called once the rebuild lock is held and built_at is taken, so a write the
+            # query misses is always newer than the snapshot. A Core select on the table:
+            # no ORM row processing for a full catalog scan.
+            table = Influencer.__table__
+            return db.session.connection().execute(
+                select(*[table.c[column] for column in ROW_COLUMNS]).order_by(table.c.id)
+                .execution_options(yield_per=current_app.config['STREAM_CHUNK_SIZE'])
+            )
+
+        os.makedirs(os.path.dirname(os.path.abspath(influencer_snapshot.path)), exist_ok=True)
+        return influencer_snapshot.refresh(load_rows, version)
+
+def get_influencer_snapshot():
+    """The snapshot if it is fresh; otherwise None, after starting a rebuild in the background."""
+    if not current_app.config['SNAPSHOT_ENABLED']:
+        return None
+    view = influencer_snapshot.fresh_view(snapshot_source_version())
+    if view is None:
+        influencer_snapshot.refresh_in_background(partial(refresh_influencer_snapshot, current_app._get_current_object()))
+    return view
+
+def influencer_snapshot_for(filters):
+    """
+    The fresh snapshot if it can answer `filters`, else None. Niche filters with LIKE
+    wildcards in them are left to SQL.
+    """
+    niche = filters["niche"]
+    if niche and ('%' in niche or '_' in niche):
+        return None
+    return get_influencer_snapshot()
+
+def snapshot_list_response(view, filters, serialize):
+    """
+    list_response() for influencers selected from the snapshot by `filters` (keyword
+    arguments of SnapshotView.search): the plain array, or one ?limit=&after= page.
+    """
+    if 'limit' in request.args or 'after' in request.args:
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        rows = [view.row(position) for position in view.search(after=after, **filters)[:limit + 1]]
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return jsonify({"items": [serialize(row) for row in rows[:limit]], "next_cursor": next_cursor})
+    return jsonify([serialize(view.row(position)) for position in view.search(**filters)])
+
+# --- INFLUENCER FACETS ---
+# Lower bounds of the follower and engagement-rate buckets reported by the facets endpoint.
+FOLLOWER_BUCKETS = (0, 1000, 5000, 10000, 50000, 100000)
+ENGAGEMENT_BUCKETS = (0, 1, 2, 3, 5, 10)
+
+def bucket_labels(edges):
+    """"0-1000", "1000-5000", ..., "100000+" for the lower bounds in `edges`."""
+    return [f'{low}-{high}' for low, high in zip(edges, edges[1:])] + [f'{edges[-1]}+']
+
+def bucket_case(column, edges):
+    """SQL expression giving the bucket label of `column` (NULL for NULL values)."""
+    labels = bucket_labels(edges)
+    return case(
+        (column.is_(None), None),
+        *[(column < high, label) for high, label in zip(edges[1:], labels)],
+        else_=labels[-1],
+    )
+
+def facet_response(total, niches, locations, follower_counts, engagement_counts):
+    """
+    The facets document: niche and location counts, largest first and cut to
+    FACET_MAX_VALUES, and every bucket in order (including empty ones).
+    """
+    def top(counts):
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"value": value, "count": count} for value, count in ranked[:current_app.config['FACET_MAX_VALUES']]]
+
+    def buckets(edges, counts):
+        return [{"value": label, "count": counts.get(label, 0)} for label in bucket_labels(edges)]
+
+    return {
+        "total": total,
+        "niche": top(niches),
+        "location": top(locations),
+        "followers": buckets(FOLLOWER_BUCKETS, follower_counts),
+        "engagement_rate": buckets(ENGAGEMENT_BUCKETS, engagement_counts),
+    }
+
+def sql_facets(filters):
+    """Facets computed by the database: one grouped count per facet, in a single UNION ALL."""
+    criteria = influencer_filter_criteria(filters)
+    facets = {
+        'niche': Influencer.niche,
+        'location': Influencer.location_normalized,
+        'followers': bucket_case(Influencer.followers, FOLLOWER_BUCKETS),
+        'engagement_rate': bucket_case(Influencer.engagement_rate, ENGAGEMENT_BUCKETS),
+    }
+    # Grouping by position keeps the (parameterized) bucket expressions out of GROUP BY.
+    statement = union_all(*[
+        select(literal(name).label('facet'), expression.label('value'), db.func.count().label('count'))
+        .where(*criteria).group_by(text('1'), text('2'))
+        for name, expression in facets.items()
+    ])
+    counts = {name: {} for name in facets}
+    for facet, value, count in db.session.execute(statement):
+        counts[facet][value] = count
+    # Every matching row lands in exactly one niche group, NULL included.
+    total = sum(counts['niche'].values())
+    for facet_counts in counts.values():
+        facet_counts.pop(None, None)
+    return facet_response(total, counts['niche'], counts['location'], counts['followers'], counts['engagement_rate'])
+
+def snapshot_facets(view, filters):
+    """The same facets counted from the snapshot with vectorized bincounts."""
+    positions = view.search(**filters)
+    follower_counts = view.bucket_counts('followers', positions, FOLLOWER_BUCKETS)
+    engagement_counts = view.bucket_counts('engagement_rate', positions, ENGAGEMENT_BUCKETS)
+    return facet_response(
+        len(positions),
+        view.value_counts('niche', positions),
+        view.value_counts('location_normalized', positions),
+        dict(zip(bucket_labels(FOLLOWER_BUCKETS), follower_counts)),
+        dict(zip(bucket_labels(ENGAGEMENT_BUCKETS), engagement_counts)),
+    )
+
+# --- PRECOMPUTED MATCHES ---
+def enqueue_match_job(kind, target_id):
+    """Queues a match table update; it is committed together with the caller's change."""
+    db.session.add(MatchJob(kind=kind, target_id=target_id))
+
+def enqueue_location_rebuilds(*locations):
+    """
+    Queues a rebuild of every built campaign targeting one of `locations`. Keyword
+    scores are IDF-weighted over all influencers in a campaign's location, so a change
+    to anyone's keywords or location there moves every stored score of those campaigns.
+    Committed together with the caller's change.
+    """
+    locations = {normalize_location(location) for location in locations} - {''}
+    # Few distinct target locations exist, so they are resolved in Python.
+    targets = [target for target, in db.session.query(Campaign.target_location).distinct()
+               if target and any(locations_match(normalize_location(target), location) for location in locations)]
+    if not targets:
+        return
+    campaign_ids = select(Campaign.id).join(CampaignMatchStatus, CampaignMatchStatus.campaign_id == Campaign.id).where(
+        Campaign.target_location.in_(targets))
+    db.session.execute(
+        MatchJob.__table__.insert().from_select(['kind', 'target_id'], select(text("'campaign'"), campaign_ids.subquery()))
+    )
+
+def enqueue_campaign_rebuilds(only_missing=True):
+    """Queues a rebuild of every campaign's matches (or only of campaigns never built). Returns the count."""
+    campaign_ids = select(Campaign.id)
+    if only_missing:
+        campaign_ids = campaign_ids.where(~Campaign.id.in_(select(CampaignMatchStatus.campaign_id)))
+    result = db.session.execute(
+        MatchJob.__table__.insert().from_select(['kind', 'target_id'], select(text("'campaign'"), campaign_ids.subquery()))
+    )
+    db.session.commit()
+    return result.rowcount
+
+def rebuild_campaign_matches(campaign_ids, index):
+    """Replaces the stored matches of `campaign_ids`, scoring campaigns that share a location together."""
+    campaigns = Campaign.query.filter(Campaign.id.in_(campaign_ids)).all()
+    groups = {}
+    for campaign in campaigns:
+        location = normalize_location(campaign.target_location)
+        if location:
+            groups.setdefault(location, []).append(campaign)
+
+    rows = []
+    for location, group in groups.items():
+        token_sets = [tokenize_brief(campaign.brief) for campaign in group]
+        for campaign, ranked in zip(group, index.top_matches_batch(location, token_sets, limit=current_app.config['MATCH_TABLE_SIZE'])):
+            rows += [{"campaign_id": campaign.id, "influencer_id": influencer_id, "score": score, "matched_keywords": matched}
+                     for influencer_id, score, matched in ranked]
+
+    built = [campaign.id for campaign in campaigns]
+    if not built:
+        return set()
+    CampaignMatch.query.filter(CampaignMatch.campaign_id.in_(built)).delete(synchronize_session=False)
+    CampaignMatchStatus.query.filter(CampaignMatchStatus.campaign_id.in_(built)).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(CampaignMatch.__table__.insert(), rows)
+    now = datetime.now(timezone.utc)
+    db.session.execute(CampaignMatchStatus.__table__.insert(), [{"campaign_id": campaign_id, "built_at": now} for campaign_id in built])
+    return set(built)
+
+def rescore_influencer_matches(influencer_ids, index):
+    """
+    Updates the stored matches of built campaigns for influencers whose profile changed,
+    without rescoring anyone else. That is exact for follower and engagement changes;
+    keyword and location changes also shift the other influencers' scores, and their
+    writers queue full rebuilds with enqueue_location_rebuilds(). Returns the campaigns
+    that need a full rebuild: those where a stored influencer dropped in score or out of
+    the list, since the influencer that should take its place is not stored.
+    """
+    table_size = current_app.config['MATCH_TABLE_SIZE']
+    stored = {}  # influencer id -> {campaign id: CampaignMatch}
+    for match in CampaignMatch.query.filter(CampaignMatch.influencer_id.in_(influencer_ids)):
+        stored.setdefault(match.influencer_id, {})[match.campaign_id] = match
+
+    # Campaigns whose target location matches any of the new locations. Few distinct
+    # target locations exist, so they are resolved in Python, then fetched by index.
+    new_locations = {influencer_id: index.location_of(influencer_id) for influencer_id in influencer_ids}
+    targets = [target for target, in db.session.query(Campaign.target_location).distinct() if target]
+    wanted = [target for target in targets
+              if any(location and locations_match(normalize_location(target), location) for location in new_locations.values())]
+    stored_campaign_ids = {campaign_id for matches in stored.values() for campaign_id in matches}
+    campaigns = Campaign.query.join(CampaignMatchStatus, CampaignMatchStatus.campaign_id == Campaign.id).filter(or_(
+        Campaign.target_location.in_(wanted), Campaign.id.in_(stored_campaign_ids)
+    )).all()
+    if not campaigns:
+        return set()
+
+    # Size and lowest stored score of every affected campaign's list.
+    bounds = {campaign_id: (count, lowest) for campaign_id, count, lowest in db.session.query(
+        CampaignMatch.campaign_id, db.func.count(), db.func.min(CampaignMatch.score)
+    ).filter(CampaignMatch.campaign_id.in_([campaign.id for campaign in campaigns])).group_by(CampaignMatch.campaign_id)}
+
+    groups = {}
+    for campaign in campaigns:
+        groups.setdefault(normalize_location(campaign.target_location), []).append(campaign)
+
+    needs_rebuild = set()
+    for location, group in groups.items():
+        token_sets = [tokenize_brief(campaign.brief) for campaign in group]
+        for influencer_id in influencer_ids:
+            for campaign, result in zip(group, index.score_influencer(influencer_id, location, token_sets)):
+                count, lowest = bounds.get(campaign.id, (0, None))
+                current = stored.get(influencer_id, {}).get(campaign.id)
+                complete = count < table_size  # the list holds every candidate there is
+                if current is not None:
+                    if result is not None and (result[0] >= current.score or complete):
+                        current.score, current.matched_keywords = result
+                    elif result is None and complete:
+                        db.session.delete(current)
+                    else:
+                        needs_rebuild.add(campaign.id)
+                elif result is not None and (complete or result[0] > lowest):
+                    db.session.add(CampaignMatch(campaign_id=campaign.id, influencer_id=influencer_id,
+                                                 score=result[0], matched_keywords=result[1]))
+                    if complete:
+                        bounds[campaign.id] = (count + 1, result[0] if lowest is None else min(lowest, result[0]))
+                    else:
+                        # The newcomer pushes the lowest-scoring influencer off the full list.
+                        db.session.flush()
+                        lowest_match = CampaignMatch.query.filter_by(campaign_id=campaign.id).order_by(
+                            CampaignMatch.score, CampaignMatch.influencer_id.desc()).first()
+                        db.session.delete(lowest_match)
+    return needs_rebuild
+
+def process_match_jobs(batch_size=500):
+    """
+    Applies up to `batch_size` queued match jobs and returns how many were consumed.
+    Influencer jobs are applied incrementally; campaign jobs (and campaigns the
+    incremental pass could not settle) are rebuilt in location groups.
+    """
+    jobs = MatchJob.query.order_by(MatchJob.id).limit(batch_size).all()
+    if not jobs:
+        return 0
+    campaign_ids = {job.target_id for job in jobs if job.kind == 'campaign'}
+    influencer_ids = {job.target_id for job in jobs if job.kind == 'influencer'}
+
+    index = get_keyword_index()
+    # The worker's index may predate these changes, so re-read the changed influencers.
+    changed = {influencer.id: influencer for influencer in Influencer.query.filter(Influencer.id.in_(influencer_ids))}
+    for influencer_id in influencer_ids:
+        influencer = changed.get(influencer_id)
+        if influencer is None:
+            index.remove(influencer_id)
+        else:
+            index.upsert(influencer.id, influencer.location, influencer.keywords, influencer.followers, influencer.engagement_rate,
+                         influencer.latitude, influencer.longitude)
+
+    touched = set()
+    if influencer_ids:
+        touched |= {match.campaign_id for match in CampaignMatch.query.filter(CampaignMatch.influencer_id.in_(influencer_ids))}
+        campaign_ids |= rescore_influencer_matches(sorted(influencer_ids), index)
+        db.session.flush()
+        touched |= {match.campaign_id for match in CampaignMatch.query.filter(CampaignMatch.influencer_id.in_(influencer_ids))}
+    if campaign_ids:
+        touched |= rebuild_campaign_matches(campaign_ids, index)
+
+    MatchJob.query.filter(MatchJob.id.in_([job.id for job in jobs])).delete(synchronize_session=False)
+    db.session.commit()
+    response_cache.bump(*(f'campaign:{campaign_id}' for campaign_id in touched))
+    return len(jobs)
+
+def stored_matches(campaign_id, limit, min_score):
+    """
+    Reads a campaign's best matches from the CampaignMatch table as
+    (influencer_id, score, matched_keywords) tuples plus the influencers by id.
+    The caller checks that the campaign has been built and `limit` is within
+    MATCH_TABLE_SIZE.
+    """
+    matches = CampaignMatch.query.options(db.joinedload(CampaignMatch.influencer)).filter(
+        CampaignMatch.campaign_id == campaign_id, CampaignMatch.score >= min_score
+    ).order_by(CampaignMatch.score.desc(), CampaignMatch.influencer_id).limit(limit).all()
+    ranked = [(match.influencer_id, match.score, match.matched_keywords) for match in matches]
+    return ranked, {match.influencer_id: match.influencer for match in matches}
+
+# --- AUTHENTICATION ---
+# The signing key and token lifetimes are set by create_app().
+token_service = TokenService(None)
+
+# Endpoints that obtain tokens. A client still sending its expired access token
+# must be able to log in, register or refresh, so these ignore the header.
+TOKEN_ISSUING_ENDPOINTS = {'api.login', 'api.influencer_login', 'api.refresh_token',
+                           'api.register_brand', 'api.register_influencer'}
+
+@api.before_app_request
+def load_current_user():
+    """
+    Verifies the bearer access token, if the client sent one, and exposes its claims
+    as g.current_user ({"sub": ..., "role": 'brand' | 'influencer', ...}).
+    Requests without a token are still served anonymously, and the token-issuing
+    endpoints are served anonymously whatever the header holds.
+    """
+    g.current_user = None
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer ') or request.endpoint in TOKEN_ISSUING_ENDPOINTS:
+        return None
+    try:
+        g.current_user = token_service.verify(header[len('Bearer '):].strip())
+    except TokenError as e:
+        return jsonify({"error": str(e)}), 401
+    return None
+
+def account_access_error(role, account_id):
+    """
+    Checks that the request may act for the `role` account `account_id`: a bearer token
+    of another account gets a 403 response, and an anonymous request gets a 401 when
+    AUTH_REQUIRED is set. Returns None when access is granted.
+    """
+    user = g.get('current_user')
+    if user is None:
+        if current_app.config['AUTH_REQUIRED']:
+            return jsonify({"error": "Authentication required."}), 401
+        return None
+    if account_id is not None and (user['role'], user['sub']) != (role, str(account_id)):
+        return jsonify({"error": "This token does not grant access to that account."}), 403
+    return None
+
+def account_only(role, account_id):
+    """
+    Restricts a view to one account; `account_id` receives the view arguments and
+    returns the id the request acts for (see account_access_error).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            return account_access_error(role, account_id(**kwargs)) or view(**kwargs)
+        return wrapper
+    return decorator
+
+def current_brand_id():
+    """The brand of the bearer token; anonymous requests still act for brand 1."""
+    user = g.get('current_user')
+    if user is not None and user['role'] == 'brand':
+        return int(user['sub'])
+    return 1
+
+def upgrade_password_hash(user, password):
+    """Re-hashes a just-verified password if its stored hash uses outdated KDF settings."""
+    if needs_rehash(user.password_hash, current_app.config['PASSWORD_HASH_METHOD']):
+        user.set_password(password)
+        db.session.commit()
+
 # --- API Endpoints ---
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
     email = data.get('email')
     password = data.get('password')
     brand_user = BrandUser.query.filter_by(email=email).first()
 
-    # Use the new check_password method
+    # Use the new check_password method. The slow password check runs once per session:
+    # afterwards the client authenticates with the returned tokens.
     if brand_user and brand_user.check_password(password):
-        return jsonify({"message": "Login successful!"})
+        upgrade_password_hash(brand_user, password)
+        return jsonify({"message": "Login successful!", **token_service.issue_tokens('brand', brand_user.id)})
     else:
         return jsonify({"error": "Invalid credentials"}), 401
 
-@app.route('/api/influencer/login', methods=['POST'])
+@api.route('/api/influencer/login', methods=['POST'])
 def influencer_login():
     data = request.get_json()
     email = data.get('email')
@@ -139,18 +1267,46 @@ def influencer_login():
 
     # Use the new check_password method
     if user and user.check_password(password):
+        upgrade_password_hash(user, password)
         user_data = {"id": user.id, "email": user.email, "profile_id": user.id}
-        return jsonify({"message": "Login successful!", "user": user_data})
+        return jsonify({"message": "Login successful!", "user": user_data, **token_service.issue_tokens('influencer', user.id)})
     else:
         return jsonify({"error": "Invalid credentials"}), 401
 
-@app.route('/api/campaigns', methods=['GET'])
+@api.route('/api/token/refresh', methods=['POST'])
+def refresh_token():
+    """Exchanges a refresh token ({"refresh_token": ...}) for a new access token without a password check."""
+    data = request.get_json() or {}
+    try:
+        claims = token_service.verify(data.get('refresh_token') or '', token_type='refresh')
+    except TokenError as e:
+        return jsonify({"error": str(e)}), 401
+    return jsonify({
+        "access_token": token_service.issue_access_token(claims['role'], claims['sub']),
+        "token_type": "Bearer",
+        "expires_in": current_app.config['ACCESS_TOKEN_TTL']
+    })
+
+@api.route('/api/campaigns', methods=['GET'])
+@read_only
 def get_campaigns():
-    all_campaigns = Campaign.query.all()
-    campaigns_list = [{"id": c.id, "name": c.name, "budget": c.budget, "brief": c.brief} for c in all_campaigns]
-    return jsonify(campaigns_list)
+    # Supports keyset pagination (?limit=&after=) and streaming (?stream=1), see list_response().
+    # Only the emitted columns are selected, with a preview of the brief.
+    return list_response(
+        db.session.query(Campaign.id, Campaign.name, Campaign.budget, *brief_preview_columns()),
+        Campaign.id, row_dict
+    )
+
+@api.route('/api/campaigns/<int:campaign_id>/brief', methods=['GET'])
+@read_only
+def get_campaign_brief(campaign_id):
+    """The full brief of a campaign, for lists that only received a preview."""
+    brief = db.session.query(Campaign.brief).filter_by(id=campaign_id).scalar()
+    if brief is None:
+        return jsonify({"error": "Campaign not found"}), 404
+    return jsonify({"id": campaign_id, "brief": brief})
 
-@app.route('/api/campaigns', methods=['POST'])
+@api.route('/api/campaigns', methods=['POST'])
 def create_campaign():
     # Get all the new data from the incoming request
     data = request.get_json()
@@ -164,12 +1320,16 @@ def create_campaign():
         brief=data.get('brief'),
         budget=float(data.get('budget')),
         is_public=data.get('isPublic', False), # Default to False if not provided
-        brand_id=1 # Hardcoded for now, would come from logged-in user session
+        brand_id=current_brand_id()
     )
     
-    # Add to the database session and commit to save
+    # Add to the database session and commit to save, together with the job that
+    # has the match worker score the new campaign.
     db.session.add(new_campaign)
+    db.session.flush()
+    enqueue_match_job('campaign', new_campaign.id)
     db.session.commit()
+    response_cache.bump('campaigns')
     
     # Return the data of the newly created campaign, including its new ID
     return jsonify({
@@ -181,42 +1341,180 @@ def create_campaign():
         "budget": new_campaign.budget
     }), 201
 
-@app.route('/api/campaigns/<int:campaign_id>/details', methods=['GET'])
+def campaign_details_versions(campaign_id):
+    return [
+        *row_versions(Campaign, Campaign.id == campaign_id),
+        *row_versions(Invite, Invite.campaign_id == campaign_id),
+        *row_versions(Submission, Submission.invite_id.in_(select(Invite.id).where(Invite.campaign_id == campaign_id))),
+        *row_versions(Influencer, Influencer.id.in_(select(Invite.influencer_id).where(Invite.campaign_id == campaign_id))),
+    ]
+
+def campaign_applications_versions(campaign_id):
+    return [
+        *row_versions(Campaign, Campaign.id == campaign_id),
+        *row_versions(Application, Application.campaign_id == campaign_id),
+        *row_versions(Influencer, Influencer.id.in_(select(Application.influencer_id).where(Application.campaign_id == campaign_id))),
+    ]
+
+def serialize_campaign_invite(invite):
+    """An invite as listed on the campaign page, with its influencer and first submission."""
+    # Find the first submission linked to this invite.
+    submission = first_submission(invite)
+    return {
+        "invite_id": invite.id,
+        "status": invite.status,
+        "influencer": {
+            "id": invite.influencer.id,
+            "name": invite.influencer.name,
+            "followers": invite.influencer.followers
+        },
+        # If a submission exists, include its id, url, and status. Otherwise, None.
+        "submission_id": submission.id if submission else None,
+        "submission_url": submission.content_url if submission else None,
+        "submission_status": submission.status if submission else None
+    }
+
+def serialize_application(application):
+    """An application as listed on the campaign page, enriched with influencer details."""
+    return {
+        "application_id": application.id,
+        "status": application.status,
+        "influencer": {
+            "id": application.influencer.id,
+            "name": application.influencer.name,
+            "followers": application.influencer.followers,
+            "niche": application.influencer.niche,
+            "engagement_rate": application.influencer.engagement_rate
+        }
+    }
+
+@api.route('/api/campaigns/<int:campaign_id>/details', methods=['GET'])
+@read_only
+@conditional(campaign_details_versions)
 def get_campaign_details(campaign_id):
-    campaign = Campaign.query.get(campaign_id)
+    # Eager-load the invites with their influencers and submissions, so the whole
+    # page costs three queries no matter how many invites the campaign has.
+    campaign = Campaign.query.options(
+        db.selectinload(Campaign.invites).joinedload(Invite.influencer),
+        db.selectinload(Campaign.invites).selectinload(Invite.submission)
+    ).filter_by(id=campaign_id).first()
     if not campaign:
         return jsonify({"error": "Campaign not found"}), 404
 
-    invites_data = []
-    for invite in campaign.invites:
-        # Find the first submission linked to this invite.
-        submission = Submission.query.filter_by(invite_id=invite.id).first()
-        
-        invites_data.append({
-            "invite_id": invite.id,
-            "status": invite.status,
-            "influencer": {
-                "id": invite.influencer.id,
-                "name": invite.influencer.name,
-                "followers": invite.influencer.followers
-            },
-            # If a submission exists, include its id, url, and status. Otherwise, None.
-            "submission_id": submission.id if submission else None,
-            "submission_url": submission.content_url if submission else None,
-            "submission_status": submission.status if submission else None
-        })
-
     campaign_details = {
         "id": campaign.id, "name": campaign.name, "budget": campaign.budget,
-        "brief": campaign.brief, "invites": invites_data
+        "brief": campaign.brief, "invites": [serialize_campaign_invite(invite) for invite in campaign.invites]
     }
     
     return jsonify(campaign_details)
 
-@app.route('/api/campaigns/<int:campaign_id>/match', methods=['GET'])
+# Parts of the campaign page that /page can return, selected with ?fields=.
+CAMPAIGN_PAGE_FIELDS = ('campaign', 'invites', 'applications')
+
+def parse_fields(available):
+    """
+    Reads the optional ?fields=a,b selector of a composite endpoint. Returns the
+    selected parts (all of `available` by default); raises ValueError on unknown ones.
+    """
+    requested = request.args.get('fields')
+    if not requested:
+        return set(available)
+    fields = {field.strip() for field in requested.split(',') if field.strip()}
+    unknown = fields - set(available)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}.")
+    return fields
+
+@api.route('/api/campaigns/<int:campaign_id>/page', methods=['GET'])
+@read_only
+@conditional(lambda campaign_id: campaign_details_versions(campaign_id) + campaign_applications_versions(campaign_id))
+def get_campaign_page(campaign_id):
+    """
+    Everything CampaignDetailPage shows, in one request: {"campaign": {...},
+    "invites": [...], "applications": [...]} as returned by /details and
+    /applications. ?fields=invites,applications limits the response (and the
+    queries) to those parts.
+    """
+    try:
+        fields = parse_fields(CAMPAIGN_PAGE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # One query for the campaign plus one per eager-loaded relationship that was asked for.
+    options = []
+    if 'invites' in fields:
+        options += [
+            db.selectinload(Campaign.invites).joinedload(Invite.influencer),
+            db.selectinload(Campaign.invites).selectinload(Invite.submission),
+        ]
+    if 'applications' in fields:
+        options.append(db.selectinload(Campaign.applications).joinedload(Application.influencer))
+    campaign = Campaign.query.options(*options).filter_by(id=campaign_id).first()
+    if not campaign:
+        return jsonify({"error": "Campaign not found"}), 404
+
+    page = {}
+    if 'campaign' in fields:
+        page["campaign"] = {
+            "id": campaign.id, "name": campaign.name, "budget": campaign.budget, "brief": campaign.brief,
+            "goal": campaign.goal, "status": campaign.status, "target_location": campaign.target_location,
+            "is_public": campaign.is_public
+        }
+    if 'invites' in fields:
+        page["invites"] = [serialize_campaign_invite(invite) for invite in campaign.invites]
+    if 'applications' in fields:
+        page["applications"] = [serialize_application(application) for application in campaign.applications]
+    return jsonify(page)
+
+def parse_match_params():
+    """Reads the optional limit/min_score query parameters shared by the match endpoints."""
+    try:
+        limit = int(request.args.get('limit', current_app.config['MATCH_DEFAULT_LIMIT']))
+        min_score = float(request.args.get('min_score', 0))
+    except ValueError:
+        raise ValueError("limit must be an integer and min_score a number.")
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return min(limit, current_app.config['MATCH_MAX_LIMIT']), min_score
+
+def serialize_matches(ranked, influencers_by_id):
+    """Turns (influencer_id, score, matched_keywords) tuples into the JSON sent to the frontend."""
+    matches = []
+    for influencer_id, score, matched_keywords in ranked:
+        influencer = influencers_by_id.get(influencer_id)
+        if influencer is None or not influencer.keywords:
+            continue
+        influencer_data = {
+            "id": influencer.id,
+            "name": influencer.name,
+            "followers": influencer.followers,
+            "location": influencer.location,
+            "niche": influencer.niche,
+            "engagement_rate": influencer.engagement_rate,
+            "keywords": split_keywords(influencer.keywords) # Send as a clean list
+        }
+        matches.append({
+            "influencer": influencer_data,
+            "match_score": round(score, 4),
+            "matched_keywords": matched_keywords
+        })
+    return matches
+
+@api.route('/api/campaigns/<int:campaign_id>/match', methods=['GET'])
+@read_only
+@response_cache.cached(lambda campaign_id: [f'campaign:{campaign_id}', 'influencers'])
 def find_matches(campaign_id):
-    # --- Step 1: Get the Campaign ---
-    campaign = Campaign.query.get(campaign_id)
+    # Optional query parameters, e.g. /api/campaigns/1/match?limit=20&min_score=0.3&radius_km=40
+    try:
+        limit, min_score = parse_match_params()
+        radius_km = parse_radius()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # --- Step 1: Get the Campaign (and whether its matches are precomputed) ---
+    campaign, built_at = db.session.query(Campaign, CampaignMatchStatus.built_at).outerjoin(
+        CampaignMatchStatus, CampaignMatchStatus.campaign_id == Campaign.id
+    ).filter(Campaign.id == campaign_id).first() or (None, None)
     if not campaign:
         return jsonify({"error": "Campaign not found"}), 404
     
@@ -224,63 +1522,151 @@ def find_matches(campaign_id):
     target_location = campaign.target_location
     if not target_location:
         return jsonify({"error": "This campaign has no target location specified."}), 400
+    # With ?radius_km=, candidates are every influencer within that distance of the target
+    # location ("Round Rock" for an "Austin" campaign) instead of those named like it.
+    near = None
+    if radius_km is not None:
+        if campaign.latitude is None:
+            return jsonify({"error": "This campaign's target location could not be geocoded."}), 400
+        near = (campaign.latitude, campaign.longitude, radius_km)
+
+    # --- Step 2: Use the Precomputed Matches Once the Match Worker Built Them ---
+    # They are ranked by location name, so radius searches are always scored live.
+    if built_at is not None and near is None and limit <= current_app.config['MATCH_TABLE_SIZE']:
+        return jsonify(serialize_matches(*stored_matches(campaign_id, limit, min_score)))
+
+    # --- Step 3: Otherwise Normalize the Campaign Brief Keywords ---
+    # Punctuation is removed (e.g., "coffee." becomes "coffee") and the brief is split into unique words.
+    campaign_keywords = tokenize_brief(campaign.brief)
+
+    # --- Step 4: Score and Rank Candidates from the Keyword Index ---
+    # The index only walks the postings of the brief's words inside the matching
+    # location partitions. Scores blend IDF-weighted keyword overlap with
+    # followers and engagement rate, and only the top `limit` are kept.
+    ranked = get_keyword_index().top_matches(target_location, campaign_keywords, limit=limit, min_score=min_score, near=near)
+    if not ranked:
+        return jsonify([])
+
+    # --- Step 5: Load Only the Influencers We Are Going to Return ---
+    influencers = Influencer.query.filter(Influencer.id.in_([influencer_id for influencer_id, _, _ in ranked])).all()
+
+    # Results are already ordered from highest score to lowest.
+    return jsonify(serialize_matches(ranked, {influencer.id: influencer for influencer in influencers}))
+
+@api.route('/api/campaigns/match/batch', methods=['POST'])
+@read_only
+def find_matches_batch():
+    """
+    Matches several campaigns in one request, e.g. {"campaignIds": [1, 2, 3]}.
+    Campaigns are grouped by target location so each candidate set is scored once.
+    Accepts ?radius_km= like the single-campaign endpoint.
+    """
+    try:
+        limit, min_score = parse_match_params()
+        radius_km = parse_radius()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    data = request.get_json() or {}
+    campaign_ids = data.get('campaignIds')
+    if not isinstance(campaign_ids, list) or not campaign_ids or not all(isinstance(i, int) for i in campaign_ids):
+        return jsonify({"error": "campaignIds must be a non-empty list of campaign ids."}), 400
+    if len(campaign_ids) > current_app.config['MATCH_BATCH_MAX_CAMPAIGNS']:
+        return jsonify({"error": f"At most {current_app.config['MATCH_BATCH_MAX_CAMPAIGNS']} campaigns can be matched at once."}), 400
+
+    # --- Step 1: Load every requested campaign in one query ---
+    campaigns = Campaign.query.filter(Campaign.id.in_(campaign_ids)).all()
+    campaigns_by_id = {campaign.id: campaign for campaign in campaigns}
+
+    # --- Step 2: Group the campaigns by normalized target location ---
+    errors = {}
+    groups = {}
+    for campaign_id in campaign_ids:
+        campaign = campaigns_by_id.get(campaign_id)
+        if campaign is None:
+            errors[str(campaign_id)] = "Campaign not found"
+        elif not normalize_location(campaign.target_location):
+            errors[str(campaign_id)] = "This campaign has no target location specified."
+        elif radius_km is not None and campaign.latitude is None:
+            errors[str(campaign_id)] = "This campaign's target location could not be geocoded."
+        else:
+            groups.setdefault(normalize_location(campaign.target_location), []).append(campaign)
+
+    # --- Step 3: Score each location group in a single matrix operation ---
+    index = get_keyword_index()
+    ranked_by_campaign = {}
+    for location, group in groups.items():
+        token_sets = [tokenize_brief(campaign.brief) for campaign in group]
+        # Campaigns sharing a target location share its coordinates.
+        near = None if radius_km is None else (group[0].latitude, group[0].longitude, radius_km)
+        for campaign, ranked in zip(group, index.top_matches_batch(location, token_sets, limit=limit, min_score=min_score, near=near)):
+            ranked_by_campaign[campaign.id] = ranked
+
+    # --- Step 4: Load all returned influencers at once ---
+    influencer_ids = {influencer_id for ranked in ranked_by_campaign.values() for influencer_id, _, _ in ranked}
+    influencers_by_id = {}
+    if influencer_ids:
+        influencers = Influencer.query.filter(Influencer.id.in_(list(influencer_ids))).all()
+        influencers_by_id = {influencer.id: influencer for influencer in influencers}
+
+    matches = {str(campaign_id): serialize_matches(ranked, influencers_by_id) for campaign_id, ranked in ranked_by_campaign.items()}
+    return jsonify({"matches": matches, "errors": errors})
+
+@api.route('/api/invites', methods=['POST'])
+def create_invite():
+    data = request.get_json()
+    row = {"campaign_id": data.get('campaignId'), "influencer_id": data.get('influencerId'), "status": 'pending'}
+    created = insert_new_rows(Invite, [row], Invite.id)
+    if not created: return jsonify({"message": "This influencer has already been invited."}), 200
+    db.session.commit()
+    response_cache.bump('invites')
+    publish_changes('invite.created', [{"invite_id": created[0].id, **row}])
+    return jsonify({"message": "Invitation sent successfully!", "invite_id": created[0].id}), 201
 
-    # --- Step 2: Normalize the Campaign Brief Keywords ---
-    import string
-    # First, remove all punctuation from the brief (e.g., "coffee." becomes "coffee")
-    translator = str.maketrans('', '', string.punctuation)
-    clean_brief = campaign.brief.lower().translate(translator)
-    # Then, split into a set of unique words.
-    campaign_keywords = set(clean_brief.split())
-
-    # --- Step 3: Find All Potential Influencers ---
-    all_influencers = Influencer.query.filter(Influencer.location.ilike(f'%{target_location}%')).all()
+@api.route('/api/invites/bulk', methods=['POST'])
+def create_invites_bulk():
+    """
+    Invites many influencers to a campaign at once, e.g. {"campaignId": 1, "influencerIds": [4, 5, 6]}.
+    Every missing invite is inserted by one statement; already invited influencers are skipped.
+    """
+    data = request.get_json() or {}
+    campaign_id = data.get('campaignId')
+    influencer_ids = data.get('influencerIds')
+    if not isinstance(influencer_ids, list) or not all(isinstance(i, int) for i in influencer_ids):
+        return jsonify({"error": "influencerIds must be a list of influencer ids."}), 400
+    if len(influencer_ids) > current_app.config['BULK_INVITE_MAX']:
+        return jsonify({"error": f"At most {current_app.config['BULK_INVITE_MAX']} influencers can be invited at once."}), 400
+    if not db.session.query(Campaign.id).filter_by(id=campaign_id).first():
+        return jsonify({"error": "Campaign not found"}), 404
 
-    # --- Step 4: Score Each Influencer ---
-    matches = []
-    for influencer in all_influencers:
-        if influencer.keywords:
-                
-            influencer_keywords = {kw.strip() for kw in influencer.keywords.lower().split(',')}
-            
-            # Calculate the score based on the intersection of the two sets.
-            common_keywords = campaign_keywords.intersection(influencer_keywords)
-            score = len(common_keywords)
-
-            # Only include influencers who have at least one matching keyword.
-            if score > 0:
-                # Prepare the influencer data to be sent to the frontend.
-                influencer_data = {
-                    "id": influencer.id, 
-                    "name": influencer.name, 
-                    "followers": influencer.followers,
-                    "location": influencer.location, 
-                    "niche": influencer.niche,
-                    "engagement_rate": influencer.engagement_rate,
-                    "keywords": [kw.strip() for kw in influencer.keywords.split(',')] # Send as a clean list
-                }
-                matches.append({"influencer": influencer_data, "match_score": score})
-    
-    # Sort the results from highest score to lowest.
-    sorted_matches = sorted(matches, key=lambda x: x['match_score'], reverse=True)
-    
-    return jsonify(sorted_matches)
+    # Drop duplicates from the request (keeping its order) and ids that are not influencers.
+    requested = list(dict.fromkeys(influencer_ids))
+    known = {influencer_id for influencer_id, in db.session.query(Influencer.id).filter(Influencer.id.in_(requested))}
+    not_found = [influencer_id for influencer_id in requested if influencer_id not in known]
+    rows = [{"campaign_id": campaign_id, "influencer_id": influencer_id, "status": 'pending'}
+            for influencer_id in requested if influencer_id in known]
 
-@app.route('/api/invites', methods=['POST'])
-def create_invite():
-    data = request.get_json()
-    existing_invite = Invite.query.filter_by(campaign_id=data.get('campaignId'), influencer_id=data.get('influencerId')).first()
-    if existing_invite: return jsonify({"message": "This influencer has already been invited."}), 200
-    new_invite = Invite(campaign_id=data.get('campaignId'), influencer_id=data.get('influencerId'))
-    db.session.add(new_invite)
+    created = dict(insert_new_rows(Invite, rows, Invite.influencer_id, Invite.id)) if rows else {}
     db.session.commit()
-    return jsonify({"message": "Invitation sent successfully!", "invite_id": new_invite.id}), 201
+    if created:
+        response_cache.bump('invites')
+        publish_changes('invite.created', [{"invite_id": created[row["influencer_id"]], **row}
+                                           for row in rows if row["influencer_id"] in created])
+
+    return jsonify({
+        "created": [row["influencer_id"] for row in rows if row["influencer_id"] in created],
+        "skipped": [row["influencer_id"] for row in rows if row["influencer_id"] not in created],
+        "not_found": not_found
+    }), 201 if created else 200
 
 
-@app.route('/api/influencer/profile', methods=['GET'])
+@api.route('/api/influencer/profile', methods=['GET'])
+@account_only('influencer', lambda: request.args.get('id'))
+@read_only
+@conditional(lambda: row_versions(Influencer, Influencer.id == request.args.get('id', type=int)))
 def get_influencer_profile():
-    # In a real app, we'd get the ID from a secure session/token.
-    # For now, we'll get it from a query parameter, e.g., /api/influencer/profile?id=1
+    # The ID comes from a query parameter, e.g., /api/influencer/profile?id=1; a bearer
+    # token must belong to that influencer (see account_only).
     influencer_id = request.args.get('id')
     if not influencer_id:
         return jsonify({"error": "Influencer ID is required"}), 400
@@ -291,7 +1677,10 @@ def get_influencer_profile():
         return jsonify({"error": "Influencer not found"}), 404
 
     # Convert the influencer object to a dictionary to send as JSON
-    profile_data = {
+    return jsonify(serialize_profile(influencer))
+
+def serialize_profile(influencer):
+    return {
         "id": influencer.id,
         "name": influencer.name,
         "email": influencer.email,
@@ -303,9 +1692,9 @@ def get_influencer_profile():
         "audience_age_range": influencer.audience_age_range,
         "audience_gender_split": influencer.audience_gender_split,
     }
-    return jsonify(profile_data)
 
-@app.route('/api/influencer/profile', methods=['PUT'])
+@api.route('/api/influencer/profile', methods=['PUT'])
+@account_only('influencer', lambda: request.args.get('id'))
 def update_influencer_profile():
     # Get the ID from the query parameter
     influencer_id = request.args.get('id')
@@ -320,6 +1709,9 @@ def update_influencer_profile():
     # Get the new data from the request body
     data = request.get_json()
 
+    # The inputs of the match score, to tell whether the match worker has to rescore.
+    old_location, old_keywords, old_engagement_rate = influencer.location, influencer.keywords, influencer.engagement_rate
+
     # Update each field if new data was provided for it
     influencer.name = data.get('name', influencer.name)
     influencer.location = data.get('location', influencer.location)
@@ -329,48 +1721,115 @@ def update_influencer_profile():
     influencer.audience_age_range = data.get('audience_age_range', influencer.audience_age_range)
     influencer.audience_gender_split = data.get('audience_gender_split', influencer.audience_gender_split)
 
+    if (influencer.location, influencer.keywords) != (old_location, old_keywords):
+        # The keyword weights of both locations change, and with them everyone's scores there.
+        enqueue_location_rebuilds(old_location, influencer.location)
+    if (influencer.location, influencer.keywords, influencer.engagement_rate) != (old_location, old_keywords, old_engagement_rate):
+        enqueue_match_job('influencer', influencer.id)
+
     # Commit the changes to the database
     db.session.commit()
+    influencer_changed(influencer)
 
     # Send back a success message
     return jsonify({"message": "Profile updated successfully!"})
 
-@app.route('/api/influencer/<int:influencer_id>/invitations', methods=['GET'])
+@api.route('/api/influencer/<int:influencer_id>/invitations', methods=['GET'])
+@account_only('influencer', lambda influencer_id: influencer_id)
+@read_only
+@conditional(lambda influencer_id: [
+    *row_versions(Invite, Invite.influencer_id == influencer_id),
+    *row_versions(Campaign, Campaign.id.in_(select(Invite.campaign_id).where(Invite.influencer_id == influencer_id))),
+])
 def get_influencer_invitations(influencer_id):
-    invites = Invite.query.filter_by(influencer_id=influencer_id).all()
+    invites = Invite.query.filter_by(influencer_id=influencer_id).options(db.joinedload(Invite.campaign)).all()
     enriched_invites = [{"invite_id": invite.id, "status": invite.status, "campaign": {"id": invite.campaign.id, "name": invite.campaign.name, "budget": invite.campaign.budget, "brief": invite.campaign.brief}} for invite in invites]
     return jsonify(enriched_invites)
 
-@app.route('/api/invites/<int:invite_id>', methods=['PUT'])
+@api.route('/api/invites/<int:invite_id>', methods=['PUT'])
 def update_invite_status(invite_id):
     data = request.get_json()
     invite = Invite.query.get(invite_id)
     if not invite: return jsonify({"error": "Invitation not found"}), 404
     invite.status = data.get('status')
+    change = {"invite_id": invite.id, "campaign_id": invite.campaign_id, "influencer_id": invite.influencer_id,
+              "status": invite.status}
     db.session.commit()
-    return jsonify({"invite_id": invite.id, "status": invite.status})
-
+    response_cache.bump('invites')
+    publish_changes('invite.updated', [change])
+    return jsonify({"invite_id": change["invite_id"], "status": change["status"]})
+
+
+def influencer_projects_versions(influencer_id):
+    return [
+        *row_versions(Invite, Invite.influencer_id == influencer_id),
+        *row_versions(Submission, Submission.invite_id.in_(select(Invite.id).where(Invite.influencer_id == influencer_id))),
+        *row_versions(Application, Application.influencer_id == influencer_id),
+        *row_versions(Campaign, or_(
+            Campaign.id.in_(select(Invite.campaign_id).where(Invite.influencer_id == influencer_id)),
+            Campaign.id.in_(select(Application.campaign_id).where(Application.influencer_id == influencer_id)),
+        )),
+    ]
 
-@app.route('/api/influencer/<int:influencer_id>/projects', methods=['GET'])
+@api.route('/api/influencer/<int:influencer_id>/projects', methods=['GET'])
+@account_only('influencer', lambda influencer_id: influencer_id)
+@read_only
+@conditional(influencer_projects_versions)
 def get_influencer_projects(influencer_id):
+    return jsonify(load_influencer_projects(influencer_id))
+
+# Parts of the influencer dashboard that /dashboard can return, selected with ?fields=.
+INFLUENCER_DASHBOARD_FIELDS = ('profile', 'projects')
+
+@api.route('/api/influencer/<int:influencer_id>/dashboard', methods=['GET'])
+@account_only('influencer', lambda influencer_id: influencer_id)
+@read_only
+@conditional(lambda influencer_id: row_versions(Influencer, Influencer.id == influencer_id) + influencer_projects_versions(influencer_id))
+def get_influencer_dashboard(influencer_id):
+    """
+    Everything InfluencerDashboard shows, in one request: {"profile": {...},
+    "projects": [...]} as returned by /profile and /projects. ?fields=projects
+    limits the response (and the queries) to that part.
+    """
+    try:
+        fields = parse_fields(INFLUENCER_DASHBOARD_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    dashboard = {}
+    if 'profile' in fields:
+        influencer = db.session.get(Influencer, influencer_id)
+        if not influencer:
+            return jsonify({"error": "Influencer not found"}), 404
+        dashboard["profile"] = serialize_profile(influencer)
+    if 'projects' in fields:
+        dashboard["projects"] = load_influencer_projects(influencer_id)
+    return jsonify(dashboard)
+
+def load_influencer_projects(influencer_id):
     """
     Gathers all projects associated with an influencer:
     - Direct invitations
     - Their applications to public campaigns
     """
     
-    # --- Step 1: Get all direct invitations ---
-    invites = Invite.query.filter_by(influencer_id=influencer_id).all()
+    # --- Step 1: Get all direct invitations, with their campaigns and submissions ---
+    invites = Invite.query.filter_by(influencer_id=influencer_id).options(
+        db.joinedload(Invite.campaign),
+        db.selectinload(Invite.submission)
+    ).all()
     
-    # --- Step 2: Get all their applications ---
-    applications = Application.query.filter_by(influencer_id=influencer_id).all()
+    # --- Step 2: Get all their applications, with their campaigns ---
+    applications = Application.query.filter_by(influencer_id=influencer_id).options(
+        db.joinedload(Application.campaign)
+    ).all()
 
     # --- Step 3: Combine and format the data into a unified list ---
     projects = []
 
     # Process direct invitations
     for invite in invites:
-        submission = Submission.query.filter_by(invite_id=invite.id).first()
+        submission = first_submission(invite)
         projects.append({
             "project_id": f"invite_{invite.id}", # Unique ID for the frontend
             "campaign_id": invite.campaign.id,
@@ -399,147 +1858,167 @@ def get_influencer_projects(influencer_id):
             "type": "application"
         })
 
-    return jsonify(projects)
+    return projects
 
-@app.route('/api/submissions', methods=['POST'])
+@api.route('/api/submissions', methods=['POST'])
 def create_submission():
     data = request.get_json()
     invite = Invite.query.filter_by(campaign_id=data.get('campaignId'), influencer_id=data.get('influencerId'), status='accepted').first()
     if not invite: return jsonify({"error": "No accepted invitation found for this submission."}), 404
     new_submission = Submission(invite_id=invite.id, content_url=data.get('contentUrl'))
     db.session.add(new_submission)
+    db.session.flush()
+    change = {"submission_id": new_submission.id, "invite_id": invite.id, "campaign_id": invite.campaign_id,
+              "influencer_id": invite.influencer_id, "status": new_submission.status}
     db.session.commit()
-    return jsonify({"submission_id": new_submission.id}), 201
+    response_cache.bump('submissions')
+    publish_changes('submission.created', [change])
+    return jsonify({"submission_id": change["submission_id"]}), 201
 
-@app.route('/api/influencers/search', methods=['GET'])
+def influencer_search_columns():
+    return (Influencer.id, Influencer.name, Influencer.followers, Influencer.location,
+            Influencer.niche, Influencer.engagement_rate, Influencer.keywords)
+
+def serialize_search_result(influencer):
+    """An influencer search result, from a row mapping of the searched columns."""
+    return {**influencer, "keywords": split_keywords(influencer["keywords"])}
+
+@api.route('/api/influencers/search', methods=['GET'])
+@read_only
+@response_cache.cached(['influencers'])
 def search_influencers():
     # This endpoint will build a database query dynamically based on the filters provided.
-    
-    # --- Step 1: Start with a base query for all influencers ---
-    # This is the starting point before we add any filters.
-    query = Influencer.query
 
-    # --- Step 2: Get all possible filters from the request's query parameters ---
+    # --- Step 1: Get all possible filters from the request's query parameters ---
     # e.g., /api/influencers/search?niche=Food%20&%20Drink&location=Austin
-    niche_filter = request.args.get('niche')
-    location_filter = request.args.get('location')
-    min_followers_filter = request.args.get('min_followers')
-    max_followers_filter = request.args.get('max_followers')
+    try:
+        filters = influencer_search_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # --- Step 2: Answer from the catalog snapshot when it is fresh ---
+    # Streaming stays on SQL, and so do niche filters containing LIKE wildcards.
+    streaming = request.args.get('stream', '').lower() in ('1', 'true')
+    view = None if streaming else influencer_snapshot_for(filters)
+    if view is not None:
+        return snapshot_list_response(view, filters, serialize_search_result)
+
+    # --- Step 3: Otherwise start with a base query for all influencers ---
+    # This is the starting point before we add any filters.
+    # Only the columns sent to the client are selected, as plain rows.
+    query = db.session.query(*influencer_search_columns())
 
-    # --- Step 3: Dynamically add filters to the query if they exist ---
-    
-    # If a 'niche' filter was provided in the URL...
-    if niche_filter:
-        # ...add a filter to our query. We use .ilike() for case-insensitive matching.
-        query = query.filter(Influencer.niche.ilike(f'%{niche_filter}%'))
-
-    # If a 'location' filter was provided...
-    if location_filter:
-        # ...add a case-insensitive filter for the location.
-        query = query.filter(Influencer.location.ilike(f'%{location_filter}%'))
-
-    # If a 'min_followers' filter was provided...
-    if min_followers_filter:
-        # ...add a filter for influencers with followers greater than or equal to the value.
-        # We convert the value to an integer.
-        query = query.filter(Influencer.followers >= int(min_followers_filter))
-
-    # If a 'max_followers' filter was provided...
-    if max_followers_filter:
-        # ...add a filter for influencers with followers less than or equal to the value.
-        query = query.filter(Influencer.followers <= int(max_followers_filter))
-
-    # --- Step 4: Execute the final, constructed query ---
-    # The 'query' variable now has all the requested filters applied.
-    filtered_influencers = query.all()
-
-    # --- Step 5: Convert the results to a JSON-friendly format ---
-    # We create a list of dictionaries to send to the frontend.
-    results = [
-        {
-            "id": inf.id,
-            "name": inf.name,
-            "followers": inf.followers,
-            "location": inf.location,
-            "niche": inf.niche,
-            "engagement_rate": inf.engagement_rate,
-            "keywords": [kw.strip() for kw in inf.keywords.split(',')]
-        } for inf in filtered_influencers
-    ]
+    # --- Step 4: Dynamically add the filters that were provided, see influencer_filter_criteria() ---
+    query = query.filter(*influencer_filter_criteria(filters))
 
-    # Return the final list of results.
-    return jsonify(results)
+    # --- Step 5: Execute the final, constructed query and convert the results ---
+    # The 'query' variable now has all the requested filters applied. Results can be
+    # paged (?limit=&after=) or streamed (?stream=1), see list_response().
+    return list_response(query, Influencer.id, lambda inf: serialize_search_result(inf._asdict()))
 
-@app.route('/api/campaigns/public', methods=['GET'])
+@api.route('/api/influencers/facets', methods=['GET'])
+@read_only
+@response_cache.cached(['influencers'])
+def get_influencer_facets():
+    """
+    Counts of the influencers matching the search filters, per niche, normalized
+    location, follower bucket and engagement-rate bucket, plus the total. Buckets are
+    labelled by their inclusive lower and exclusive upper bound ("1000-5000").
+    """
+    try:
+        filters = influencer_search_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    view = influencer_snapshot_for(filters)
+    if view is not None:
+        return jsonify(snapshot_facets(view, filters))
+    return jsonify(sql_facets(filters))
+
+@api.route('/api/campaigns/public', methods=['GET'])
+@read_only
+@response_cache.cached(['campaigns'])
 def get_public_campaigns():
     """Returns a list of all campaigns marked as public."""
-    # Query the database for all campaigns where is_public is True.
-    public_campaigns = Campaign.query.filter_by(is_public=True).all()
-
-    # Convert the results to a JSON-friendly format.
-    results = [
-        {
-            "id": c.id,
-            "name": c.name,
-            "goal": c.goal,
-            "brief": c.brief,
-            "budget": c.budget,
-            "target_location": c.target_location,
-            # We can even include the brand's name later if we add it to the BrandUser model.
-            "brand_name": "A Great Brand" 
-        } for c in public_campaigns
-    ]
-    return jsonify(results)
+    # Query the database for all campaigns where is_public is True and convert them to
+    # a JSON-friendly format. Supports ?limit=&after= and ?stream=1, see list_response().
+    query = db.session.query(*public_campaign_columns()).filter(Campaign.is_public)
+    return list_response(query, Campaign.id, lambda c: serialize_public_campaign(c._asdict()))
+
+def public_campaign_columns():
+    """The columns of the public campaign list."""
+    return (Campaign.id, Campaign.name, Campaign.goal, Campaign.budget, Campaign.target_location, *brief_preview_columns())
+
+def serialize_public_campaign(campaign):
+    return {
+        **campaign,
+        # We can even include the brand's name later if we add it to the BrandUser model.
+        "brand_name": "A Great Brand"
+    }
 
-@app.route('/api/applications', methods=['POST'])
+@api.route('/api/campaigns/public/search', methods=['GET'])
+@read_only
+@response_cache.cached(['campaigns'])
+def search_public_campaigns_view():
+    """
+    Full-text search over public campaigns: ?q=<words>&limit=&offset=. Returns the best
+    matches first, each with a highlighted snippet of its brief (escaped HTML) instead of the full text,
+    as {"items": [...], "next_offset": ...} (next_offset is null on the last page).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "The q parameter is required."}), 400
+    try:
+        limit = int(request.args.get('limit', current_app.config['PAGE_DEFAULT_LIMIT']))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers."}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({"error": "limit must be at least 1 and offset not negative."}), 400
+    limit = min(limit, current_app.config['PAGE_MAX_LIMIT'])
+
+    # Fetch one extra row to learn whether there is another page.
+    rows = search_public_campaigns(db.session.connection(), query, limit + 1, offset)
+    items = [{**row, "brand_name": "A Great Brand"} for row in rows[:limit]]
+    return jsonify({"items": items, "next_offset": offset + limit if len(rows) > limit else None})
+
+@api.route('/api/applications', methods=['POST'])
 def create_application():
     """Allows an influencer to apply for a public campaign."""
     data = request.get_json()
     campaign_id = data.get('campaignId')
     influencer_id = data.get('influencerId')
 
-    # Prevent duplicate applications.
-    existing_application = Application.query.filter_by(
-        campaign_id=campaign_id, 
-        influencer_id=influencer_id
-    ).first()
-    if existing_application:
+    # Create a new Application record in the database. The unique index on
+    # (campaign_id, influencer_id) makes the insert a no-op for duplicate applications.
+    row = {"campaign_id": campaign_id, "influencer_id": influencer_id, "status": 'pending'}
+    created = insert_new_rows(Application, [row], Application.id)
+    if not created:
         return jsonify({"message": "You have already applied to this campaign."}), 409 # 409 Conflict
-
-    # Create a new Application record in the database.
-    new_application = Application(campaign_id=campaign_id, influencer_id=influencer_id)
-    db.session.add(new_application)
     db.session.commit()
+    response_cache.bump('applications')
+    publish_changes('application.created', [{"application_id": created[0].id, **row}])
 
     print(f"New Application: Influencer #{influencer_id} applied to Campaign #{campaign_id}")
-    return jsonify({"message": "Application submitted successfully!", "application_id": new_application.id}), 201
+    return jsonify({"message": "Application submitted successfully!", "application_id": created[0].id}), 201
 
-@app.route('/api/campaigns/<int:campaign_id>/applications', methods=['GET'])
+@api.route('/api/campaigns/<int:campaign_id>/applications', methods=['GET'])
+@read_only
+@conditional(campaign_applications_versions)
 def get_campaign_applications(campaign_id):
     """Returns all applications for a specific campaign."""
-    # Find the campaign to ensure it exists.
-    campaign = Campaign.query.get(campaign_id)
+    # Find the campaign to ensure it exists, loading its applicants along with it.
+    campaign = Campaign.query.options(
+        db.selectinload(Campaign.applications).joinedload(Application.influencer)
+    ).filter_by(id=campaign_id).first()
     if not campaign:
         return jsonify({"error": "Campaign not found"}), 404
 
     # The 'applications' backref from our Campaign model makes this easy.
     # We will gather all applications and enrich them with influencer details.
-    applications_data = [
-        {
-            "application_id": app.id,
-            "status": app.status,
-            "influencer": {
-                "id": app.influencer.id,
-                "name": app.influencer.name,
-                "followers": app.influencer.followers,
-                "niche": app.influencer.niche,
-                "engagement_rate": app.influencer.engagement_rate
-            }
-        } for app in campaign.applications
-    ]
+    applications_data = [serialize_application(application) for application in campaign.applications]
     return jsonify(applications_data)
 
-@app.route('/api/applications/<int:application_id>', methods=['PUT'])
+@api.route('/api/applications/<int:application_id>', methods=['PUT'])
 def update_application_status(application_id):
     """Updates the status of an application (e.g., to 'approved' or 'rejected')."""
     data = request.get_json()
@@ -555,30 +2034,33 @@ def update_application_status(application_id):
 
     # Update the status in the database.
     application.status = new_status
-    db.session.commit()
 
     # If an application is approved, we should also create an 'Invite' record
     # to signify that this influencer is now officially part of the campaign.
+    # It is inserted in the same transaction, and skipped if an invite already exists.
+    change = {"application_id": application.id, "campaign_id": application.campaign_id,
+              "influencer_id": application.influencer_id, "status": new_status}
+    created_invite = []
     if new_status == 'approved':
-        # Check if an invite already exists to avoid duplicates.
-        existing_invite = Invite.query.filter_by(
-            campaign_id=application.campaign_id,
-            influencer_id=application.influencer_id
-        ).first()
-        if not existing_invite:
-            new_invite = Invite(
-                campaign_id=application.campaign_id,
-                influencer_id=application.influencer_id,
-                status='accepted' # The invite is automatically accepted upon approval
-            )
-            db.session.add(new_invite)
-            db.session.commit()
-            print(f"Created a new 'accepted' invite for approved application #{application.id}")
+        created_invite = insert_new_rows(Invite, [{
+            "campaign_id": application.campaign_id,
+            "influencer_id": application.influencer_id,
+            "status": 'accepted' # The invite is automatically accepted upon approval
+        }], Invite.id)
+
+    db.session.commit()
+    response_cache.bump('applications')
+    publish_changes('application.updated', [change])
+    if created_invite:
+        response_cache.bump('invites')
+        publish_changes('invite.created', [{"invite_id": created_invite[0].id, "campaign_id": change["campaign_id"],
+                                            "influencer_id": change["influencer_id"], "status": 'accepted'}])
+        print(f"Created a new 'accepted' invite for approved application #{change['application_id']}")
 
     return jsonify({"message": "Application status updated successfully."})
 
 
-@app.route('/api/submissions/<int:submission_id>', methods=['PUT'])
+@api.route('/api/submissions/<int:submission_id>', methods=['PUT'])
 def update_submission_status(submission_id):
     """Updates the status of a content submission."""
     data = request.get_json()
@@ -594,14 +2076,44 @@ def update_submission_status(submission_id):
 
     # Update the status and commit to the database.
     submission.status = new_status
+    change = {"submission_id": submission.id, "invite_id": submission.invite_id,
+              "campaign_id": submission.invite.campaign_id, "influencer_id": submission.invite.influencer_id,
+              "status": new_status}
     db.session.commit()
+    response_cache.bump('submissions')
+    publish_changes('submission.updated', [change])
 
-    print(f"Submission #{submission.id} status updated to '{new_status}'")
+    print(f"Submission #{change['submission_id']} status updated to '{new_status}'")
     return jsonify({"message": "Submission status updated successfully."})
 
+@api.route('/api/influencer/<int:influencer_id>/events', methods=['GET'])
+@account_only('influencer', lambda influencer_id: influencer_id)
+def get_influencer_events(influencer_id):
+    """Server-sent events for the influencer's invites, applications and submissions."""
+    return event_stream_response(f'influencer:{influencer_id}')
+
+@api.route('/api/brand/<int:brand_id>/events', methods=['GET'])
+@account_only('brand', lambda brand_id: brand_id)
+def get_brand_events(brand_id):
+    """Server-sent events for the invites, applications and submissions of the brand's campaigns."""
+    return event_stream_response(f'brand:{brand_id}')
+
+@api.route('/api/_cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit and miss counters of this worker's response cache, per endpoint."""
+    return jsonify(response_cache.stats())
+
+@api.route('/api/_metrics', methods=['GET'])
+def get_metrics():
+    """Per-route request, latency and SQL metrics in the Prometheus text format (METRICS_ENABLED only)."""
+    metrics = current_app.extensions.get('nanoconnect_metrics')
+    if metrics is None:
+        return jsonify({"error": "Metrics are disabled. Set METRICS_ENABLED=1 to enable them."}), 404
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 # --- REGISTRATION ENDPOINTS ---
 
-@app.route('/api/register', methods=['POST'])
+@api.route('/api/register', methods=['POST'])
 def register_brand():
     data = request.get_json()
     email = data.get('email')
@@ -623,7 +2135,7 @@ def register_brand():
 
 # --- Find and replace the entire register_influencer function ---
 
-@app.route('/api/influencer/register', methods=['POST'])
+@api.route('/api/influencer/register', methods=['POST'])
 def register_influencer():
     data = request.get_json()
     email = data.get('email')
@@ -641,16 +2153,260 @@ def register_influencer():
     new_influencer.set_password(password)
     db.session.add(new_influencer)
     db.session.commit()
+    influencer_changed(new_influencer)
 
     return jsonify({"message": "Influencer account created successfully!"}), 201
 
 # --- DATABASE COMMANDS ---
-@app.cli.command('init-db')
+@api.cli.command('init-db')
 def init_db_command():
     db.create_all()
     print('Initialized the database.')
 
-# @app.cli.command('seed-db')
+# The migrate-* commands that add the tables and columns missing from an existing database.
+TABLE_MIGRATIONS = {'location': 'migrate-locations', 'campaign_match': 'migrate-matches',
+                    'campaign_match_status': 'migrate-matches', 'match_job': 'migrate-matches'}
+COLUMN_MIGRATIONS = {('influencer', 'location_normalized'): 'migrate-locations', ('influencer', 'geo_cell'): 'migrate-geo'}
+
+@api.cli.command('migrate-indexes')
+def migrate_indexes_command():
+    """Creates the secondary indexes declared on the models that an existing database is missing."""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            print(f"Skipping {table.name}: table does not exist (run {TABLE_MIGRATIONS.get(table.name, 'init-db')}).")
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            missing = [column.name for column in index.columns if column.name not in columns]
+            if missing:
+                commands = sorted({COLUMN_MIGRATIONS.get((table.name, name), 'the migration adding it') for name in missing})
+                print(f"Skipping index {index.name}: {table.name} has no column {', '.join(missing)} "
+                      f"(run {', '.join(commands)} first).")
+                continue
+            try:
+                # Unique constraints are declared as unique indexes, which both SQLite and
+                # PostgreSQL can add to an existing table.
+                index.create(db.engine)
+                print(f"Created index {index.name} on {table.name}.")
+            except IntegrityError:
+                print(f"Could not create unique index {index.name}: {table.name} has duplicate rows. Remove them and re-run.")
+    print('Index migration finished.')
+
+@api.cli.command('migrate-locations')
+def migrate_locations_command():
+    """Adds and backfills Influencer.location_normalized and the Location table on an existing database."""
+    inspector = inspect(db.engine)
+    if 'location_normalized' not in {column['name'] for column in inspector.get_columns('influencer')}:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE influencer ADD COLUMN location_normalized VARCHAR(80)'))
+        print('Added column influencer.location_normalized.')
+    Location.__table__.create(db.engine, checkfirst=True)
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.begin() as connection:
+            for statement in LOCATION_TRIGRAM_DDL:
+                connection.execute(text(statement))
+
+    # Backfill in batches, walking the primary key so each batch is an index range scan.
+    influencer_table = Influencer.__table__
+    location_insert = insert_ignore(Location.__table__, db.engine.dialect.name)
+    last_id, updated = 0, 0
+    while True:
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                select(influencer_table.c.id, influencer_table.c.location)
+                .where(influencer_table.c.id > last_id)
+                .order_by(influencer_table.c.id)
+                .limit(5000)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            values = [{"row_id": row.id, "normalized": normalize_location(row.location) or None} for row in rows]
+            connection.execute(
+                influencer_table.update()
+                .where(influencer_table.c.id == bindparam('row_id'))
+                .values(location_normalized=bindparam('normalized')),
+                values
+            )
+            names = {value["normalized"] for value in values if value["normalized"]}
+            if names:
+                connection.execute(location_insert, [{"name": name} for name in names])
+            updated += len(rows)
+    print(f'Normalized the location of {updated} influencers.')
+
+    for index in Influencer.__table__.indexes:
+        if index.name == 'ix_influencer_location_normalized':
+            index.create(db.engine, checkfirst=True)
+    print('Location migration finished.')
+
+@api.cli.command('migrate-search')
+def migrate_search_command():
+    """Creates the campaign full-text index on an existing database and fills it."""
+    dialect_name = db.engine.dialect.name
+    if dialect_name not in SEARCH_DDL:
+        print(f'No full-text index for {dialect_name}; search falls back to substring matching.')
+        return
+    with db.engine.begin() as connection:
+        for statement in SEARCH_DDL[dialect_name]:
+            connection.execute(text(statement))
+        if dialect_name in REBUILD_SQL:
+            connection.execute(text(REBUILD_SQL[dialect_name]))
+    print('Search migration finished.')
+
+@api.cli.command('migrate-versions')
+def migrate_versions_command():
+    """Adds the row version columns used for ETags to an existing database."""
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in VERSIONED_TABLES:
+            if inspector.has_table(table) and 'version' not in {column['name'] for column in inspector.get_columns(table)}:
+                connection.execute(text(f'ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1'))
+                print(f'Added column {table}.version.')
+    print('Version migration finished.')
+
+@api.cli.command('migrate-matches')
+def migrate_matches_command():
+    """Creates the precomputed match tables on an existing database and queues every campaign for the match worker."""
+    for model in (CampaignMatch, CampaignMatchStatus, MatchJob):
+        if not inspect(db.engine).has_table(model.__tablename__):
+            model.__table__.create(db.engine)
+            print(f'Created table {model.__tablename__}.')
+    print(f'Queued {enqueue_campaign_rebuilds()} campaigns for the match worker.')
+    print('Match migration finished.')
+
+@api.cli.command('migrate-geo')
+def migrate_geo_command():
+    """Adds and backfills the influencer and campaign coordinates and the spatial index on an existing database."""
+    inspector = inspect(db.engine)
+    # The coordinates are backfilled from the normalized locations.
+    if 'location_normalized' not in {column['name'] for column in inspector.get_columns('influencer')}:
+        raise click.ClickException('influencer has no column location_normalized; run migrate-locations first.')
+    with db.engine.begin() as connection:
+        for table_name, columns in (('influencer', ('latitude FLOAT', 'longitude FLOAT', 'geo_cell INTEGER')),
+                                    ('campaign', ('latitude FLOAT', 'longitude FLOAT'))):
+            existing = {column['name'] for column in inspector.get_columns(table_name)}
+            for definition in columns:
+                if definition.split()[0] not in existing:
+                    connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {definition}'))
+                    print(f'Added column {table_name}.{definition.split()[0]}.')
+        if db.engine.dialect.name == 'sqlite' and rtree_available():
+            for statement in RTREE_DDL:
+                connection.execute(text(statement))
+
+    # Backfill in batches, walking the primary key; the R-tree triggers follow the updates.
+    influencer_table = Influencer.__table__
+    last_id, geocoded, total = 0, 0, 0
+    while True:
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                select(influencer_table.c.id, influencer_table.c.location_normalized)
+                .where(influencer_table.c.id > last_id)
+                .order_by(influencer_table.c.id)
+                .limit(5000)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            values = [{"row_id": row.id, **geo_columns(row.location_normalized)} for row in rows]
+            connection.execute(
+                influencer_table.update()
+                .where(influencer_table.c.id == bindparam('row_id'))
+                .values(latitude=bindparam('latitude'), longitude=bindparam('longitude'), geo_cell=bindparam('geo_cell')),
+                values
+            )
+            geocoded += sum(value["latitude"] is not None for value in values)
+            total += len(rows)
+    print(f'Geocoded {geocoded} of {total} influencers.')
+
+    campaign_table = Campaign.__table__
+    with db.engine.begin() as connection:
+        targets = [target for target, in connection.execute(select(campaign_table.c.target_location).distinct()) if target]
+        for target in targets:
+            latitude, longitude = geocode(target) or (None, None)
+            connection.execute(campaign_table.update().where(campaign_table.c.target_location == target)
+                               .values(latitude=latitude, longitude=longitude))
+    print(f'Geocoded the target locations of campaigns ({len(targets)} distinct).')
+
+    for index in influencer_table.indexes:
+        if index.name == 'ix_influencer_geo_cell':
+            index.create(db.engine, checkfirst=True)
+    if db.engine.dialect.name == 'sqlite' and rtree_available():
+        # Makes sure the R-tree holds every geocoded row, including rows written before its triggers existed.
+        with db.engine.begin() as connection:
+            for statement in RTREE_REBUILD:
+                connection.execute(text(statement))
+    print('Geo migration finished.')
+
+@api.cli.command('import-influencers')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows inserted per statement.')
+@click.option('--workers', type=int, help='Password hashing processes (defaults to the CPU count).')
+def import_influencers_command(path, fmt, batch_size, workers):
+    """Streams influencers from a CSV or JSONL file into the database."""
+    import_influencers(
+        db.engine, Influencer.__table__, insert_ignore(Location.__table__, db.engine.dialect.name),
+        read_records(path, fmt), batch_size=batch_size, workers=workers,
+        hash_password=partial(generate_password_hash, method=current_app.config['PASSWORD_HASH_METHOD'])
+    )
+    use_shared_cache()
+    response_cache.bump('influencers')
+    if current_app.config['SNAPSHOT_ENABLED']:
+        refresh_influencer_snapshot()
+    # New influencers can displace stored matches of any campaign.
+    print(f'Queued {enqueue_campaign_rebuilds(only_missing=False)} campaigns for the match worker.')
+
+@api.cli.command('import-campaigns')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows inserted per statement.')
+def import_campaigns_command(path, fmt, batch_size):
+    """Streams campaigns from a CSV or JSONL file; each row needs a brand_id or brand_email."""
+    import_campaigns(db.engine, Campaign.__table__, BrandUser.__table__, read_records(path, fmt), batch_size=batch_size)
+    use_shared_cache()
+    response_cache.bump('campaigns')
+    print(f'Queued {enqueue_campaign_rebuilds()} campaigns for the match worker.')
+
+@api.cli.command('match-worker')
+@click.option('--once', is_flag=True, help='Drain the queue and exit instead of polling.')
+@click.option('--batch-size', default=500, show_default=True, help='Jobs applied per transaction.')
+def match_worker_command(once, batch_size):
+    """Keeps the CampaignMatch table up to date by consuming the match job queue."""
+    use_shared_cache()
+    print('Match worker started.')
+    while True:
+        processed = process_match_jobs(batch_size)
+        if processed:
+            print(f'Applied {processed} match jobs.')
+        elif once:
+            break
+        else:
+            time.sleep(current_app.config['MATCH_WORKER_INTERVAL'])
+
+@api.cli.command('rebuild-matches')
+@click.option('--all', 'rebuild_all', is_flag=True, help='Also rebuild campaigns whose matches are already stored.')
+def rebuild_matches_command(rebuild_all):
+    """Queues campaigns for the match worker (by default only those never built)."""
+    print(f'Queued {enqueue_campaign_rebuilds(only_missing=not rebuild_all)} campaigns for the match worker.')
+
+@api.cli.command('refresh-snapshot')
+@click.option('--interval', type=float, help='Keep running and rebuild every INTERVAL seconds.')
+def refresh_snapshot_command(interval):
+    """Rebuilds the influencer catalog snapshot at SNAPSHOT_PATH."""
+    while True:
+        if refresh_influencer_snapshot():
+            print(f'Wrote influencer snapshot to {influencer_snapshot.path}.')
+        else:
+            print('Another process is already rebuilding the snapshot.')
+        if interval is None:
+            break
+        time.sleep(interval)
+
+# @api.cli.command('seed-db')
 # def seed_db_command():
 #     """Seeds the database with initial test data including new fields."""
 #     # Create test brand user
@@ -685,7 +2441,7 @@ def init_db_command():
 #     db.session.commit()
 #     print('Database seeded!')
 
-@app.cli.command('seed-db')
+@api.cli.command('seed-db')
 def seed_db_command():
     """Seeds the database with hashed passwords."""
     if not BrandUser.query.filter_by(email='brand@test.com').first():
@@ -701,5 +2457,74 @@ def seed_db_command():
     db.session.commit()
     print('Database seeded with hashed passwords!')
 
+# --- APPLICATION FACTORY ---
+def create_app(config=None):
+    """
+    Builds the Flask app: reads the settings (environment, .env file, then `config`),
+    binds the database and the shared services to them and registers every route and
+    CLI command. Mapper configuration is done here too, so that with gunicorn's
+    preload_app it happens once in the master rather than on each worker's first request.
+    """
+    load_dotenv()
+    app = Flask(__name__)
+    # This explicitly tells the server that for any route starting with /api/,
+    # it should accept requests from any origin (*), allowing all standard methods.
+    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    load_config(app, config)
+
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', register_sqlite_math_functions)
+    app.json = json_provider_class(app.config['JSON_ENCODER'])(app)
+    app.register_blueprint(api)
+    if app.config['METRICS_ENABLED']:
+        metrics = Metrics(shared_dir=app.config['METRICS_DIR'], slow_query_ms=app.config['SLOW_QUERY_MS'])
+        with app.app_context():
+            metrics.init_app(app, db.engines.values())
+        app.extensions['nanoconnect_metrics'] = metrics
+
+    with app.app_context():
+        # Cached views declare the entities they depend on; writes bump those entities'
+        # version counters right after committing, which retires every affected entry.
+        response_cache.backend = make_cache_backend()
+        response_cache.ttl = app.config['CACHE_TTL']
+        response_cache.replica_lag = app.config['REPLICA_LAG_WINDOW'] if app.config['DATABASE_REPLICA_URL'] else 0
+        event_feed.backend = make_event_broker()
+    event_feed.stream_timeout = app.config['EVENTS_STREAM_TIMEOUT']
+    event_feed.heartbeat = app.config['EVENTS_HEARTBEAT']
+    keyword_index.max_age = app.config['MATCH_INDEX_MAX_AGE']
+    influencer_snapshot.path = app.config['SNAPSHOT_PATH']
+    influencer_snapshot.max_age = app.config['SNAPSHOT_MAX_AGE']
+    token_service.secret = app.config['SECRET_KEY']
+    token_service.access_ttl = app.config['ACCESS_TOKEN_TTL']
+    token_service.refresh_ttl = app.config['REFRESH_TOKEN_TTL']
+    configure_mappers()
+    return app
+
+def warm_up(app, connections=None):
+    """
+    Prepares a freshly forked worker before it accepts requests: drops the pooled
+    connections inherited from the master, opens `connections` new ones per engine
+    (DB_POOL_SIZE by default) and primes the keyword index and the influencer snapshot.
+    Returns the seconds it took.
+    """
+    started = time.perf_counter()
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the master's connections alone; the child just forgets them.
+            engine.dispose(close=False)
+            opened = [engine.connect() for _ in range(connections or app.config['DB_POOL_SIZE'])]
+            for connection in opened:
+                connection.exec_driver_sql('SELECT 1')
+                connection.close()
+        get_keyword_index()
+        # Map the snapshot, building it first if no worker has yet.
+        if app.config['SNAPSHOT_ENABLED'] and influencer_snapshot.fresh_view(snapshot_source_version()) is None:
+            refresh_influencer_snapshot(app)
+            influencer_snapshot.view()
+    return time.perf_counter() - started
+
 if __name__ == '__main__':
-    app.run(port=5000, debug=True)
\ No newline at end of file
+    create_app().run(port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,10 @@
+"""
+ASGI entry point: uvicorn asgi:app --workers N
+
+Serves the async read path (see async_api.py) next to every other route of the
+Flask app.
+"""
+from app import create_app
+from async_api import AsyncReadPath
+
+app = AsyncReadPath(create_app())
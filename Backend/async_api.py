@@ -0,0 +1,393 @@
+"""
+Async read path, served over ASGI next to the Flask app.
+
+The busiest read endpoints (campaign details, influencer projects, influencer
+search and the public campaign list) are answered by coroutines on an async
+SQLAlchemy engine, so a process keeps serving other requests while it waits on
+the database. Blocking work that is not a query (the shared cache file, the
+influencer snapshot) runs in worker threads. Every other request goes to the
+regular Flask app through asgiref's WSGI adapter and its thread pool, so one
+server serves both side by side:
+
+    uvicorn asgi:app --workers 4
+
+The async views run inside a Flask request context. They reuse the app's
+request hooks, filter parsing, response cache, ETags and influencer snapshot,
+and return the same documents and ETags as the sync views. The change feed's
+event streams are coroutines as well, so an open stream does not tie up a thread.
+
+Requires the optional packages sqlalchemy[asyncio], aiosqlite (SQLite) or
+asyncpg (PostgreSQL), asgiref and uvicorn.
+"""
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import jsonify, request
+from sqlalchemy import event, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from app import (
+    EVENT_STREAM_HEADERS, Application, Campaign, Influencer, Invite, Submission, account_access_error, campaign_details_versions,
+    engine_options, etag_for, event_feed, event_stream_params, influencer_filter_criteria, influencer_projects_versions, influencer_search_columns, influencer_search_filters,
+    influencer_snapshot_for, location_names_query, not_modified, page_params, public_campaign_columns,
+    register_sqlite_math_functions, response_cache, serialize_public_campaign, serialize_search_result, snapshot_list_response, tag_response,
+    wants_primary, warm_up,
+)
+
+# Async DBAPI drivers, by database backend.
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_url(url):
+    """The async-driver form of a database URL ("sqlite:///x.db" -> "sqlite+aiosqlite:///x.db")."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def async_engine_options(config, url):
+    """engine_options() for the async drivers; asyncpg takes the statement timeout as a server setting."""
+    options = engine_options(config, url)
+    if 'connect_args' in options:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(config['DB_STATEMENT_TIMEOUT_MS'])}}
+    return options
+
+
+class AsyncReadPath:
+    """ASGI application: async views for a few read endpoints, the Flask app for the rest."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        config = flask_app.config
+        self.engines = {'primary': create_async_engine(
+            async_url(config['SQLALCHEMY_DATABASE_URI']),
+            **async_engine_options(config, config['SQLALCHEMY_DATABASE_URI']))}
+        if config['DATABASE_REPLICA_URL']:
+            self.engines['replica'] = create_async_engine(
+                async_url(config['DATABASE_REPLICA_URL']),
+                **async_engine_options(config, config['DATABASE_REPLICA_URL']))
+        for engine in self.engines.values():
+            if engine.dialect.name == 'sqlite':
+                # Radius searches need sin() and cos() on these connections too.
+                event.listen(engine.sync_engine, 'connect', register_sqlite_math_functions)
+        # Flask endpoint -> coroutine serving it.
+        self.views = {
+            'api.get_campaign_details': self.campaign_details,
+            'api.get_influencer_projects': self.influencer_projects,
+            'api.search_influencers': self.search_influencers,
+            'api.get_public_campaigns': self.public_campaigns,
+        }
+        # Flask endpoint -> the account (role, id) whose event stream it serves, as a coroutine too.
+        self.event_streams = {
+            'api.get_influencer_events': lambda influencer_id: ('influencer', influencer_id),
+            'api.get_brand_events': lambda brand_id: ('brand', brand_id),
+        }
+        self.urls = flask_app.url_map.bind('localhost')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            try:
+                endpoint, view_args = self.urls.match(scope['path'], method='GET')
+            except HTTPException:
+                endpoint = None
+            # Streamed lists stay on the sync views and their server-side cursors.
+            if endpoint in self.views and not self.streaming(scope):
+                return await self.serve(scope, send, self.views[endpoint])
+            # An event stream would hold one of the WSGI adapter's threads for its whole life.
+            if endpoint in self.event_streams:
+                return await self.stream_events(scope, receive, send, *self.event_streams[endpoint](**view_args))
+        await self.wsgi(scope, receive, send)
+
+    @staticmethod
+    def streaming(scope):
+        args = parse_qs(scope['query_string'].decode('latin-1'))
+        return args.get('stream', [''])[0].lower() in ('1', 'true')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # The same warm-up as a gunicorn worker, plus the async pools.
+                await asyncio.to_thread(warm_up, self.flask_app)
+                for engine in self.engines.values():
+                    async with engine.connect():
+                        pass
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for engine in self.engines.values():
+                    await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # --- Request handling ---
+    def environ(self, scope):
+        """The WSGI environ of an ASGI request (GET, so without a body)."""
+        server = scope.get('server') or ('localhost', 80)
+        headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+        environ = EnvironBuilder(
+            path=scope['path'], base_url=f"{scope['scheme']}://{server[0]}:{server[1]}{scope.get('root_path', '')}",
+            query_string=scope['query_string'].decode('latin-1'), method=scope['method'], headers=headers,
+        ).get_environ()
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+        return environ
+
+    async def serve(self, scope, send, view):
+        """Flask's wsgi_app() and full_dispatch_request() around an async view."""
+        app = self.flask_app
+        # Request contexts live in context variables, so concurrent requests each see their own.
+        ctx = app.request_context(self.environ(scope))
+        error = None
+        try:
+            ctx.push()
+            try:
+                response = app.preprocess_request()
+                if response is None:
+                    response = await view(**request.view_args)
+            except Exception as e:
+                response = app.handle_user_exception(e)
+            response = app.finalize_request(response)
+        except Exception as e:
+            error = e
+            response = app.handle_exception(e)
+        try:
+            await self.send_response(send, response)
+        finally:
+            # Runs the teardown_request and teardown_appcontext handlers (the session
+            # cleanup, the metrics), with the unhandled error like the WSGI app.
+            ctx.pop(error)
+
+    @staticmethod
+    async def send_response(send, response, more_body=False):
+        """Sends a Flask response: its status, headers and (unless streamed) its body."""
+        await send({'type': 'http.response.start', 'status': response.status_code,
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                for name, value in response.headers.items()]})
+        if not more_body:
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    async def stream_events(self, scope, receive, send, role, account_id):
+        """
+        event_stream_response() as a coroutine: the stream waits between polls of the
+        broker (EVENTS_POLL_INTERVAL) without holding a thread, and ends early when the
+        client disconnects.
+        """
+        app = self.flask_app
+        channel = f'{role}:{account_id}'
+        with app.request_context(self.environ(scope)):
+            try:
+                response = app.preprocess_request() or account_access_error(role, account_id)
+                if response is None and not event_feed.enabled:
+                    response = jsonify({"error": "The change feed is disabled."}), 404
+                if response is None:
+                    last_event_id, timeout = event_stream_params()
+            except ValueError as e:
+                response = jsonify({"error": str(e)}), 400
+            if response is not None:
+                return await self.send_response(send, app.process_response(app.make_response(response)))
+            response = app.process_response(
+                app.response_class(mimetype='text/event-stream', headers=EVENT_STREAM_HEADERS))
+            poll_interval = app.config['EVENTS_POLL_INTERVAL']
+        await self.send_response(send, response, more_body=True)
+
+        disconnected = asyncio.ensure_future(self.disconnect(receive))
+        try:
+            deadline = time.monotonic() + timeout
+            # The broker calls block (SQLite for the shared file), so they run in a thread.
+            cursor, chunk = await asyncio.to_thread(event_feed.open, channel, last_event_id)
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+            sent_at = time.monotonic()
+            while (remaining := deadline - time.monotonic()) > 0:
+                await asyncio.wait({disconnected}, timeout=min(poll_interval, remaining))
+                if disconnected.done():
+                    return
+                cursor, chunk = await asyncio.to_thread(event_feed.poll, channel, cursor)
+                if not chunk and time.monotonic() - sent_at >= event_feed.heartbeat:
+                    chunk = ': keep-alive\n\n'
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+                    sent_at = time.monotonic()
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+
+    @staticmethod
+    async def disconnect(receive):
+        """Returns once the client has gone away."""
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    def engine(self):
+        """The replica for these read-only views, unless the client must read its own writes."""
+        if 'replica' in self.engines and not wants_primary():
+            return self.engines['replica']
+        return self.engines['primary']
+
+    @staticmethod
+    async def fetch(engine, statement):
+        async with engine.connect() as connection:
+            return (await connection.execute(statement)).all()
+
+    async def conditional(self, engine, signature, view_args, *statements):
+        """
+        conditional() for async views: reads the row_versions() state, answers a matching
+        If-None-Match, and only then reads `statements`, on the same connection and in
+        the same transaction. A write landing in between can only make the body newer
+        than its ETag, which the next revalidation then misses; never the other way
+        round. Returns (etag, results) or (304 response, None).
+        """
+        async with engine.connect() as connection:
+            state = (await connection.execute(select(*signature(**view_args)))).first()
+            etag = etag_for(state, view_args)
+            response = not_modified(etag)
+            if response is not None:
+                return response, None
+            return etag, [(await connection.execute(statement)).all() for statement in statements]
+
+    async def cached(self, depends_on, view, view_args):
+        """response_cache.cached() for async views; the cache backend is called from a thread."""
+        if not response_cache.enabled:
+            return await view()
+        # asyncio.to_thread() copies the context variables, so the request context goes along.
+        key, response = await asyncio.to_thread(response_cache.lookup, depends_on, view_args)
+        if response is not None:
+            return response
+        return await asyncio.to_thread(response_cache.store, key, self.flask_app.make_response(await view()))
+
+    async def list_response(self, engine, statement, id_column, serialize):
+        """list_response() for async views: the plain array or one ?limit=&after= page."""
+        if 'limit' not in request.args and 'after' not in request.args:
+            return jsonify([serialize(row._asdict()) for row in await self.fetch(engine, statement.order_by(id_column))])
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if after is not None:
+            statement = statement.where(id_column > after)
+        rows = await self.fetch(engine, statement.order_by(id_column).limit(limit + 1))
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        return jsonify({"items": [serialize(row._asdict()) for row in rows[:limit]], "next_cursor": next_cursor})
+
+    # --- Views ---
+    async def campaign_details(self, campaign_id):
+        """GET /api/campaigns/<id>/details: the campaign, its invites and their submissions in parallel."""
+        view_args = {'campaign_id': campaign_id}
+        etag, results = await self.conditional(
+            self.engine(), campaign_details_versions, view_args,
+            select(Campaign.id, Campaign.name, Campaign.budget, Campaign.brief).where(Campaign.id == campaign_id),
+            select(Invite.id, Invite.status, Influencer.id.label('influencer_id'), Influencer.name, Influencer.followers)
+            .join(Influencer, Invite.influencer_id == Influencer.id)
+            .where(Invite.campaign_id == campaign_id).order_by(Invite.id),
+            select(Submission.invite_id, Submission.id, Submission.content_url, Submission.status)
+            .where(Submission.invite_id.in_(select(Invite.id).where(Invite.campaign_id == campaign_id)))
+            .order_by(Submission.id.desc()),
+        )
+        if results is None:
+            return etag
+        campaigns, invites, submissions = results
+        if not campaigns:
+            return jsonify({"error": "Campaign not found"}), 404
+
+        # The earliest submission of each invite (rows come newest first).
+        first_submissions = {submission.invite_id: submission for submission in submissions}
+        campaign = campaigns[0]
+        details = {
+            "id": campaign.id, "name": campaign.name, "budget": campaign.budget, "brief": campaign.brief,
+            "invites": [],
+        }
+        for invite in invites:
+            submission = first_submissions.get(invite.id)
+            details["invites"].append({
+                "invite_id": invite.id,
+                "status": invite.status,
+                "influencer": {"id": invite.influencer_id, "name": invite.name, "followers": invite.followers},
+                "submission_id": submission.id if submission else None,
+                "submission_url": submission.content_url if submission else None,
+                "submission_status": submission.status if submission else None,
+            })
+        return tag_response(self.flask_app.make_response(jsonify(details)), etag)
+
+    async def influencer_projects(self, influencer_id):
+        """GET /api/influencer/<id>/projects: invitations, submissions and applications in parallel."""
+        denied = account_access_error('influencer', influencer_id)
+        if denied:
+            return denied
+        view_args = {'influencer_id': influencer_id}
+        campaign_columns = (Campaign.id.label('campaign_id'), Campaign.name.label('campaign_name'),
+                            Campaign.brief.label('campaign_brief'), Campaign.budget)
+        etag, results = await self.conditional(
+            self.engine(), influencer_projects_versions, view_args,
+            select(Invite.id, Invite.status, *campaign_columns).join(Campaign, Invite.campaign_id == Campaign.id)
+            .where(Invite.influencer_id == influencer_id).order_by(Invite.id),
+            select(Submission.invite_id, Submission.status)
+            .where(Submission.invite_id.in_(select(Invite.id).where(Invite.influencer_id == influencer_id)))
+            .order_by(Submission.id.desc()),
+            select(Application.id, Application.status, *campaign_columns)
+            .join(Campaign, Application.campaign_id == Campaign.id)
+            .where(Application.influencer_id == influencer_id, Application.status != 'approved')
+            .order_by(Application.id),
+        )
+        if results is None:
+            return etag
+        invites, submissions, applications = results
+
+        # Same documents as load_influencer_projects().
+        first_submissions = {submission.invite_id: submission.status for submission in submissions}
+        projects = [{
+            "project_id": f"invite_{invite.id}",
+            "campaign_id": invite.campaign_id,
+            "campaign_name": invite.campaign_name,
+            "campaign_brief": invite.campaign_brief,
+            "budget": invite.budget,
+            "status": invite.status,
+            "submission_status": first_submissions.get(invite.id),
+            "type": "invitation",
+        } for invite in invites]
+        projects += [{
+            "project_id": f"app_{application.id}",
+            "campaign_id": application.campaign_id,
+            "campaign_name": application.campaign_name,
+            "campaign_brief": application.campaign_brief,
+            "budget": application.budget,
+            "status": application.status,
+            "submission_status": None,
+            "type": "application",
+        } for application in applications]
+        return tag_response(self.flask_app.make_response(jsonify(projects)), etag)
+
+    async def search_influencers(self):
+        """GET /api/influencers/search: the snapshot when fresh, else the SQL search without blocking."""
+        async def search():
+            try:
+                filters = influencer_search_filters()
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            # Mapping, or building, the snapshot and searching it block, so they run in a thread.
+            view = await asyncio.to_thread(influencer_snapshot_for, filters)
+            if view is not None:
+                return await asyncio.to_thread(snapshot_list_response, view, filters, serialize_search_result)
+
+            engine = self.engine()
+            location_names = None
+            if filters["location"]:
+                location_names = [name for name, in await self.fetch(engine, location_names_query(filters["location"]))]
+            statement = select(*influencer_search_columns()).where(
+                *influencer_filter_criteria(filters, location_names=location_names))
+            return await self.list_response(engine, statement, Influencer.id, serialize_search_result)
+
+        return await self.cached(['influencers'], search, {})
+
+    async def public_campaigns(self):
+        """GET /api/campaigns/public."""
+        async def load():
+            statement = select(*public_campaign_columns()).where(Campaign.is_public)
+            return await self.list_response(self.engine(), statement, Campaign.id, serialize_public_campaign)
+
+        return await self.cached(['campaigns'], load, {})
@@ -0,0 +1,100 @@
+"""
+Stateless token authentication.
+
+Logging in runs the (deliberately slow) password KDF once and hands out a
+short-lived signed access token plus a longer-lived refresh token. Later
+requests present the access token, which is checked with a cheap HMAC
+signature verification; verified tokens are memoized until they expire, so
+repeat requests skip even that.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import jwt
+from werkzeug.security import generate_password_hash
+
+ALGORITHM = 'HS256'
+
+
+class TokenError(Exception):
+    """Raised for a missing, malformed, expired or wrongly typed token."""
+
+
+class TokenService:
+    def __init__(self, secret, access_ttl=900, refresh_ttl=7 * 24 * 3600, cache_size=10000):
+        self.secret = secret
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._verified = OrderedDict()  # token -> claims
+
+    def _encode(self, role, user_id, token_type, ttl):
+        now = int(time.time())
+        claims = {
+            "sub": str(user_id),
+            "role": role,
+            "type": token_type,
+            "iat": now,
+            "exp": now + ttl,
+            "jti": uuid.uuid4().hex,
+        }
+        return jwt.encode(claims, self.secret, algorithm=ALGORITHM)
+
+    def issue_access_token(self, role, user_id):
+        return self._encode(role, user_id, 'access', self.access_ttl)
+
+    def issue_tokens(self, role, user_id):
+        """Returns the token fields added to a successful login response."""
+        return {
+            "access_token": self.issue_access_token(role, user_id),
+            "refresh_token": self._encode(role, user_id, 'refresh', self.refresh_ttl),
+            "token_type": "Bearer",
+            "expires_in": self.access_ttl,
+        }
+
+    def verify(self, token, token_type='access'):
+        """Returns the claims of a valid token of `token_type`; raises TokenError otherwise."""
+        with self._lock:
+            claims = self._verified.get(token)
+            if claims is not None and claims["exp"] <= time.time():
+                del self._verified[token]
+                claims = None
+            elif claims is not None:
+                self._verified.move_to_end(token)
+
+        if claims is None:
+            try:
+                claims = jwt.decode(token, self.secret, algorithms=[ALGORITHM], options={"require": ["exp", "sub", "type"]})
+            except jwt.ExpiredSignatureError:
+                raise TokenError("Token has expired.")
+            except jwt.InvalidTokenError:
+                raise TokenError("Invalid token.")
+            with self._lock:
+                self._verified[token] = claims
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+
+        if claims["type"] != token_type:
+            raise TokenError(f"Wrong token type, expected the {token_type} token.")
+        return claims
+
+
+_hash_prefixes = {}
+
+
+def hash_prefix(method):
+    """
+    The parameter prefix werkzeug writes for `method`, e.g. "scrypt" -> "scrypt:32768:8:1".
+    Computed once per method by hashing a dummy password.
+    """
+    if method not in _hash_prefixes:
+        _hash_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _hash_prefixes[method]
+
+
+def needs_rehash(password_hash, method):
+    """True if a stored hash was made with a different algorithm or cost than `method`."""
+    return not password_hash or password_hash.split('$', 1)[0] != hash_prefix(method)
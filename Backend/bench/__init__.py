@@ -0,0 +1,9 @@
+"""
+Benchmark suite for the NanoConnect API.
+
+    python -m bench.datagen --influencers 100000 --out /tmp/nc_100k.db
+    python -m bench.run --scales 1000,100000 --out results.json
+    python -m bench.run --scales 1000 --out new.json --baseline results.json
+
+Run from the Backend directory. See datagen.py and run.py for the options.
+"""
@@ -0,0 +1,170 @@
+"""
+Measures throughput per server process under concurrent load: the same
+database is served by one gunicorn worker (the WSGI app, threaded) and by one
+uvicorn process (the ASGI app with the async read path, see async_api.py),
+while keep-alive clients request the endpoints the async path serves. Reports
+requests per second and latency percentiles per server.
+
+The response cache is off by default so requests reach the database.
+
+From the Backend directory: python -m bench.concurrency --scale 20000 --clients 32
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench.datagen import generate
+from bench.run import BACKEND_DIR, build_scenarios, percentile
+
+# Scenarios (see bench.run) served by the async read path.
+ASYNC_SCENARIOS = ('campaign_details', 'influencer_projects', 'search_influencers', 'search_influencers_page',
+                   'public_campaigns')
+
+
+def server_command(server, port, threads):
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', '1',
+                '--threads', str(threads), '--bind', f'127.0.0.1:{port}']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--workers', '1', '--port', str(port),
+            '--log-level', 'warning', '--no-access-log']
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/campaigns/public?limit=1')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not come up')
+
+
+def client_process(port, urls, threads, duration, queue):
+    """Runs `threads` keep-alive clients for `duration` seconds; reports their latencies."""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i = offset
+        while time.perf_counter() < deadline:
+            url = urls[i % len(urls)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', url)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(type(e).__name__)
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    queue.put((latencies, errors))
+
+
+def measure(server, db_path, urls, args, port):
+    snapshot_dir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.abspath(db_path),
+               SNAPSHOT_PATH=os.path.join(snapshot_dir, 'snapshot.bin'), CACHE_BACKEND=args.cache)
+    process = subprocess.Popen(server_command(server, port, args.threads), cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        wait_until_up(port)
+        # Let the warm-up (snapshot build) finish before measuring.
+        time.sleep(1)
+        processes = min(args.clients, args.client_processes)
+        queue = multiprocessing.Queue()
+        clients = [multiprocessing.Process(
+            target=client_process,
+            args=(port, urls, args.clients // processes + (n < args.clients % processes), args.duration, queue))
+            for n in range(processes)]
+        for client in clients:
+            client.start()
+        latencies, errors = [], []
+        for _ in clients:
+            more_latencies, more_errors = queue.get()
+            latencies += more_latencies
+            errors += more_errors
+        for client in clients:
+            client.join()
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+    latencies.sort()
+    return {
+        'requests_per_s': round(len(latencies) / args.duration, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1000, help='Influencer count of the generated database')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent keep-alive connections')
+    parser.add_argument('--client-processes', type=int, default=4, help='Processes the clients are spread over')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load per server')
+    parser.add_argument('--threads', type=int, default=8, help='Threads of the gunicorn worker')
+    parser.add_argument('--cache', default='none', help='CACHE_BACKEND of the servers')
+    parser.add_argument('--servers', default='gunicorn,uvicorn', help='Comma-separated servers to measure')
+    parser.add_argument('--scenarios', default=','.join(ASYNC_SCENARIOS), help='Comma-separated scenarios to request')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data-dir', default=tempfile.gettempdir(), help='Where generated databases are kept')
+    parser.add_argument('--out', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    source_path = os.path.join(args.data_dir, f'nanoconnect_bench_{args.scale}.db')
+    if not os.path.exists(source_path):
+        print(f'Generating {args.scale} influencers -> {source_path}', file=sys.stderr)
+        generate(source_path, args.scale)
+    # The servers build their snapshots and caches against a copy, never the shared database.
+    db_path = os.path.join(tempfile.mkdtemp(), 'concurrency.db')
+    shutil.copy(source_path, db_path)
+
+    scenarios = {name: make_request for name, _, _, make_request in build_scenarios(db_path)}
+    urls = [scenarios[name]()[0] for name in args.scenarios.split(',')]
+
+    results = {}
+    try:
+        for n, server in enumerate(args.servers.split(',')):
+            results[server] = measure(server, db_path, urls, args, args.port + n)
+    finally:
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+
+    print(f"{'':10} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for server, result in results.items():
+        print(f"{server:10} {result['requests_per_s']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p99_ms']:>10.2f} {result['errors']:>8}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'scale': args.scale, 'clients': args.clients, 'threads': args.threads, 'cache': args.cache,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+Builds a SQLite database with the app's schema holding `influencers` influencers
+and proportional brands, campaigns, invites, applications and submissions. The
+same seed and size always produce the same rows, so runs are comparable.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+CITIES = [
+    'Austin', 'Dallas', 'Houston', 'San Antonio', 'Denver', 'Seattle', 'Portland', 'Chicago',
+    'Atlanta', 'Miami', 'Boston', 'New York', 'Los Angeles', 'San Diego', 'Phoenix', 'Nashville',
+    'Round Rock', 'Brooklyn', 'Oakland', 'Minneapolis',
+]
+STATES = ['TX', 'TX', 'TX', 'TX', 'CO', 'WA', 'OR', 'IL', 'GA', 'FL', 'MA', 'NY', 'CA', 'CA', 'AZ', 'TN',
+          'TX', 'NY', 'CA', 'MN']
+NICHES = ['Food & Drink', 'Health & Fitness', 'Travel', 'Fashion', 'Beauty', 'Tech', 'Gaming',
+          'Parenting', 'Home & Garden', 'Finance']
+KEYWORDS = [
+    'food', 'coffee', 'restaurants', 'tacos', 'bbq', 'brunch', 'vegan', 'wine', 'beer', 'baking',
+    'fitness', 'health', 'gym', 'workout', 'yoga', 'running', 'nutrition', 'hiking', 'cycling', 'wellness',
+    'travel', 'hotels', 'flights', 'roadtrip', 'camping', 'beach', 'adventure', 'photography', 'luxury', 'budget',
+    'fashion', 'streetwear', 'sneakers', 'vintage', 'jewelry', 'makeup', 'skincare', 'haircare', 'nails', 'style',
+    'tech', 'gadgets', 'phones', 'software', 'ai', 'gaming', 'esports', 'streaming', 'pc', 'consoles',
+    'parenting', 'kids', 'family', 'home', 'garden', 'diy', 'decor', 'finance', 'investing', 'crypto',
+]
+BRIEF_FILLER = ['we', 'want', 'to', 'reach', 'new', 'customers', 'with', 'authentic', 'content', 'about',
+                'our', 'launch', 'in', 'the', 'city', 'and', 'showcase', 'a', 'great', 'experience']
+
+# Every generated account gets this password; it is hashed once and reused.
+PASSWORD = 'password123'
+
+
+def sizes_for(influencers):
+    """Row counts for every table, proportional to the number of influencers."""
+    return {
+        'brands': max(1, influencers // 1000),
+        'influencers': influencers,
+        'campaigns': max(1, influencers // 100),
+        'invites': influencers // 2,
+        'applications': influencers // 4,
+    }
+
+
+def _batched_insert(conn, sql, rows, batch_size=10000):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(path, influencers, seed=42):
+    """Creates (or replaces) the database at `path` and returns the row counts."""
+    # The schema comes from the app's models, so benchmarks always match the code.
+    if os.path.exists(path):
+        os.remove(path)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(path)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from werkzeug.security import generate_password_hash
+    import app as nanoconnect
+    from geo import geo_columns, geocode
+    app = nanoconnect.create_app()
+    with app.app_context():
+        nanoconnect.db.create_all()
+        nanoconnect.db.engine.dispose()
+        password_hash = generate_password_hash(PASSWORD, method=app.config['PASSWORD_HASH_METHOD'])
+
+    rng = random.Random(seed)
+    sizes = sizes_for(influencers)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    _batched_insert(conn, 'INSERT INTO brand_user (id, email, password_hash) VALUES (?, ?, ?)',
+                    ((i, f'brand{i}@bench.test', password_hash) for i in range(1, sizes['brands'] + 1)))
+
+    locations = set()
+
+    def influencer_rows():
+        for i in range(1, influencers + 1):
+            city_index = rng.randrange(len(CITIES))
+            city = CITIES[city_index]
+            location = f'{city}, {STATES[city_index]}' if rng.random() < 0.5 else city
+            normalized = ' '.join(location.lower().split())
+            locations.add(normalized)
+            geo = geo_columns(normalized)
+            yield (
+                i, f'influencer{i}@bench.test', password_hash, f'creator_{i}',
+                int(rng.lognormvariate(8.5, 1.2)), location, normalized,
+                ','.join(rng.sample(KEYWORDS, rng.randint(2, 6))), rng.choice(NICHES),
+                round(rng.uniform(0.5, 9.5), 2), rng.choice(['18-24', '25-34', '35-44']),
+                f'{rng.randint(30, 70)}% Female', geo['latitude'], geo['longitude'], geo['geo_cell'],
+            )
+    _batched_insert(conn, 'INSERT INTO influencer (id, email, password_hash, name, followers, location, '
+                          'location_normalized, keywords, niche, engagement_rate, audience_age_range, '
+                          'audience_gender_split, latitude, longitude, geo_cell) '
+                          'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', influencer_rows())
+    _batched_insert(conn, 'INSERT INTO location (name) VALUES (?)', ((name,) for name in sorted(locations)))
+
+    def campaign_rows():
+        for i in range(1, sizes['campaigns'] + 1):
+            words = rng.sample(KEYWORDS, rng.randint(3, 8)) + rng.sample(BRIEF_FILLER, 10)
+            rng.shuffle(words)
+            city = rng.choice(CITIES)
+            yield (
+                i, f'Campaign {i}', float(rng.randint(100, 5000)), ' '.join(words).capitalize() + '.',
+                rng.randint(1, sizes['brands']), rng.choice(['planning', 'active', 'completed']),
+                rng.choice(['Brand Awareness', 'Website Clicks', 'Sales']), 'Young urban professionals',
+                city, rng.random() < 0.5, *geocode(city),
+            )
+    _batched_insert(conn, 'INSERT INTO campaign (id, name, budget, brief, brand_id, status, goal, '
+                          'target_audience_notes, target_location, is_public, latitude, longitude) '
+                          'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    campaign_rows())
+
+    # Invites and applications use distinct (campaign, influencer) pairs to respect the unique indexes.
+    def pairs(count, offset):
+        for i in range(count):
+            yield 1 + (i % sizes['campaigns']), 1 + ((i * 7919 + offset) % influencers)
+
+    invites = []
+    for i, (campaign_id, influencer_id) in enumerate(pairs(sizes['invites'], 0), start=1):
+        invites.append((i, campaign_id, influencer_id, rng.choice(['pending', 'accepted', 'accepted', 'declined'])))
+    conn.executemany('INSERT OR IGNORE INTO invite (id, campaign_id, influencer_id, status) VALUES (?, ?, ?, ?)', invites)
+    _batched_insert(conn, 'INSERT OR IGNORE INTO application (campaign_id, influencer_id, status) VALUES (?, ?, ?)',
+                    ((c, f, rng.choice(['pending', 'approved', 'rejected'])) for c, f in pairs(sizes['applications'], 104729)))
+    _batched_insert(conn, 'INSERT INTO submission (invite_id, content_url, status) VALUES (?, ?, ?)',
+                    ((invite_id, f'https://example.com/post/{invite_id}', rng.choice(['pending_review', 'approved']))
+                     for invite_id, _, _, status in invites if status == 'accepted' and rng.random() < 0.5))
+    conn.commit()
+
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+              for table in ('brand_user', 'influencer', 'campaign', 'invite', 'application', 'submission')}
+    conn.execute('ANALYZE')
+    conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--influencers', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', required=True, help='SQLite file to create')
+    args = parser.parse_args()
+    started = time.perf_counter()
+    counts = generate(args.out, args.influencers, args.seed)
+    print(f'Generated {counts} in {time.perf_counter() - started:.1f}s -> {args.out}')
+
+
+if __name__ == '__main__':
+    main()
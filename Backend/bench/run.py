@@ -0,0 +1,299 @@
+"""
+Drives every API route through Flask's test client against generated databases
+and reports, per endpoint and scale, latency percentiles, SQL statements per
+request and peak Python memory. Results are written as JSON; pass --baseline
+to compare against an earlier run and exit non-zero on regressions.
+
+Each scale runs in its own process so imports, caches and memory measurements
+do not leak between scales.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench.datagen import PASSWORD, generate
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_scenarios(db_path, seed=7, etags=None):
+    """
+    Returns (name, method, url_rule, make_request) tuples, one or more per route.
+    make_request() returns (url, json_body) or (url, json_body, headers) and is
+    called once per request, so write endpoints can use fresh values on every
+    iteration. `etags` maps URLs to the last ETag received for them, so the
+    *_revalidate scenarios can send If-None-Match like a browser would.
+    """
+    etags = {} if etags is None else etags
+    revalidate = lambda url: (url, None, {'If-None-Match': etags.get(url, '')})
+    conn = sqlite3.connect(db_path)
+    n_influencers = conn.execute('SELECT MAX(id) FROM influencer').fetchone()[0]
+    n_campaigns = conn.execute('SELECT MAX(id) FROM campaign').fetchone()[0]
+    busiest_campaign = conn.execute(
+        'SELECT campaign_id FROM invite GROUP BY campaign_id ORDER BY COUNT(*) DESC LIMIT 1').fetchone()[0]
+    busiest_influencer = conn.execute(
+        'SELECT influencer_id FROM invite GROUP BY influencer_id ORDER BY COUNT(*) DESC LIMIT 1').fetchone()[0]
+    accepted = conn.execute("SELECT campaign_id, influencer_id FROM invite WHERE status = 'accepted' LIMIT 1").fetchone()
+    invite_ids = [row[0] for row in conn.execute('SELECT id FROM invite LIMIT 1000')]
+    application_ids = [row[0] for row in conn.execute('SELECT id FROM application LIMIT 1000')]
+    submission_ids = [row[0] for row in conn.execute('SELECT id FROM submission LIMIT 1000')]
+    conn.close()
+
+    rng = random.Random(seed)
+    counter = itertools.count(1)
+    campaign = lambda: rng.randint(1, n_campaigns)
+    influencer = lambda: rng.randint(1, n_influencers)
+
+    return [
+        ('brand_login', 'POST', '/api/login',
+         lambda: ('/api/login', {'email': 'brand1@bench.test', 'password': PASSWORD})),
+        ('influencer_login', 'POST', '/api/influencer/login',
+         lambda: ('/api/influencer/login', {'email': f'influencer{influencer()}@bench.test', 'password': PASSWORD})),
+        ('token_refresh', 'POST', '/api/token/refresh',
+         lambda: ('/api/token/refresh', {'refresh_token': 'not-a-token'})),
+        ('list_campaigns', 'GET', '/api/campaigns',
+         lambda: ('/api/campaigns', None)),
+        ('list_campaigns_page', 'GET', '/api/campaigns',
+         lambda: (f'/api/campaigns?limit=50&after={campaign()}', None)),
+        ('create_campaign', 'POST', '/api/campaigns',
+         lambda: ('/api/campaigns', {'name': f'Bench {next(counter)}', 'brief': 'coffee tacos brunch launch',
+                                     'budget': 500, 'targetLocation': 'Austin', 'isPublic': True})),
+        ('campaign_brief', 'GET', '/api/campaigns/<int:campaign_id>/brief',
+         lambda: (f'/api/campaigns/{campaign()}/brief', None)),
+        ('campaign_details', 'GET', '/api/campaigns/<int:campaign_id>/details',
+         lambda: (f'/api/campaigns/{busiest_campaign}/details', None)),
+        ('campaign_details_revalidate', 'GET', '/api/campaigns/<int:campaign_id>/details',
+         lambda: revalidate(f'/api/campaigns/{busiest_campaign}/details')),
+        ('campaign_page', 'GET', '/api/campaigns/<int:campaign_id>/page',
+         lambda: (f'/api/campaigns/{busiest_campaign}/page', None)),
+        ('campaign_match', 'GET', '/api/campaigns/<int:campaign_id>/match',
+         lambda: (f'/api/campaigns/{campaign()}/match', None)),
+        ('campaign_match_live', 'GET', '/api/campaigns/<int:campaign_id>/match',
+         lambda: (f'/api/campaigns/{campaign()}/match?limit=200', None)),
+        ('campaign_match_radius', 'GET', '/api/campaigns/<int:campaign_id>/match',
+         lambda: (f'/api/campaigns/{campaign()}/match?radius_km=50', None)),
+        ('campaign_match_batch', 'POST', '/api/campaigns/match/batch',
+         lambda: ('/api/campaigns/match/batch', {'campaignIds': [campaign() for _ in range(20)]})),
+        ('create_invite', 'POST', '/api/invites',
+         lambda: ('/api/invites', {'campaignId': campaign(), 'influencerId': influencer()})),
+        ('create_invites_bulk', 'POST', '/api/invites/bulk',
+         lambda: ('/api/invites/bulk', {'campaignId': campaign(), 'influencerIds': [influencer() for _ in range(50)]})),
+        ('influencer_profile', 'GET', '/api/influencer/profile',
+         lambda: (f'/api/influencer/profile?id={influencer()}', None)),
+        ('update_influencer_profile', 'PUT', '/api/influencer/profile',
+         lambda: (f'/api/influencer/profile?id={influencer()}', {'keywords': 'coffee,tacos,bbq', 'location': 'Austin, TX'})),
+        ('influencer_invitations', 'GET', '/api/influencer/<int:influencer_id>/invitations',
+         lambda: (f'/api/influencer/{busiest_influencer}/invitations', None)),
+        ('update_invite_status', 'PUT', '/api/invites/<int:invite_id>',
+         lambda: (f'/api/invites/{rng.choice(invite_ids)}', {'status': 'accepted'})),
+        ('influencer_projects', 'GET', '/api/influencer/<int:influencer_id>/projects',
+         lambda: (f'/api/influencer/{busiest_influencer}/projects', None)),
+        ('influencer_projects_revalidate', 'GET', '/api/influencer/<int:influencer_id>/projects',
+         lambda: revalidate(f'/api/influencer/{busiest_influencer}/projects')),
+        ('influencer_dashboard', 'GET', '/api/influencer/<int:influencer_id>/dashboard',
+         lambda: (f'/api/influencer/{busiest_influencer}/dashboard', None)),
+        ('create_submission', 'POST', '/api/submissions',
+         lambda: ('/api/submissions', {'campaignId': accepted[0], 'influencerId': accepted[1],
+                                       'contentUrl': f'https://example.com/bench/{next(counter)}'})),
+        ('search_influencers', 'GET', '/api/influencers/search',
+         lambda: ('/api/influencers/search?niche=Food&location=Austin&min_followers=1000', None)),
+        ('search_influencers_page', 'GET', '/api/influencers/search',
+         lambda: ('/api/influencers/search?location=Austin&limit=50', None)),
+        ('search_influencers_radius', 'GET', '/api/influencers/search',
+         lambda: ('/api/influencers/search?location=Austin&radius_km=50&limit=50', None)),
+        ('influencer_facets', 'GET', '/api/influencers/facets',
+         lambda: ('/api/influencers/facets?location=Austin', None)),
+        ('public_campaigns', 'GET', '/api/campaigns/public',
+         lambda: ('/api/campaigns/public', None)),
+        ('public_campaign_search', 'GET', '/api/campaigns/public/search',
+         lambda: ('/api/campaigns/public/search?q=coffee+launch&limit=20', None)),
+        ('create_application', 'POST', '/api/applications',
+         lambda: ('/api/applications', {'campaignId': campaign(), 'influencerId': influencer()})),
+        ('campaign_applications', 'GET', '/api/campaigns/<int:campaign_id>/applications',
+         lambda: (f'/api/campaigns/{busiest_campaign}/applications', None)),
+        ('update_application_status', 'PUT', '/api/applications/<int:application_id>',
+         lambda: (f'/api/applications/{rng.choice(application_ids)}', {'status': 'rejected'})),
+        ('update_submission_status', 'PUT', '/api/submissions/<int:submission_id>',
+         lambda: (f'/api/submissions/{rng.choice(submission_ids)}', {'status': 'approved'})),
+        # The change feeds replay everything the write scenarios above published (timeout=0
+        # closes the stream once the backlog is sent).
+        ('influencer_events', 'GET', '/api/influencer/<int:influencer_id>/events',
+         lambda: (f'/api/influencer/{busiest_influencer}/events?last_event_id=0&timeout=0', None)),
+        ('brand_events', 'GET', '/api/brand/<int:brand_id>/events',
+         lambda: ('/api/brand/1/events?last_event_id=0&timeout=0', None)),
+        ('cache_stats', 'GET', '/api/_cache/stats',
+         lambda: ('/api/_cache/stats', None)),
+        ('metrics', 'GET', '/api/_metrics',
+         lambda: ('/api/_metrics', None)),
+        ('register_brand', 'POST', '/api/register',
+         lambda: ('/api/register', {'email': f'newbrand{next(counter)}@bench.test', 'password': PASSWORD})),
+        ('register_influencer', 'POST', '/api/influencer/register',
+         lambda: ('/api/influencer/register', {'email': f'newcreator{next(counter)}@bench.test',
+                                               'password': PASSWORD, 'name': 'New Creator'})),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_worker(db_path, iterations, out_path):
+    """Benchmarks every scenario against one database and writes the results to out_path."""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(db_path)
+    os.environ.setdefault('CACHE_BACKEND', 'none')
+    os.environ.setdefault('SNAPSHOT_PATH', os.path.abspath(db_path) + '.snapshot')
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import event
+    import app as nanoconnect
+
+    app = nanoconnect.create_app()
+    client = app.test_client()
+    with app.app_context():
+        # Precompute the stored matches, as the match worker would have.
+        nanoconnect.enqueue_campaign_rebuilds()
+        while nanoconnect.process_match_jobs():
+            pass
+    # And warm the worker up as the gunicorn post_fork hook does (snapshot included).
+    nanoconnect.warm_up(app)
+    statements = [0]
+    with app.app_context():
+        event.listen(nanoconnect.db.engine, 'before_cursor_execute', lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    etags = {}
+    scenarios = build_scenarios(db_path, etags=etags)
+    covered = {(rule, method) for _, method, rule, _ in scenarios}
+    for rule in app.url_map.iter_rules():
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            if rule.endpoint != 'static' and (rule.rule, method) not in covered:
+                print(f'  warning: no benchmark scenario for {method} {rule.rule}', file=sys.stderr)
+
+    def call(method, make_request):
+        url, body, *headers = make_request()
+        response = client.open(url, method=method, json=body, headers=headers[0] if headers else None)
+        if response.headers.get('ETag'):
+            etags[url] = response.headers['ETag']
+        return response
+
+    results = {}
+    for name, method, rule, make_request in scenarios:
+        # Warm-up requests build lazy state (keyword index, mapper configuration).
+        for _ in range(2):
+            call(method, make_request)
+
+        latencies, statuses = [], {}
+        statements[0] = 0
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = call(method, make_request)
+            response.get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        sql_per_request = statements[0] / iterations
+
+        tracemalloc.start()
+        call(method, make_request).get_data()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies.sort()
+        results[name] = {
+            'method': method,
+            'rule': rule,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p90_ms': round(percentile(latencies, 0.90), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'sql_statements': round(sql_per_request, 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        }
+        print(f"  {name:30} p50 {results[name]['p50_ms']:9.2f} ms  p99 {results[name]['p99_ms']:9.2f} ms  "
+              f"sql {results[name]['sql_statements']:7.2f}  peak {results[name]['peak_memory_kb']:10.1f} KB",
+              file=sys.stderr)
+
+    with open(out_path, 'w') as f:
+        json.dump(results, f)
+
+
+def compare(baseline, current, threshold):
+    """Returns human-readable regressions of `current` against `baseline`."""
+    regressions = []
+    for scale, endpoints in current['scales'].items():
+        for name, result in endpoints.items():
+            before = baseline.get('scales', {}).get(scale, {}).get(name)
+            if before is None:
+                continue
+            for metric in ('p50_ms', 'p99_ms', 'peak_memory_kb'):
+                # Ignore sub-millisecond noise on very fast endpoints.
+                if result[metric] > before[metric] * (1 + threshold) and result[metric] - before[metric] > 1:
+                    regressions.append(f'{scale} {name}: {metric} {before[metric]} -> {result[metric]}')
+            # Statement counts are averages over random ids, so allow a little jitter.
+            if result['sql_statements'] > before['sql_statements'] + 0.5:
+                regressions.append(f"{scale} {name}: sql_statements {before['sql_statements']} -> {result['sql_statements']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1000', help='Comma-separated influencer counts, e.g. 1000,100000,1000000')
+    parser.add_argument('--iterations', type=int, default=50, help='Measured requests per endpoint')
+    parser.add_argument('--data-dir', default=tempfile.gettempdir(), help='Where generated databases are kept')
+    parser.add_argument('--regenerate', action='store_true', help='Rebuild databases even if they exist')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown before flagging')
+    parser.add_argument('--worker', nargs=2, metavar=('DB', 'OUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.iterations, args.worker[1])
+        return
+
+    results = {'meta': {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'iterations': args.iterations,
+                        'python': sys.version.split()[0]}, 'scales': {}}
+    for scale in [int(s) for s in args.scales.split(',')]:
+        # Writes during a run change the data, so every run starts from a fresh copy.
+        pristine = os.path.join(args.data_dir, f'nanoconnect_bench_{scale}.db')
+        if args.regenerate or not os.path.exists(pristine):
+            print(f'Generating {scale} influencers -> {pristine}', file=sys.stderr)
+            generate(pristine, scale)
+        work_db = pristine + '.run'
+        with open(pristine, 'rb') as src, open(work_db, 'wb') as dst:
+            dst.write(src.read())
+
+        print(f'Benchmarking {scale} influencers', file=sys.stderr)
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+            out_path = tmp.name
+        subprocess.run([sys.executable, '-m', 'bench.run', '--iterations', str(args.iterations),
+                        '--worker', work_db, out_path], cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+        with open(out_path) as f:
+            results['scales'][str(scale)] = json.load(f)
+        os.remove(out_path)
+        os.remove(work_db)
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {args.out}', file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the baseline.', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
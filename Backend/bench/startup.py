@@ -0,0 +1,95 @@
+"""
+Measures what a fresh worker costs before it serves at full speed: the time to
+import and build the app, and the latency of the first request to each hot
+route on a cold worker versus one prepared by warm_up() (what the gunicorn
+post_fork hook runs). Every sample runs in a new process; medians are reported.
+
+From the Backend directory: python -m bench.startup --scale 20000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.datagen import generate
+from bench.run import BACKEND_DIR, build_scenarios
+
+# Scenarios (see bench.run) whose first request is timed.
+HOT_SCENARIOS = ('list_campaigns', 'campaign_details', 'campaign_match', 'influencer_projects',
+                 'search_influencers', 'public_campaigns')
+
+
+def run_child(db_path, warm, out_path):
+    """One sample: build the app, optionally warm it up, then time one request per hot route."""
+    started = time.perf_counter()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(db_path)
+    os.environ.setdefault('CACHE_BACKEND', 'none')
+    # A snapshot of its own, so cold samples never find one left by an earlier sample.
+    os.environ['SNAPSHOT_PATH'] = out_path + '.snapshot'
+    sys.path.insert(0, BACKEND_DIR)
+    import app as nanoconnect
+
+    app = nanoconnect.create_app()
+    sample = {'import_and_create_app_ms': (time.perf_counter() - started) * 1000}
+    if warm:
+        sample['warm_up_ms'] = nanoconnect.warm_up(app) * 1000
+
+    client = app.test_client()
+    scenarios = {name: make_request for name, _, _, make_request in build_scenarios(db_path)}
+    for name in HOT_SCENARIOS:
+        url, body, *_ = scenarios[name]()
+        request_started = time.perf_counter()
+        client.get(url).get_data()
+        sample[name] = (time.perf_counter() - request_started) * 1000
+    with open(out_path, 'w') as f:
+        json.dump(sample, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1000, help='Influencer count of the generated database')
+    parser.add_argument('--runs', type=int, default=5, help='Processes started per mode')
+    parser.add_argument('--data-dir', default=tempfile.gettempdir(), help='Where generated databases are kept')
+    parser.add_argument('--out', help='Also write the medians to this JSON file')
+    parser.add_argument('--child', nargs=3, metavar=('DB', 'MODE', 'OUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1] == 'warm', args.child[2])
+        return
+
+    db_path = os.path.join(args.data_dir, f'nanoconnect_bench_{args.scale}.db')
+    if not os.path.exists(db_path):
+        print(f'Generating {args.scale} influencers -> {db_path}', file=sys.stderr)
+        generate(db_path, args.scale)
+
+    medians = {}
+    for mode in ('cold', 'warm'):
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+                out_path = tmp.name
+            subprocess.run([sys.executable, '-m', 'bench.startup', '--child', db_path, mode, out_path],
+                           cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+            with open(out_path) as f:
+                samples.append(json.load(f))
+            for path in (out_path, out_path + '.snapshot', out_path + '.snapshot.lock'):
+                if os.path.exists(path):
+                    os.remove(path)
+        medians[mode] = {key: round(statistics.median(sample[key] for sample in samples), 3) for key in samples[0]}
+
+    print(f"{'':30} {'cold':>10} {'warm':>10}")
+    for key in medians['warm']:
+        cold = medians['cold'].get(key)
+        print(f"{key:30} {'-' if cold is None else f'{cold:.1f}':>10} {medians['warm'][key]:>10.1f}  ms")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'scale': args.scale, 'runs': args.runs, 'medians': medians}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Streaming bulk import of influencer and campaign catalogs.
+
+Records are read lazily from CSV or JSONL, validated, de-duplicated and
+inserted in batches: one executemany INSERT per batch, or COPY on PostgreSQL.
+Password hashing, the slow part of importing influencers, runs in a process pool.
+"""
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from werkzeug.security import generate_password_hash
+
+from geo import geo_columns, geocode
+from matching import normalize_location
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+def read_records(path, fmt=None):
+    """Yields (line_number, record) pairs from a .csv or .jsonl file without loading it whole."""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            # Line 1 is the header.
+            for line_number, record in enumerate(csv.DictReader(f), start=2):
+                yield line_number, record
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError:
+                        yield line_number, None
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(record, field, max_length=None):
+    value = record.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value or None
+
+
+def _number(record, field, cast):
+    value = record.get(field)
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+
+
+def validate_influencer(record):
+    """Returns (row, password) for a valid influencer record; raises ValueError otherwise."""
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    row = {
+        'email': _text(record, 'email', 120),
+        'name': _text(record, 'name', 80),
+        'followers': _number(record, 'followers', int) or 0,
+        'location': _text(record, 'location', 80),
+        'keywords': _text(record, 'keywords', 200),
+        'niche': _text(record, 'niche', 80),
+        'engagement_rate': _number(record, 'engagement_rate', float),
+        'audience_age_range': _text(record, 'audience_age_range', 50),
+        'audience_gender_split': _text(record, 'audience_gender_split', 50),
+    }
+    if not row['email'] or '@' not in row['email']:
+        raise ValueError("a valid email is required")
+    if not row['name']:
+        raise ValueError("name is required")
+    row['location_normalized'] = normalize_location(row['location']) or None
+    row.update(geo_columns(row['location_normalized']))
+    return row, _text(record, 'password')
+
+
+def validate_campaign(record):
+    """Returns (row, brand_email) for a valid campaign record; raises ValueError otherwise."""
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    is_public = record.get('is_public')
+    row = {
+        'name': _text(record, 'name', 120),
+        'budget': _number(record, 'budget', float),
+        'brief': _text(record, 'brief'),
+        'status': _text(record, 'status', 50) or 'planning',
+        'goal': _text(record, 'goal', 100),
+        'target_audience_notes': _text(record, 'target_audience_notes'),
+        'target_location': _text(record, 'target_location', 100),
+        'is_public': is_public if isinstance(is_public, bool) else str(is_public or '').strip().lower() in TRUE_VALUES,
+        'brand_id': _number(record, 'brand_id', int),
+    }
+    if not row['name']:
+        raise ValueError("name is required")
+    if row['budget'] is None:
+        raise ValueError("budget is required")
+    if not row['brief']:
+        raise ValueError("brief is required")
+    brand_email = _text(record, 'brand_email')
+    if row['brand_id'] is None and not brand_email:
+        raise ValueError("brand_id or brand_email is required")
+    point = geocode(row['target_location']) if row['target_location'] else None
+    row['latitude'], row['longitude'] = point or (None, None)
+    return row, brand_email
+
+
+class ImportReport:
+    """Counts imported, skipped and invalid rows and prints progress with a rows/second rate."""
+
+    max_errors_shown = 20
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def error(self, line_number, message):
+        self.invalid += 1
+        if self.invalid <= self.max_errors_shown:
+            print(f"  line {line_number}: {message}")
+        elif self.invalid == self.max_errors_shown + 1:
+            print("  (further invalid rows are only counted)")
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.inserted / elapsed if elapsed > 0 else 0.0
+
+    def progress(self):
+        print(f"  {self.inserted} {self.label} imported ({self.rate():,.0f} rows/s)")
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"Imported {self.inserted} {self.label} in {elapsed:.1f}s ({self.rate():,.0f} rows/s); "
+              f"skipped {self.duplicates} duplicates and {self.invalid} invalid rows.")
+
+
+def copy_rows(connection, table, rows):
+    """Bulk-loads rows with PostgreSQL COPY through the raw psycopg2 cursor."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # An unquoted empty field is NULL in COPY's CSV format.
+        writer.writerow(['' if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def insert_rows(connection, table, rows):
+    """Inserts a batch with COPY on PostgreSQL and a single executemany INSERT elsewhere."""
+    if not rows:
+        return
+    if connection.dialect.name == 'postgresql':
+        copy_rows(connection, table, rows)
+    else:
+        connection.execute(table.insert(), rows)
+
+
+def import_influencers(engine, influencer_table, location_insert, records, batch_size=5000, workers=None,
+                       hash_password=generate_password_hash):
+    """
+    Imports influencer records into `influencer_table`. Emails already in the
+    database or seen earlier in the file are skipped. `location_insert` is an
+    insert-or-ignore statement for the Location lookup table, and `hash_password`
+    a picklable function run in the process pool.
+    """
+    report = ImportReport('influencers')
+    seen_emails = set()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunked(records, batch_size):
+            valid = []
+            for line_number, record in chunk:
+                try:
+                    row, password = validate_influencer(record)
+                except ValueError as e:
+                    report.error(line_number, str(e))
+                    continue
+                if row['email'] in seen_emails:
+                    report.duplicates += 1
+                    continue
+                seen_emails.add(row['email'])
+                valid.append((row, password))
+
+            with engine.begin() as connection:
+                # One query per chunk finds the emails that already have an account.
+                emails = [row['email'] for row, _ in valid]
+                existing = set(connection.execute(
+                    influencer_table.select().with_only_columns(influencer_table.c.email)
+                    .where(influencer_table.c.email.in_(emails))
+                ).scalars()) if emails else set()
+                new = [(row, password) for row, password in valid if row['email'] not in existing]
+                report.duplicates += len(valid) - len(new)
+
+                passwords = [password for _, password in new if password]
+                hashes = iter(pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+                rows = []
+                for row, password in new:
+                    row['password_hash'] = next(hashes) if password else None
+                    rows.append(row)
+
+                insert_rows(connection, influencer_table, rows)
+                locations = {row['location_normalized'] for row in rows if row['location_normalized']}
+                if locations:
+                    connection.execute(location_insert, [{'name': name} for name in locations])
+            report.inserted += len(rows)
+            report.progress()
+    report.summary()
+    return report
+
+
+def import_campaigns(engine, campaign_table, brand_table, records, batch_size=5000):
+    """
+    Imports campaign records, resolving brand_email to brand ids and checking given
+    brand_ids exist, one query each per chunk (an unknown id would otherwise fail the
+    whole chunk's insert on its foreign key).
+    """
+    report = ImportReport('campaigns')
+    for chunk in chunked(records, batch_size):
+        valid = []
+        for line_number, record in chunk:
+            try:
+                valid.append((line_number,) + validate_campaign(record))
+            except ValueError as e:
+                report.error(line_number, str(e))
+
+        with engine.begin() as connection:
+            emails = {brand_email for _, row, brand_email in valid if row['brand_id'] is None}
+            brand_ids = dict(connection.execute(
+                brand_table.select().with_only_columns(brand_table.c.email, brand_table.c.id)
+                .where(brand_table.c.email.in_(emails))
+            ).all()) if emails else {}
+            given_ids = {row['brand_id'] for _, row, _ in valid if row['brand_id'] is not None}
+            known_ids = set(connection.execute(
+                brand_table.select().with_only_columns(brand_table.c.id).where(brand_table.c.id.in_(given_ids))
+            ).scalars()) if given_ids else set()
+            rows = []
+            for line_number, row, brand_email in valid:
+                if row['brand_id'] is not None and row['brand_id'] not in known_ids:
+                    report.error(line_number, f"unknown brand_id {row['brand_id']}")
+                    continue
+                if row['brand_id'] is None:
+                    row['brand_id'] = brand_ids.get(brand_email)
+                    if row['brand_id'] is None:
+                        report.error(line_number, f"unknown brand {brand_email}")
+                        continue
+                rows.append(row)
+            insert_rows(connection, campaign_table, rows)
+        report.inserted += len(rows)
+        report.progress()
+    report.summary()
+    return report
@@ -0,0 +1,262 @@
+"""
+Versioned response cache for hot read endpoints.
+
+Cache keys combine the endpoint, its query arguments and the current version
+of every entity the response depends on (e.g. "influencers" or "campaign:7").
+Writes bump those version counters, so an entry is never served after the data
+behind it changed; old entries simply stop being looked up and age out.
+
+With a read replica, the key also records which database the response is read
+from, so a client pinned to the primary after a write never gets a response
+built from the lagging replica. Responses read from the replica are not stored
+while one of their entities was bumped within the replica lag window: the
+replica may not have the write yet, and the entry would outlive the lag.
+
+Two backends are available:
+- MemoryBackend: an in-process LRU with TTL. Versions are per process, so with
+  several gunicorn workers a write is only seen by the worker that handled it
+  until the TTL expires.
+- SharedFileBackend: a small SQLite file shared by every worker on the host,
+  so version bumps are seen by all workers immediately.
+"""
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+
+class MemoryBackend:
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._versions = {}
+        self._bumped_at = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_versions(self, names):
+        with self._lock:
+            return [self._versions.get(name, 0) for name in names]
+
+    def bump(self, names):
+        now = time.time()
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+                self._bumped_at[name] = now
+
+    def last_bumped(self, names):
+        """Time of the latest bump of any of `names` (0 if none was bumped)."""
+        with self._lock:
+            return max((self._bumped_at.get(name, 0) for name in names), default=0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedFileBackend:
+    """Cache stored in a SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        # Set up with a throwaway connection: a process that creates the backend and then
+        # forks (gunicorn's preload_app) must not hand an open SQLite connection to its children.
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_bumps (name TEXT PRIMARY KEY, bumped_at REAL NOT NULL)')
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at >= ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)', (key, value, now + ttl))
+        # Trim expired entries and, if still too big, the ones closest to expiring.
+        conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (now,))
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+        )
+
+    def get_versions(self, names):
+        placeholders = ','.join('?' * len(names))
+        rows = dict(self._connect().execute(
+            f'SELECT name, version FROM cache_versions WHERE name IN ({placeholders})', list(names)
+        ).fetchall())
+        return [rows.get(name, 0) for name in names]
+
+    def bump(self, names):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO cache_versions (name, version) VALUES (?, 1) '
+                'ON CONFLICT(name) DO UPDATE SET version = version + 1', [(name,) for name in names]
+            )
+            conn.executemany('INSERT OR REPLACE INTO cache_bumps (name, bumped_at) VALUES (?, ?)',
+                             [(name, now) for name in names])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def last_bumped(self, names):
+        placeholders = ','.join('?' * len(names))
+        row = self._connect().execute(
+            f'SELECT MAX(bumped_at) FROM cache_bumps WHERE name IN ({placeholders})', list(names)
+        ).fetchone()
+        return row[0] or 0
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache_entries')
+
+
+class ResponseCache:
+    """
+    Caches GET responses keyed by endpoint, query arguments and entity versions.
+    `read_source` returns 'replica' or 'primary' for the current request, and
+    `replica_lag` is how long (seconds) the replica may trail a write.
+    """
+
+    def __init__(self, backend=None, ttl=60, read_source=None, replica_lag=0):
+        self.backend = backend
+        self.ttl = ttl
+        self.read_source = read_source
+        self.replica_lag = replica_lag
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def version(self, entity):
+        """Current version counter of `entity`, or None when caching is disabled."""
+        if not self.enabled:
+            return None
+        return self.backend.get_versions([entity])[0]
+
+    def bump(self, *entities):
+        """Invalidates every cached response that depends on one of `entities`."""
+        if self.enabled and entities:
+            self.backend.bump(entities)
+
+    def cached(self, depends_on):
+        """
+        Decorator for GET views. `depends_on` is a list of entity names, or a
+        function that receives the view's arguments and returns that list.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                if not self.enabled:
+                    return view(**kwargs)
+                key, response = self.lookup(depends_on, kwargs)
+                if response is not None:
+                    return response
+                return self.store(key, current_app.make_response(view(**kwargs)))
+            return wrapper
+        return decorator
+
+    def lookup(self, depends_on, view_args):
+        """
+        The cache key of the current request and its stored response (None on a miss).
+        The key is None when the response about to be built must not be stored.
+        Split from cached() so views that are not plain Flask functions can share it.
+        """
+        entities = depends_on(**view_args) if callable(depends_on) else depends_on
+        source = self.read_source() if self.read_source else 'primary'
+        key = self._make_key(request.endpoint, view_args, entities, source)
+        stored = self.backend.get(key)
+        if stored is None:
+            self._count(self.misses, request.endpoint)
+            if (source == 'replica' and entities and self.replica_lag
+                    and self.backend.last_bumped(entities) > time.time() - self.replica_lag):
+                return None, None
+            return key, None
+        self._count(self.hits, request.endpoint)
+        status, mimetype, body = stored.split(b'\n', 2)
+        response = Response(body, status=int(status), mimetype=mimetype.decode())
+        response.headers['X-Cache'] = 'HIT'
+        return key, response
+
+    def store(self, key, response):
+        """Keeps a freshly built response under `key` (if worth keeping) and returns it."""
+        # Only complete, successful bodies are worth keeping; streams are passed through.
+        if key is not None and response.status_code == 200 and not response.is_streamed:
+            value = b'%d\n%s\n' % (response.status_code, response.mimetype.encode()) + response.get_data()
+            self.backend.set(key, value, self.ttl)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    def _make_key(self, endpoint, view_args, entities, source):
+        versions = self.backend.get_versions(entities) if entities else []
+        parts = [
+            endpoint,
+            source,
+            repr(sorted(view_args.items())),
+            repr(sorted(request.args.items(multi=True))),
+            repr(list(zip(entities, versions))),
+        ]
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    def _count(self, counter, endpoint):
+        with self._lock:
+            counter[endpoint] = counter.get(endpoint, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__ if self.backend else None,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "total_hits": sum(self.hits.values()),
+                "total_misses": sum(self.misses.values()),
+            }
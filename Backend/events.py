@@ -0,0 +1,261 @@
+"""
+Per-user change feed, served as server-sent events.
+
+Writes to invites, applications and submissions append small events (the row's
+ids and new status) to the channels of the users they concern, e.g.
+"influencer:42" and "brand:7". A client keeps one text/event-stream
+connection open per user and patches its state from the events instead of
+refetching whole pages. Every event carries an id; a client that reconnects
+with the last id it saw (the Last-Event-ID header EventSource sends, or
+?last_event_id=) receives what it missed. If those events have been dropped
+already, it receives a "reset" event and reloads its data once.
+
+Events are kept for a while (EVENTS_RETENTION) by one of two brokers:
+- MemoryBroker: in-process, so only a subscriber connected to the worker that
+  handled the write sees the event, and event ids are unrelated across workers.
+  Suits a single worker process.
+- SharedFileBroker: a small SQLite file shared by every worker on the host.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+
+class Event(NamedTuple):
+    id: int
+    kind: str
+    data: str  # JSON
+
+
+def encode(payload):
+    return json.dumps(payload, separators=(',', ':'))
+
+
+class MemoryBroker:
+    """In-process event log with a per-event TTL and a cap on the number of events kept."""
+
+    def __init__(self, retention=3600, max_entries=10000):
+        self.retention = retention
+        self.max_entries = max_entries
+        self._changed = threading.Condition()
+        self._last_id = 0
+        self._log = deque()  # (created_at, channel) of every kept event, oldest first
+        self._channels = {}  # channel -> deque of Event
+        # channel -> id of its newest dropped event, least recently pruned first. Bounded
+        # by max_entries like the log; a channel forgotten here is treated as having lost
+        # every event up to _forgotten_through, which at worst costs its client a reset.
+        self._pruned = OrderedDict()
+        self._forgotten_through = 0
+
+    def publish(self, entries):
+        """Appends (channel, kind, data) entries."""
+        now = time.time()
+        with self._changed:
+            for channel, kind, data in entries:
+                self._last_id += 1
+                self._channels.setdefault(channel, deque()).append(Event(self._last_id, kind, data))
+                self._log.append((now, channel))
+            while self._log and (len(self._log) > self.max_entries or self._log[0][0] < now - self.retention):
+                _, channel = self._log.popleft()
+                events = self._channels[channel]
+                self._pruned[channel] = events.popleft().id
+                self._pruned.move_to_end(channel)
+                if not events:
+                    del self._channels[channel]
+            while len(self._pruned) > self.max_entries:
+                _, pruned_through = self._pruned.popitem(last=False)
+                self._forgotten_through = max(self._forgotten_through, pruned_through)
+            self._changed.notify_all()
+
+    def last_id(self):
+        return self._last_id
+
+    def _has_news(self, channel, after):
+        events = self._channels.get(channel)
+        return (bool(events) and events[-1].id > after) or not self._complete(channel, after)
+
+    def _complete(self, channel, after):
+        # An id from the future was handed out by an earlier process.
+        return self._pruned.get(channel, self._forgotten_through) <= after <= self._last_id
+
+    def read(self, channel, after, limit):
+        """Up to `limit` events of `channel` after id `after`, or None if some were dropped."""
+        with self._changed:
+            if not self._complete(channel, after):
+                return None
+            events = self._channels.get(channel, ())
+            # Only the tail of the channel can be newer than `after`.
+            newer = []
+            for event in reversed(events):
+                if event.id <= after:
+                    break
+                newer.append(event)
+            return newer[::-1][:limit]
+
+    def wait(self, channel, after, timeout):
+        """Blocks until `channel` has events after `after`, for at most `timeout` seconds."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._has_news(channel, after), timeout)
+
+
+class SharedFileBroker:
+    """Event log stored in a SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, path, retention=3600, poll_interval=0.5, prune_interval=60):
+        self.path = path
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self._pruned_at = 0
+        self._local = threading.local()
+        # Set up with a throwaway connection, see SharedFileBackend in cache.py.
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                         'channel TEXT NOT NULL, kind TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_events_channel_id ON events (channel, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_events_created_at ON events (created_at)')
+            # Newest pruned event id per channel, so resuming past it is detected.
+            conn.execute('CREATE TABLE IF NOT EXISTS event_horizon (channel TEXT PRIMARY KEY, pruned_through INTEGER NOT NULL)')
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def publish(self, entries):
+        conn = self._connect()
+        now = time.time()
+        prune = now - self._pruned_at >= self.prune_interval
+        # One transaction per publish, so a bulk invite costs a single commit.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT INTO events (channel, kind, data, created_at) VALUES (?, ?, ?, ?)',
+                             [(channel, kind, data, now) for channel, kind, data in entries])
+            if prune:
+                cutoff = now - self.retention
+                conn.execute(
+                    'INSERT INTO event_horizon (channel, pruned_through) '
+                    'SELECT channel, MAX(id) FROM events WHERE created_at < ? GROUP BY channel '
+                    'ON CONFLICT(channel) DO UPDATE SET pruned_through = excluded.pruned_through', (cutoff,)
+                )
+                conn.execute('DELETE FROM events WHERE created_at < ?', (cutoff,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if prune:
+            self._pruned_at = now
+
+    def last_id(self):
+        row = self._connect().execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+        return row[0] if row else 0
+
+    def read(self, channel, after, limit):
+        conn = self._connect()
+        # One read transaction, so a concurrent prune cannot slip in between the checks and the read.
+        conn.execute('BEGIN')
+        try:
+            pruned_through, last_id = conn.execute(
+                "SELECT (SELECT pruned_through FROM event_horizon WHERE channel = ?), "
+                "(SELECT seq FROM sqlite_sequence WHERE name = 'events')", (channel,)
+            ).fetchone()
+            if after < (pruned_through or 0) or after > (last_id or 0):
+                return None
+            return [Event(*row) for row in conn.execute(
+                'SELECT id, kind, data FROM events WHERE channel = ? AND id > ? ORDER BY id LIMIT ?',
+                (channel, after, limit)
+            )]
+        finally:
+            conn.execute('COMMIT')
+
+    def wait(self, channel, after, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.read(channel, after, 1)
+            if events is None or events:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+
+class EventFeed:
+    """Publishes change events and renders them as text/event-stream chunks."""
+
+    def __init__(self, backend=None, stream_timeout=25, heartbeat=15, batch_size=500, retry=1000):
+        self.backend = backend
+        self.stream_timeout = stream_timeout
+        self.heartbeat = heartbeat
+        self.batch_size = batch_size
+        self.retry = retry  # ms EventSource waits before reconnecting
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def publish(self, entries):
+        """Appends (channel, kind, payload) entries; a no-op when the feed is disabled."""
+        if self.enabled and entries:
+            self.backend.publish([(channel, kind, encode(payload)) for channel, kind, payload in entries])
+
+    @staticmethod
+    def format(event_id, kind, data):
+        return f'id: {event_id}\nevent: {kind}\ndata: {data}\n\n'
+
+    def open(self, channel, last_event_id=None, retry=None):
+        """
+        The first chunk of a stream and the id it leaves the client at: the events after
+        `last_event_id`, or a "ready" event carrying the current position for a new client.
+        The retry field (`retry` ms, self.retry by default) sets how soon EventSource
+        reconnects when the server ends the stream.
+        """
+        retry_field = f'retry: {self.retry if retry is None else retry}\n'
+        if last_event_id is None:
+            cursor = self.backend.last_id()
+            return cursor, retry_field + self.format(cursor, 'ready', '{}')
+        cursor, chunk = self.poll(channel, last_event_id)
+        return cursor, retry_field + chunk
+
+    def poll(self, channel, cursor):
+        """Every event of `channel` after `cursor` as one chunk ('' if there are none) and the new cursor."""
+        chunks = []
+        while True:
+            events = self.backend.read(channel, cursor, self.batch_size)
+            if events is None:
+                # Some of the events the client missed are gone; it has to reload its data.
+                cursor = self.backend.last_id()
+                return cursor, self.format(cursor, 'reset', '{}')
+            chunks.extend(self.format(*event) for event in events)
+            if events:
+                cursor = events[-1].id
+            if len(events) < self.batch_size:
+                return cursor, ''.join(chunks)
+
+    def stream(self, channel, last_event_id=None, timeout=None, retry=None):
+        """
+        Yields the text/event-stream of `channel` for `timeout` seconds (stream_timeout by
+        default), with a comment line every `heartbeat` idle seconds so proxies keep the
+        connection open. The client then reconnects after `retry` ms and resumes from its
+        last event id.
+        """
+        deadline = time.monotonic() + (self.stream_timeout if timeout is None else timeout)
+        cursor, chunk = self.open(channel, last_event_id, retry)
+        yield chunk
+        while (remaining := deadline - time.monotonic()) > 0:
+            if self.backend.wait(channel, cursor, min(self.heartbeat, remaining)):
+                cursor, chunk = self.poll(channel, cursor)
+                yield chunk
+            else:
+                yield ': keep-alive\n\n'
@@ -0,0 +1,221 @@
+"""
+Offline geocoding and the spatial grid used for radius searches.
+
+Locations are free text ("Austin", "Round Rock, TX", "Portland, Oregon"). They
+are resolved against a gazetteer of cities bundled with the app
+(data/gazetteer.csv: name, region, country, latitude, longitude, population),
+so no request ever calls out to a geocoding service. Qualifiers after the first
+comma narrow the city down by region or country; otherwise the most populous
+city of that name wins.
+
+For radius searches the globe is divided into a grid of GRID_DEGREES cells
+numbered row by row, so the cells around a point form one contiguous range of
+cell numbers per grid row. Candidates are fetched by those ranges (or from the
+SQLite R-tree) and then filtered by their exact great-circle distance.
+"""
+import csv
+import functools
+import math
+import os
+import sqlite3
+
+import numpy as np
+from sqlalchemy import DDL, func
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Grid cell size; about 55 km north to south.
+GRID_DEGREES = 0.5
+_ROWS = int(180 / GRID_DEGREES)
+_COLUMNS = int(360 / GRID_DEGREES)
+
+# Common abbreviations of city names.
+CITY_ALIASES = {
+    'nyc': 'new york', 'new york city': 'new york', 'la': 'los angeles', 'sf': 'san francisco',
+    'philly': 'philadelphia', 'dc': 'washington', 'washington dc': 'washington', 'washington d.c.': 'washington',
+    'saint louis': 'st. louis', 'st louis': 'st. louis', 'saint paul': 'st. paul', 'st paul': 'st. paul',
+    'saint petersburg': 'st. petersburg', 'st petersburg': 'st. petersburg', 'montréal': 'montreal',
+}
+# Spelled-out regions and countries, mapped to the codes used in the gazetteer. They are
+# kept apart because the codes overlap: "Canada" is CA, and so is California.
+REGION_ALIASES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca', 'colorado': 'co',
+    'connecticut': 'ct', 'delaware': 'de', 'florida': 'fl', 'georgia': 'ga', 'hawaii': 'hi', 'idaho': 'id',
+    'illinois': 'il', 'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks', 'kentucky': 'ky', 'louisiana': 'la',
+    'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma', 'michigan': 'mi', 'minnesota': 'mn',
+    'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt', 'nebraska': 'ne', 'nevada': 'nv',
+    'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm', 'new york': 'ny', 'north carolina': 'nc',
+    'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok', 'oregon': 'or', 'pennsylvania': 'pa',
+    'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd', 'tennessee': 'tn', 'texas': 'tx',
+    'utah': 'ut', 'vermont': 'vt', 'virginia': 'va', 'washington': 'wa', 'west virginia': 'wv',
+    'wisconsin': 'wi', 'wyoming': 'wy', 'district of columbia': 'dc', 'd.c.': 'dc',
+    'ontario': 'on', 'quebec': 'qc', 'british columbia': 'bc', 'alberta': 'ab', 'manitoba': 'mb',
+    'nova scotia': 'ns', 'england': 'eng', 'scotland': 'sct',
+}
+COUNTRY_ALIASES = {
+    'usa': 'us', 'u.s.': 'us', 'u.s.a.': 'us', 'united states': 'us', 'united states of america': 'us',
+    'canada': 'ca', 'mexico': 'mx', 'uk': 'gb', 'united kingdom': 'gb', 'great britain': 'gb',
+    'ireland': 'ie', 'france': 'fr', 'germany': 'de', 'netherlands': 'nl', 'spain': 'es', 'portugal': 'pt',
+    'italy': 'it', 'australia': 'au', 'new zealand': 'nz', 'japan': 'jp', 'india': 'in', 'brazil': 'br',
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _gazetteer():
+    """Normalized city name -> [(region, country, latitude, longitude, population)], most populous first."""
+    cities = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            cities.setdefault(row['name'].lower(), []).append((
+                row['region'].lower(), row['country'].lower(),
+                float(row['latitude']), float(row['longitude']), int(row['population']),
+            ))
+    for candidates in cities.values():
+        candidates.sort(key=lambda city: -city[4])
+    return cities
+
+
+@functools.lru_cache(maxsize=4096)
+def geocode(location):
+    """
+    (latitude, longitude) of a free-text location, or None if the gazetteer does not
+    know it: "Round Rock, TX" -> (30.5083, -97.6789). Every qualifier after the city
+    ("TX", "Texas", "USA") must name the city's region or country. A spelled-out
+    name only matches its own kind ("India" the country, never the IN region).
+    """
+    # Compared like matching.normalize_location(): lower-cased, whitespace collapsed.
+    parts = [' '.join(part.split()) for part in location.lower().split(',')]
+    name = CITY_ALIASES.get(parts[0], parts[0])
+    qualifiers = [part for part in parts[1:] if part]
+    for region, country, latitude, longitude, _ in _gazetteer().get(name, ()):
+        if all(_qualifies(qualifier, region, country) for qualifier in qualifiers):
+            return latitude, longitude
+    return None
+
+
+def _qualifies(qualifier, region, country):
+    if qualifier in REGION_ALIASES:
+        return REGION_ALIASES[qualifier] == region
+    if qualifier in COUNTRY_ALIASES:
+        return COUNTRY_ALIASES[qualifier] == country
+    # A bare code may name either.
+    return qualifier in (region, country)
+
+
+def geo_columns(location):
+    """The latitude, longitude and geo_cell column values of an influencer at `location`."""
+    point = geocode(location) if location else None
+    if point is None:
+        return {"latitude": None, "longitude": None, "geo_cell": None}
+    return {"latitude": point[0], "longitude": point[1], "geo_cell": cell_of(*point)}
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distance in km from one point to others (scalars or NumPy arrays)."""
+    phi, phis = np.radians(latitude), np.radians(latitudes)
+    a = (np.sin((phis - phi) / 2) ** 2
+         + np.cos(phi) * np.cos(phis) * np.sin(np.radians(np.asarray(longitudes) - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def within_radius_sql(latitude_column, longitude_column, latitude, longitude, radius_km):
+    """
+    SQL condition equivalent to haversine_km() <= radius_km. The haversine term is
+    compared with its value at the radius, so only sin() and cos() are needed.
+    """
+    to_radians = math.pi / 180
+    threshold = math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+    half_dlat = func.sin((latitude_column - latitude) * (to_radians / 2))
+    half_dlon = func.sin((longitude_column - longitude) * (to_radians / 2))
+    return (half_dlat * half_dlat
+            + func.cos(latitude_column * to_radians) * math.cos(latitude * to_radians) * half_dlon * half_dlon
+            ) <= threshold
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lon, max_lon) boxes covering a circle: one, or two when
+    it crosses the antimeridian.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    # The circle is widest at its edge nearest to a pole.
+    widest = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if widest <= 0 or radius_km / (KM_PER_DEGREE * widest) >= 180:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    dlon = radius_km / (KM_PER_DEGREE * widest)
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def _row(latitude):
+    return min(int((latitude + 90) // GRID_DEGREES), _ROWS - 1)
+
+
+def _column(longitude):
+    return min(int((longitude + 180) // GRID_DEGREES), _COLUMNS - 1)
+
+
+def cell_of(latitude, longitude):
+    """The grid cell number of a point."""
+    return _row(latitude) * _COLUMNS + _column(longitude)
+
+
+def cell_ranges(latitude, longitude, radius_km):
+    """Inclusive (first, last) cell number ranges covering a circle, one per grid row and box."""
+    ranges = []
+    for min_lat, max_lat, min_lon, max_lon in bounding_boxes(latitude, longitude, radius_km):
+        first_column, last_column = _column(min_lon), _column(max_lon)
+        for row in range(_row(min_lat), _row(max_lat) + 1):
+            ranges.append((row * _COLUMNS + first_column, row * _COLUMNS + last_column))
+    return ranges
+
+
+def cells_near(latitude, longitude, radius_km):
+    """Every cell number covering a circle, see cell_ranges()."""
+    return [cell for first, last in cell_ranges(latitude, longitude, radius_km) for cell in range(first, last + 1)]
+
+
+@functools.lru_cache(maxsize=1)
+def rtree_available():
+    """True if this Python's SQLite was built with the R-tree module."""
+    connection = sqlite3.connect(':memory:')
+    try:
+        connection.execute('CREATE VIRTUAL TABLE probe USING rtree(id, min_x, max_x)')
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+
+# On SQLite an R-tree of influencer points is kept in sync with the influencer table
+# by triggers; run after the table is created and by the migrate-geo command.
+RTREE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS influencer_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    "CREATE TRIGGER IF NOT EXISTS influencer_geo_insert AFTER INSERT ON influencer "
+    "WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN "
+    "INSERT INTO influencer_geo VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude); END",
+    "CREATE TRIGGER IF NOT EXISTS influencer_geo_update AFTER UPDATE OF latitude, longitude ON influencer BEGIN "
+    "DELETE FROM influencer_geo WHERE id = old.id; "
+    "INSERT INTO influencer_geo SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude "
+    "WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS influencer_geo_delete AFTER DELETE ON influencer BEGIN "
+    "DELETE FROM influencer_geo WHERE id = old.id; END",
+]
+# Refills the R-tree from the influencer table.
+RTREE_REBUILD = [
+    "DELETE FROM influencer_geo",
+    "INSERT INTO influencer_geo SELECT id, latitude, latitude, longitude, longitude FROM influencer "
+    "WHERE latitude IS NOT NULL AND longitude IS NOT NULL",
+]
+
+
+def rtree_ddl(statement):
+    """A DDL element for `statement` that only runs on SQLite builds with R-tree support."""
+    return DDL(statement).execute_if(dialect='sqlite', callable_=lambda *args, **kwargs: rtree_available())
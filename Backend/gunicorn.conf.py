@@ -0,0 +1,71 @@
+"""
+Gunicorn settings for the API: gunicorn -c gunicorn.conf.py
+
+The app is preloaded: the master imports it once (Python modules, NumPy, the
+models and their configured mappers) and forks workers that share those pages.
+Each worker then drops the pooled connections it inherited, opens fresh ones
+and primes its in-memory caches before it accepts a request, so a rolling
+deploy does not hand cold workers to live traffic. Master boot time and each
+worker's warm-up time are logged, and an exited worker's metrics file is removed.
+"""
+import multiprocessing
+import os
+import time
+
+_started = time.perf_counter()
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+# Workers only see each other's cache invalidations through the shared cache file, so it is
+# the default whenever several of them run. (Set before the app is preloaded and configured;
+# a --workers flag on the command line is not taken into account.)
+if workers > 1:
+    os.environ.setdefault('CACHE_BACKEND', 'file')
+    # Likewise for the change feed: a client must see every worker's events, with one id sequence.
+    os.environ.setdefault('EVENTS_BACKEND', 'file')
+# A sync worker serves one request at a time, so a few open event streams would block the
+# API. Such workers answer event requests at once and clients poll; serve the streams from
+# asgi.py or run threaded workers (GUNICORN_THREADS > 1) to keep them open. With gevent
+# workers, set EVENTS_WSGI_STREAMING=1.
+if threads == 1:
+    os.environ.setdefault('EVENTS_WSGI_STREAMING', '0')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Recycle workers now and then; the jitter keeps them from restarting together.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+preload_app = True
+
+
+def when_ready(server):
+    server.log.info('Application preloaded; master ready in %.0f ms', (time.perf_counter() - _started) * 1000)
+    if server.cfg.workers > 1 and os.environ.get('CACHE_BACKEND') == 'memory':
+        server.log.warning('CACHE_BACKEND=memory with %d workers: after a write, the other workers serve '
+                           'stale responses for up to CACHE_TTL seconds. Use CACHE_BACKEND=file.', server.cfg.workers)
+    if server.cfg.workers > 1 and os.environ.get('EVENTS_BACKEND') == 'memory':
+        server.log.warning('EVENTS_BACKEND=memory with %d workers: event streams only see the events of '
+                           'their own worker. Use EVENTS_BACKEND=file.', server.cfg.workers)
+
+
+def post_fork(server, worker):
+    from app import warm_up
+
+    try:
+        seconds = warm_up(worker.app.wsgi())
+    except Exception:
+        # An unreachable database must not keep workers from booting; they start cold.
+        worker.log.exception('Worker %s warm-up failed', worker.pid)
+        return
+    worker.log.info('Worker %s warmed up in %.0f ms', worker.pid, seconds * 1000)
+
+
+def child_exit(server, worker):
+    # A recycled or crashed worker leaves its per-pid metrics file behind; the endpoint would
+    # keep summing it with the file of the worker that replaced it.
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir:
+        from metrics import remove_worker_file
+
+        remove_worker_file(metrics_dir, worker.pid)
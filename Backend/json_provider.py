@@ -0,0 +1,51 @@
+"""
+JSON provider that encodes with orjson when it is installed.
+
+orjson is an optional dependency (pip install orjson). Without it, or with
+JSON_ENCODER=std, Flask's default json-based provider is used unchanged.
+Values orjson cannot encode natively, or encodes differently from Flask
+(dates, decimals, dataclasses), are passed to Flask's default handler, so
+both providers produce the same documents.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    def _options(self, sort_keys):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Options such as indent or separators are only understood by the json module.
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options(self.sort_keys)).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self._options(self.sort_keys)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=options)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def json_provider_class(name='auto'):
+    """The provider class for JSON_ENCODER: 'orjson', 'std', or 'auto' (orjson if installed)."""
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson but orjson is not installed.")
+    if name == 'std' or orjson is None:
+        return DefaultJSONProvider
+    return ORJSONProvider
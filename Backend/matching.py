@@ -0,0 +1,331 @@
+"""
+Influencer matching helpers.
+
+Holds the text normalization used by the campaign matcher and a resident
+inverted index of influencer keywords, partitioned by location, so a match
+request only touches the postings for the tokens in a campaign brief.
+Candidates are scored with NumPy: IDF-weighted keyword overlap blended with
+reach (followers) and engagement rate, and only the top-k are returned.
+"""
+import math
+import string
+import threading
+import time
+
+import numpy as np
+
+from geo import cell_of, cells_near, haversine_km
+
+# Strips punctuation from a brief, e.g. "coffee." becomes "coffee"
+_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+# How much each signal contributes to the final match score (they sum to 1.0).
+DEFAULT_WEIGHTS = {"keywords": 0.7, "followers": 0.15, "engagement": 0.15}
+# Reach is scored on a log scale and saturates at this many followers.
+FOLLOWERS_CAP = 10_000_000
+# Engagement rate (a percentage) at which the engagement signal saturates.
+ENGAGEMENT_CAP = 10.0
+
+
+
+def normalize_location(location):
+    """Lower-cases a location and collapses whitespace ("  Austin,  TX" -> "austin, tx")."""
+    if not location:
+        return ''
+    return ' '.join(location.lower().split())
+
+
+def location_prefixes(location):
+    """
+    Returns the broader locations contained in a normalized location, split at
+    commas: "austin, tx" -> ["austin"]. Used so an "Austin, TX" campaign still
+    finds influencers who only wrote "Austin".
+    """
+    parts = location.split(',')
+    return [','.join(parts[:i]).strip() for i in range(1, len(parts))]
+
+
+def locations_match(target, location):
+    """True if two normalized locations refer to the same place ("austin" <-> "austin, tx")."""
+    return target in location or location in location_prefixes(target)
+
+
+def tokenize_brief(brief):
+    """Returns the set of unique, punctuation-free, lower-case words in a brief."""
+    if not brief:
+        return set()
+    return set(brief.lower().translate(_PUNCTUATION).split())
+
+
+def parse_keywords(keywords):
+    """Turns an influencer's comma-separated keyword string into a set of normalized keywords."""
+    if not keywords:
+        return set()
+    return {kw.strip() for kw in keywords.lower().split(',') if kw.strip()}
+
+
+def _idf(n_docs, document_frequency):
+    return np.log((1 + n_docs) / (1 + np.asarray(document_frequency, dtype=np.float64))) + 1.0
+
+
+def _blend(keyword_score, stats, weights):
+    """Blends keyword scores with the reach and engagement of `stats` rows of (followers, engagement_rate)."""
+    reach = np.minimum(np.log1p(np.maximum(stats[:, 0], 0)) / math.log1p(FOLLOWERS_CAP), 1.0)
+    engagement = np.clip(stats[:, 1] / ENGAGEMENT_CAP, 0.0, 1.0)
+    return (weights["keywords"] * keyword_score
+            + weights["followers"] * reach
+            + weights["engagement"] * engagement)
+
+
+class KeywordIndex:
+    """
+    Inverted index: normalized location -> keyword -> set of influencer ids.
+    Locations with coordinates are also filed under their grid cell, so radius
+    matching looks up the partitions near a point instead of comparing names.
+
+    The index is built once per worker and then kept up to date incrementally
+    via upsert()/remove(). Because other workers can also write influencers,
+    the whole index is rebuilt once it is older than max_age seconds.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._partitions = {}  # location -> {keyword: set(ids)}
+        self._entries = {}  # influencer id -> (location, keywords) currently indexed
+        self._stats = {}  # influencer id -> (followers, engagement_rate)
+        self._sizes = {}  # location -> number of influencers indexed there
+        self._points = {}  # location -> (latitude, longitude), for geocoded locations
+        self._cells = {}  # grid cell -> set of locations
+        self._built_at = None
+        # Opaque marker of the data the index was built from, set by the caller.
+        self.source_version = None
+
+    @property
+    def is_stale(self):
+        if self._built_at is None:
+            return True
+        return self.max_age is not None and time.monotonic() - self._built_at > self.max_age
+
+    def build(self, rows):
+        """
+        (Re)builds the index from an iterable of (id, location, keywords, followers,
+        engagement_rate, latitude, longitude) rows.
+        """
+        partitions = {}
+        entries = {}
+        stats = {}
+        sizes = {}
+        points = {}
+        cells = {}
+        for influencer_id, location, keywords, followers, engagement_rate, latitude, longitude in rows:
+            location = normalize_location(location)
+            keywords = frozenset(parse_keywords(keywords))
+            if not location or not keywords:
+                continue
+            if location not in partitions and latitude is not None and longitude is not None:
+                points[location] = (latitude, longitude)
+                cells.setdefault(cell_of(latitude, longitude), set()).add(location)
+            postings = partitions.setdefault(location, {})
+            for kw in keywords:
+                postings.setdefault(kw, set()).add(influencer_id)
+            entries[influencer_id] = (location, keywords)
+            stats[influencer_id] = (followers or 0, engagement_rate or 0.0)
+            sizes[location] = sizes.get(location, 0) + 1
+
+        with self._lock:
+            self._partitions = partitions
+            self._entries = entries
+            self._stats = stats
+            self._sizes = sizes
+            self._points = points
+            self._cells = cells
+            self._built_at = time.monotonic()
+
+    def upsert(self, influencer_id, location, keywords, followers=0, engagement_rate=0.0, latitude=None, longitude=None):
+        """Re-indexes a single influencer after their profile changed."""
+        with self._lock:
+            self._discard(influencer_id)
+            location = normalize_location(location)
+            keywords = frozenset(parse_keywords(keywords))
+            if not location or not keywords:
+                return
+            if location not in self._partitions and latitude is not None and longitude is not None:
+                self._points[location] = (latitude, longitude)
+                self._cells.setdefault(cell_of(latitude, longitude), set()).add(location)
+            postings = self._partitions.setdefault(location, {})
+            for kw in keywords:
+                postings.setdefault(kw, set()).add(influencer_id)
+            self._entries[influencer_id] = (location, keywords)
+            self._stats[influencer_id] = (followers or 0, engagement_rate or 0.0)
+            self._sizes[location] = self._sizes.get(location, 0) + 1
+
+    def remove(self, influencer_id):
+        with self._lock:
+            self._discard(influencer_id)
+
+    def _discard(self, influencer_id):
+        entry = self._entries.pop(influencer_id, None)
+        self._stats.pop(influencer_id, None)
+        if entry is None:
+            return
+        location, keywords = entry
+        self._sizes[location] = self._sizes.get(location, 1) - 1
+        postings = self._partitions.get(location, {})
+        for kw in keywords:
+            ids = postings.get(kw)
+            if ids is None:
+                continue
+            ids.discard(influencer_id)
+            if not ids:
+                del postings[kw]
+        if not postings:
+            self._partitions.pop(location, None)
+            self._sizes.pop(location, None)
+            point = self._points.pop(location, None)
+            if point is not None:
+                cell = cell_of(*point)
+                self._cells[cell].discard(location)
+                if not self._cells[cell]:
+                    del self._cells[cell]
+
+    def location_of(self, influencer_id):
+        """The normalized location an influencer is indexed under, or None if not indexed."""
+        with self._lock:
+            entry = self._entries.get(influencer_id)
+        return entry[0] if entry else None
+
+    def partitions_for(self, target_location, near=None):
+        """
+        Returns the location partitions matching a campaign's target location,
+        see locations_match(): "Austin" matches "Austin, TX" and vice versa.
+        With `near`, a (latitude, longitude, radius_km) circle, it instead returns
+        the geocoded partitions inside the circle, found through the grid cells.
+        """
+        if near is not None:
+            latitude, longitude, radius_km = near
+            with self._lock:
+                candidates = [loc for cell in cells_near(latitude, longitude, radius_km)
+                              for loc in self._cells.get(cell, ())]
+                return [loc for loc in candidates if haversine_km(latitude, longitude, *self._points[loc]) <= radius_km]
+        target = normalize_location(target_location)
+        if not target:
+            return []
+        with self._lock:
+            return [loc for loc in self._partitions if locations_match(target, loc)]
+
+    def top_matches(self, target_location, tokens, limit=50, min_score=0.0, weights=None, near=None):
+        """
+        Scores every influencer in the target location (or `near` circle, see
+        partitions_for()) that shares at least one keyword with the brief and returns
+        the best `limit` of them as a list of (influencer_id, score, matched_keyword_count),
+        highest score first.
+        """
+        return self.top_matches_batch(target_location, [tokens], limit, min_score, weights, near)[0]
+
+    def top_matches_batch(self, target_location, token_sets, limit=50, min_score=0.0, weights=None, near=None):
+        """
+        Scores several briefs that share a target location in one pass and
+        returns one top_matches() style list per entry of `token_sets`.
+
+        The keyword signal is the IDF-weighted overlap between a brief and the
+        influencer's keywords, divided by the weight of every brief token that
+        occurs in the location at all, so it lies in [0, 1]. It is blended with
+        log-scaled followers and engagement rate using `weights`.
+        """
+        weights = weights or DEFAULT_WEIGHTS
+        n_briefs = len(token_sets)
+        with self._lock:
+            locations = self.partitions_for(target_location, near)
+            partitions = [self._partitions[loc] for loc in locations]
+            n_docs = sum(self._sizes.get(loc, 0) for loc in locations)
+
+            # Posting lists for every token used by any brief, across all matching partitions.
+            terms = []
+            term_postings = []
+            for token in set().union(*token_sets):
+                ids = [i for p in partitions for i in p.get(token, ())]
+                if ids:
+                    terms.append(token)
+                    term_postings.append(ids)
+            if not terms:
+                return [[] for _ in token_sets]
+
+            # Map influencer ids onto dense column positions.
+            candidate_ids = np.unique(np.fromiter((i for ids in term_postings for i in ids), dtype=np.int64))
+            stats = np.array([self._stats.get(int(i), (0, 0.0)) for i in candidate_ids], dtype=np.float64).reshape(-1, 2)
+        n_candidates = len(candidate_ids)
+
+        # Term x candidate matrix in CSR form: the columns of term t are cols[ptr[t]:ptr[t + 1]].
+        lengths = np.array([len(ids) for ids in term_postings], dtype=np.int64)
+        ptr = np.concatenate(([0], np.cumsum(lengths)))
+        cols = np.concatenate([np.searchsorted(candidate_ids, np.asarray(ids, dtype=np.int64)) for ids in term_postings])
+        idf = _idf(n_docs, lengths)
+
+        # Brief x term query matrix as (row, term) pairs; every entry is weighted by the term's IDF.
+        term_index = {term: t for t, term in enumerate(terms)}
+        q_rows, q_terms = [], []
+        for row, tokens in enumerate(token_sets):
+            for token in tokens:
+                t = term_index.get(token)
+                if t is not None:
+                    q_rows.append(row)
+                    q_terms.append(t)
+        q_rows = np.asarray(q_rows, dtype=np.int64)
+        q_terms = np.asarray(q_terms, dtype=np.int64)
+        norms = np.bincount(q_rows, weights=idf[q_terms], minlength=n_briefs)
+
+        # Sparse product (briefs x terms) @ (terms x candidates): expand every query
+        # entry into the columns of its term and accumulate with a weighted bincount.
+        per_entry = lengths[q_terms]
+        rows = np.repeat(q_rows, per_entry)
+        offsets = np.arange(per_entry.sum()) - np.repeat(np.cumsum(per_entry) - per_entry, per_entry)
+        flat = rows * n_candidates + cols[np.repeat(ptr[q_terms], per_entry) + offsets]
+        size = n_briefs * n_candidates
+        keyword_score = np.bincount(flat, weights=np.repeat(idf[q_terms], per_entry), minlength=size).reshape(n_briefs, n_candidates)
+        matched = np.bincount(flat, minlength=size).reshape(n_briefs, n_candidates)
+        keyword_score /= np.where(norms > 0, norms, 1.0)[:, None]
+
+        scores = _blend(keyword_score, stats, weights)
+
+        results = []
+        for row in range(n_briefs):
+            row_scores = scores[row]
+            keep = np.flatnonzero((matched[row] > 0) & (row_scores >= min_score))
+            if limit is not None and limit < len(keep):
+                # Partial sort: only the best `limit` candidates are ever fully ordered.
+                keep = keep[np.argpartition(-row_scores[keep], limit - 1)[:limit]]
+            keep = keep[np.argsort(-row_scores[keep], kind='stable')]
+            results.append([(int(candidate_ids[i]), float(row_scores[i]), int(matched[row, i])) for i in keep])
+        return results
+
+    def score_influencer(self, influencer_id, target_location, token_sets, weights=None):
+        """
+        Scores one indexed influencer against several briefs sharing a target
+        location, exactly as top_matches_batch() would. Returns one
+        (score, matched_keyword_count) pair per brief, or None where the
+        influencer is outside the location or shares no keyword with the brief.
+        """
+        weights = weights or DEFAULT_WEIGHTS
+        with self._lock:
+            entry = self._entries.get(influencer_id)
+            locations = self.partitions_for(target_location)
+            if entry is None or entry[0] not in locations:
+                return [None] * len(token_sets)
+            keywords = entry[1]
+            partitions = [self._partitions[loc] for loc in locations]
+            n_docs = sum(self._sizes.get(loc, 0) for loc in locations)
+            frequencies = {token: sum(len(p.get(token, ())) for p in partitions) for token in set().union(*token_sets)}
+            stats = np.array([self._stats[influencer_id]], dtype=np.float64)
+
+        results = []
+        for tokens in token_sets:
+            present = [token for token in tokens if frequencies[token]]
+            matched = [token for token in present if token in keywords]
+            if not matched:
+                results.append(None)
+                continue
+            idf = dict(zip(present, _idf(n_docs, [frequencies[token] for token in present])))
+            keyword_score = sum(idf[token] for token in matched) / sum(idf.values())
+            results.append((float(_blend(np.array([keyword_score]), stats, weights)[0]), len(matched)))
+        return results
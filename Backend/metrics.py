@@ -0,0 +1,196 @@
+"""
+Opt-in per-request instrumentation.
+
+Records, per route and method, request counts by status, a latency histogram,
+SQL statement counts and SQL time, using Flask request hooks and SQLAlchemy
+cursor events on the app's engines. Every response gets a Server-Timing
+header, statements slower than a threshold are logged with their text, and
+the aggregates are rendered in the Prometheus text format.
+
+With several gunicorn workers, each worker periodically writes its aggregates
+to a shared directory and the metrics endpoint sums every worker's file.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('nanoconnect.sql')
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _new_series():
+    return {"count": 0, "statuses": {}, "buckets": [0] * len(BUCKETS), "sum": 0.0,
+            "sql_statements": 0, "sql_seconds": 0.0}
+
+
+def _merge(into, series):
+    into["count"] += series["count"]
+    into["sum"] += series["sum"]
+    into["sql_statements"] += series["sql_statements"]
+    into["sql_seconds"] += series["sql_seconds"]
+    for status, count in series["statuses"].items():
+        into["statuses"][status] = into["statuses"].get(status, 0) + count
+    into["buckets"] = [a + b for a, b in zip(into["buckets"], series["buckets"])]
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def worker_file(shared_dir, pid):
+    return os.path.join(shared_dir, f'metrics-{pid}.json')
+
+
+def remove_worker_file(shared_dir, pid):
+    """Drops the aggregates of an exited worker, whose pid no process will flush again."""
+    for path in (worker_file(shared_dir, pid), f'{worker_file(shared_dir, pid)}.tmp'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class Metrics:
+    def __init__(self, shared_dir=None, slow_query_ms=200, flush_interval=5.0):
+        self.shared_dir = shared_dir
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._series = {}  # "METHOD route" -> series
+        self._last_flush = 0.0
+
+    def init_app(self, app, engines):
+        """
+        Installs the request hooks and the SQL cursor events on the app's `engines`.
+        Listening on the engines rather than on the Engine class keeps a second app
+        in the same process (tests, the CLI) from counting every statement twice.
+        The start hook runs ahead of the hooks already registered (token checks
+        among them), so the requests those reject are timed and counted too.
+        """
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+        app.before_request_funcs.setdefault(None, []).insert(0, self._start_request)
+        app.after_request(self._finish_request)
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # --- SQL events ---
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_sql_statements += 1
+            g.metrics_sql_seconds += elapsed
+        if elapsed >= self.slow_query_seconds:
+            route = request.path if has_request_context() else '-'
+            logger.warning('Slow query (%.1f ms) on %s: %s', elapsed * 1000, route, statement)
+
+    # --- Request hooks ---
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_statements = 0
+        g.metrics_sql_seconds = 0.0
+
+    def _finish_request(self, response):
+        if 'metrics_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        self.observe(f'{request.method} {route}', response.status_code, elapsed,
+                     g.metrics_sql_statements, g.metrics_sql_seconds)
+        response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.1f}')
+        response.headers.add('Server-Timing', f'db;dur={g.metrics_sql_seconds * 1000:.1f};desc="{g.metrics_sql_statements} queries"')
+        return response
+
+    def observe(self, key, status, seconds, sql_statements, sql_seconds):
+        with self._lock:
+            series = self._series.setdefault(key, _new_series())
+            series["count"] += 1
+            series["sum"] += seconds
+            series["sql_statements"] += sql_statements
+            series["sql_seconds"] += sql_seconds
+            series["statuses"][str(status)] = series["statuses"].get(str(status), 0) + 1
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+            should_flush = self.shared_dir and time.monotonic() - self._last_flush >= self.flush_interval
+        if should_flush:
+            self.flush()
+
+    # --- Multi-worker aggregation ---
+    def flush(self):
+        """Writes this worker's aggregates to the shared directory (atomically)."""
+        if not self.shared_dir:
+            return
+        with self._lock:
+            snapshot = json.dumps(self._series)
+            self._last_flush = time.monotonic()
+        path = worker_file(self.shared_dir, os.getpid())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(snapshot)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Returns the aggregates of every worker (or just this one without a shared directory)."""
+        if not self.shared_dir:
+            with self._lock:
+                return json.loads(json.dumps(self._series))
+        self.flush()
+        merged = {}
+        for name in os.listdir(self.shared_dir):
+            if not (name.startswith('metrics-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name)) as f:
+                    worker_series = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for key, series in worker_series.items():
+                _merge(merged.setdefault(key, _new_series()), series)
+        return merged
+
+    def render_prometheus(self):
+        """Renders the aggregates in the Prometheus text exposition format."""
+        series = self.collect()
+        lines = [
+            '# HELP nanoconnect_requests_total HTTP requests handled, by route, method and status.',
+            '# TYPE nanoconnect_requests_total counter',
+        ]
+        for key in sorted(series):
+            method, route = key.split(' ', 1)
+            for status, count in sorted(series[key]["statuses"].items()):
+                lines.append(f'nanoconnect_requests_total{{route="{_label(route)}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP nanoconnect_request_duration_seconds Request latency.',
+            '# TYPE nanoconnect_request_duration_seconds histogram',
+        ]
+        for key in sorted(series):
+            method, route = key.split(' ', 1)
+            labels = f'route="{_label(route)}",method="{method}"'
+            for bound, count in zip(BUCKETS, series[key]["buckets"]):
+                lines.append(f'nanoconnect_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'nanoconnect_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series[key]["count"]}')
+            lines.append(f'nanoconnect_request_duration_seconds_sum{{{labels}}} {series[key]["sum"]:.6f}')
+            lines.append(f'nanoconnect_request_duration_seconds_count{{{labels}}} {series[key]["count"]}')
+
+        for metric, field, help_text in (
+            ('nanoconnect_sql_statements_total', 'sql_statements', 'SQL statements executed while handling requests.'),
+            ('nanoconnect_sql_duration_seconds_total', 'sql_seconds', 'Time spent executing SQL while handling requests.'),
+        ):
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+            for key in sorted(series):
+                method, route = key.split(' ', 1)
+                lines.append(f'{metric}{{route="{_label(route)}",method="{method}"}} {series[key][field]}')
+        return '\n'.join(lines) + '\n'
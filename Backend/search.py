@@ -0,0 +1,124 @@
+"""
+Full-text search over public campaigns (name, goal, brief and audience notes).
+
+On SQLite an FTS5 table mirrors the campaign columns and is kept in sync by
+triggers, so every write path (the API, bulk imports, raw SQL) updates it. On
+PostgreSQL a GIN index over the weighted tsvector expression needs no syncing
+at all. Results are ranked by relevance and carry a highlighted snippet of the
+brief instead of the full text. The snippet is HTML: the brief text is escaped
+and the matched terms are wrapped in <mark>.
+"""
+import html
+import re
+
+from sqlalchemy import text
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+# The database marks the matches with these private-use characters, which stay put
+# through escaping; they become SNIPPET_START and SNIPPET_STOP once the text is escaped.
+_MATCH_START = '\ue000'
+_MATCH_STOP = '\ue001'
+
+_FTS_COLUMNS = 'name, brief, goal, target_audience_notes'
+_NEW_VALUES = 'new.id, new.name, new.brief, new.goal, new.target_audience_notes'
+_OLD_VALUES = 'old.id, old.name, old.brief, old.goal, old.target_audience_notes'
+
+# Name matches weigh most, then the goal, the brief and the audience notes.
+PG_VECTOR = (
+    "(setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(goal, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(brief, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(target_audience_notes, '')), 'D'))"
+)
+
+# The index definitions, per dialect; run after the campaign table is created
+# and by the migrate-search command on existing databases.
+SEARCH_DDL = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS campaign_fts USING fts5({_FTS_COLUMNS}, "
+        f"content='campaign', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS campaign_fts_insert AFTER INSERT ON campaign BEGIN "
+        f"INSERT INTO campaign_fts (rowid, {_FTS_COLUMNS}) VALUES ({_NEW_VALUES}); END",
+        f"CREATE TRIGGER IF NOT EXISTS campaign_fts_delete AFTER DELETE ON campaign BEGIN "
+        f"INSERT INTO campaign_fts (campaign_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_OLD_VALUES}); END",
+        f"CREATE TRIGGER IF NOT EXISTS campaign_fts_update AFTER UPDATE OF {_FTS_COLUMNS} ON campaign BEGIN "
+        f"INSERT INTO campaign_fts (campaign_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_OLD_VALUES}); "
+        f"INSERT INTO campaign_fts (rowid, {_FTS_COLUMNS}) VALUES ({_NEW_VALUES}); END",
+    ],
+    'postgresql': [f'CREATE INDEX IF NOT EXISTS ix_campaign_search ON campaign USING gin ({PG_VECTOR})'],
+}
+
+# Rebuilds the index from the campaign table (only the FTS5 table can fall out of sync).
+REBUILD_SQL = {'sqlite': "INSERT INTO campaign_fts (campaign_fts) VALUES ('rebuild')"}
+
+
+def fts5_query(query):
+    """
+    Turns free text into a safe FTS5 query: every word must match, and the last
+    one also matches as a prefix so results appear while the user is typing.
+    Returns '' when the text has no searchable words.
+    """
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def snippet_html(snippet):
+    """Escapes a snippet's brief text and turns the match markers into <mark> tags."""
+    escaped = html.escape(snippet or '', quote=False)
+    return escaped.replace(_MATCH_START, SNIPPET_START).replace(_MATCH_STOP, SNIPPET_STOP)
+
+
+def search_public_campaigns(connection, query, limit, offset=0):
+    """
+    Returns up to `limit` public campaigns matching `query`, best first, as dicts
+    with id, name, goal, budget, target_location, snippet (escaped HTML) and
+    rank (higher is more relevant).
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        match = fts5_query(query)
+        if not match:
+            return []
+        # bm25() is lower for better matches; the weights follow the column order.
+        statement = text(
+            "SELECT c.id, c.name, c.goal, c.budget, c.target_location, "
+            f"snippet(campaign_fts, 1, '{_MATCH_START}', '{_MATCH_STOP}', '…', 24) AS snippet, "
+            "-bm25(campaign_fts, 10.0, 2.0, 5.0, 1.0) AS rank "
+            "FROM campaign_fts JOIN campaign c ON c.id = campaign_fts.rowid "
+            "WHERE campaign_fts MATCH :match AND c.is_public "
+            "ORDER BY rank DESC, c.id LIMIT :limit OFFSET :offset"
+        )
+        params = {"match": match, "limit": limit, "offset": offset}
+    elif dialect == 'postgresql':
+        # Rank and page first, then build headlines for that page only.
+        statement = text(
+            "SELECT c.id, c.name, c.goal, c.budget, c.target_location, "
+            f"ts_headline('english', coalesce(c.brief, ''), q.query, "
+            f"'StartSel={_MATCH_START}, StopSel={_MATCH_STOP}, MaxWords=30, MinWords=12, MaxFragments=1') AS snippet, "
+            "ranked.rank "
+            "FROM ("
+            f"  SELECT id, ts_rank({PG_VECTOR}, websearch_to_tsquery('english', :query)) AS rank FROM campaign "
+            f"  WHERE is_public AND {PG_VECTOR} @@ websearch_to_tsquery('english', :query) "
+            "  ORDER BY rank DESC, id LIMIT :limit OFFSET :offset"
+            ") ranked JOIN campaign c ON c.id = ranked.id, websearch_to_tsquery('english', :query) AS q(query) "
+            "ORDER BY ranked.rank DESC, c.id"
+        )
+        params = {"query": query, "limit": limit, "offset": offset}
+    else:
+        # No full-text index on other databases: an unranked substring match.
+        statement = text(
+            "SELECT id, name, goal, budget, target_location, substr(brief, 1, 200) AS snippet, 0 AS rank "
+            "FROM campaign WHERE is_public AND (name LIKE :pattern OR goal LIKE :pattern "
+            "OR brief LIKE :pattern OR target_audience_notes LIKE :pattern) "
+            "ORDER BY id LIMIT :limit OFFSET :offset"
+        )
+        params = {"pattern": f'%{query}%', "limit": limit, "offset": offset}
+    results = []
+    for row in connection.execute(statement, params):
+        result = dict(row._mapping)
+        result['snippet'] = snippet_html(result['snippet'])
+        results.append(result)
+    return results
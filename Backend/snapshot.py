@@ -0,0 +1,328 @@
+"""
+Read-only columnar snapshot of the influencer catalog.
+
+The catalog columns the search endpoint filters and returns are written to a
+single file as fixed-width NumPy arrays, with every text value replaced by a
+code into that column's interned string table. Each worker memory-maps the file, so all
+gunicorn workers on a host share one copy through the page cache instead of
+holding their own. A refresh writes a complete new file and atomically renames
+it over the old one; workers notice the new file and re-map it, while requests
+already running keep reading the old mapping.
+
+Filters are evaluated with vectorized masks: text filters are matched once per
+distinct value of the column (a few dozen niches or locations), then looked up
+per row through the codes.
+"""
+import fcntl
+import itertools
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from geo import haversine_km
+from matching import locations_match, normalize_location
+
+MAGIC = b'NCSNAP2\n'
+_ALIGN = 8
+_CHUNK_SIZE = 10000
+
+# Text columns, stored as int32 codes into a per-column string table (-1 for NULL).
+TEXT_COLUMNS = ('name', 'location', 'location_normalized', 'niche', 'keywords')
+# The row layout write_snapshot() expects from the database.
+ROW_COLUMNS = ('id', 'name', 'followers', 'location', 'location_normalized', 'niche', 'engagement_rate', 'keywords',
+               'latitude', 'longitude')
+
+
+def write_snapshot(path, rows, source_version=None, built_at=None):
+    """
+    Writes rows shaped like ROW_COLUMNS (sorted by id) to `path`, atomically
+    replacing any previous snapshot. `built_at` should be taken before the rows
+    were read. Returns the number of rows written.
+    """
+    ids, followers, engagement, latitudes, longitudes = [], [], [], [], []
+    codes = {column: [] for column in TEXT_COLUMNS}
+    interned = {column: {} for column in TEXT_COLUMNS}
+
+    # Rows are consumed in chunks and transposed, so each column is encoded in one pass.
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, _CHUNK_SIZE)):
+        chunk_ids, names, chunk_followers, locations, normalized, niches, rates, keywords, lats, lons = zip(*chunk)
+        ids.extend(chunk_ids)
+        followers.extend(chunk_followers)
+        engagement.extend(rates)
+        latitudes.extend(lats)
+        longitudes.extend(lons)
+        for column, values in zip(TEXT_COLUMNS, (names, locations, normalized, niches, keywords)):
+            table = interned[column]
+            codes[column].extend([-1 if value is None else table.setdefault(value, len(table)) for value in values])
+
+    followers_null = np.fromiter((value is None for value in followers), dtype=np.bool_, count=len(followers))
+    arrays = {
+        'id': np.asarray(ids, dtype=np.int64),
+        'followers': np.fromiter((value or 0 for value in followers), dtype=np.int64, count=len(followers)),
+        'followers_null': followers_null,
+        'engagement_rate': np.asarray(engagement, dtype=np.float64),  # None becomes NaN
+        'latitude': np.asarray(latitudes, dtype=np.float64),
+        'longitude': np.asarray(longitudes, dtype=np.float64),
+    }
+    for column in TEXT_COLUMNS:
+        encoded = [value.encode('utf-8') for value in interned[column]]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        arrays[column] = np.asarray(codes[column], dtype=np.int32)
+        arrays[f'{column}_offsets'] = offsets
+        arrays[f'{column}_data'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    # Layout: magic, header length, JSON header, then every array 8-byte aligned.
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        "count": len(ids),
+        "built_at": time.time() if built_at is None else built_at,
+        "source_version": source_version,
+        "arrays": layout,
+    }).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(ids)
+
+
+class SnapshotView:
+    """One memory-mapped snapshot file. Arrays are read-only views into the mapping."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an influencer snapshot")
+        header_length, = struct.unpack_from('<Q', self._mmap, len(MAGIC))
+        header_end = len(MAGIC) + 8 + header_length
+        header = json.loads(self._mmap[len(MAGIC) + 8:header_end])
+        data_start = -(-header_end // _ALIGN) * _ALIGN
+        self.count = header["count"]
+        self.built_at = header["built_at"]
+        self.source_version = header["source_version"]
+        self.arrays = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(spec["dtype"]), count=spec["length"],
+                                offset=data_start + spec["offset"])
+            for name, spec in header["arrays"].items()
+        }
+        self._lookups = {}  # (column, filter value) -> boolean table over the column's codes
+
+    def string(self, column, code):
+        """Decodes one value of a text column's string table (None for the NULL code)."""
+        if code < 0:
+            return None
+        offsets = self.arrays[f'{column}_offsets']
+        return self.arrays[f'{column}_data'][offsets[code]:offsets[code + 1]].tobytes().decode('utf-8')
+
+    def _text_mask(self, column, value, predicate):
+        """
+        Per-row mask of a text filter. The predicate runs once per distinct value of
+        the column; the resulting table (plus a trailing False that NULL's -1 code
+        indexes) is then gathered through the row codes.
+        """
+        key = (column, value)
+        table = self._lookups.get(key)
+        if table is None:
+            n_strings = len(self.arrays[f'{column}_offsets']) - 1
+            table = np.zeros(n_strings + 1, dtype=np.bool_)
+            for code in range(n_strings):
+                table[code] = predicate(self.string(column, code))
+            if len(self._lookups) >= 256:
+                self._lookups.clear()
+            self._lookups[key] = table
+        return table[self.arrays[column]]
+
+    def search(self, niche=None, location=None, min_followers=None, max_followers=None, near=None, after=None):
+        """
+        Returns the row positions (ascending id) matching the same filters as the
+        SQL search: niche substring (case-insensitive), location as resolved by
+        locations_match(), an inclusive follower range that excludes NULLs, and
+        `near`, a (latitude, longitude, radius_km) circle. `after` keeps only ids
+        above it, for keyset paging.
+        """
+        mask = np.ones(self.count, dtype=np.bool_)
+        if after is not None:
+            mask[:np.searchsorted(self.arrays['id'], after, side='right')] = False
+        if niche:
+            needle = niche.lower()
+            mask &= self._text_mask('niche', needle, lambda value: needle in value.lower())
+        if location:
+            target = normalize_location(location)
+            mask &= self._text_mask('location_normalized', target, lambda value: locations_match(target, value))
+        if min_followers is not None or max_followers is not None:
+            followers = self.arrays['followers']
+            mask &= ~self.arrays['followers_null']
+            if min_followers is not None:
+                mask &= followers >= min_followers
+            if max_followers is not None:
+                mask &= followers <= max_followers
+        if near is not None:
+            latitude, longitude, radius_km = near
+            # Rows without coordinates have NaN distances, which compare as False.
+            mask &= haversine_km(latitude, longitude, self.arrays['latitude'], self.arrays['longitude']) <= radius_km
+        return np.flatnonzero(mask)
+
+    def value_counts(self, column, positions):
+        """{value: count} of a text column over the rows at `positions`, NULLs left out."""
+        codes = self.arrays[column][positions]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.arrays[f'{column}_offsets']) - 1)
+        return {self.string(column, code): int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def bucket_counts(self, column, positions, edges):
+        """
+        Counts of a numeric column over the rows at `positions` per bucket, where bucket i
+        holds values below edges[i + 1] (the first also holds anything below edges[0], the
+        last everything from edges[-1] up). NULLs are left out.
+        """
+        values = self.arrays[column][positions]
+        if column == 'followers':
+            values = values[~self.arrays['followers_null'][positions]]
+        else:
+            values = values[~np.isnan(values)]
+        buckets = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 1)
+        return [int(count) for count in np.bincount(buckets, minlength=len(edges))]
+
+    def row(self, position):
+        """The catalog fields of the row at `position` as a dict."""
+        arrays = self.arrays
+        engagement_rate = float(arrays['engagement_rate'][position])
+        return {
+            "id": int(arrays['id'][position]),
+            "name": self.string('name', arrays['name'][position]),
+            "followers": None if arrays['followers_null'][position] else int(arrays['followers'][position]),
+            "location": self.string('location', arrays['location'][position]),
+            "niche": self.string('niche', arrays['niche'][position]),
+            "engagement_rate": None if np.isnan(engagement_rate) else engagement_rate,
+            "keywords": self.string('keywords', arrays['keywords'][position]),
+        }
+
+
+class InfluencerSnapshot:
+    """
+    Gives workers the current snapshot file, re-mapping it when a refresh has
+    replaced it, and decides whether it is fresh enough to answer queries.
+    """
+
+    def __init__(self, path=None, max_age=300, retry_interval=1.0):
+        self.path = path
+        self.max_age = max_age
+        # How long a background refresh waits when another process holds the rebuild lock.
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._view = None
+        self._checked_inode = None
+        # Set when this worker changed the catalog; snapshots built before are stale.
+        self._invalidated_at = 0.0
+        self._refreshing = False
+
+    def view(self):
+        """The mapped snapshot, re-mapped if the file was replaced; None if there is none."""
+        if self.path is None:
+            return None
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if inode != self._checked_inode:
+                try:
+                    self._view = SnapshotView(self.path)
+                except (OSError, ValueError):
+                    self._view = None
+                self._checked_inode = inode
+            return self._view
+
+    def fresh_view(self, source_version=None):
+        """
+        The snapshot if it reflects the data: built after this worker's last write,
+        from the current `source_version`, and no older than max_age. Otherwise None.
+        """
+        view = self.view()
+        if view is None or view.built_at < self._invalidated_at:
+            return None
+        if view.source_version != source_version:
+            return None
+        if self.max_age is not None and time.time() - view.built_at > self.max_age:
+            return None
+        return view
+
+    def invalidate(self):
+        with self._lock:
+            self._invalidated_at = time.time()
+
+    def refresh(self, load_rows, source_version=None):
+        """
+        Rebuilds the file from `load_rows()`. Only one process on the host rebuilds at a
+        time (others return False immediately, without loading anything) and readers never
+        see a partial file. `load_rows` should run its query when called: the snapshot is
+        dated just before the call.
+        """
+        lock_path = f'{self.path}.lock'
+        with open(lock_path, 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                started = time.time()
+                write_snapshot(self.path, load_rows(), source_version, built_at=started)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return True
+
+    def refresh_in_background(self, refresh, delay=0):
+        """
+        Runs `refresh()` on a daemon thread unless one is already running in this worker.
+        Waiting `delay` seconds first folds a burst of writes into a single rebuild.
+        When another process is rebuilding (refresh() returns False), its file may predate
+        this worker's writes, so the thread waits for it and tries again.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            wait = delay
+            try:
+                while True:
+                    time.sleep(wait)
+                    started = time.time()
+                    if not refresh():
+                        wait = max(delay, self.retry_interval)
+                        continue
+                    with self._lock:
+                        # A write during the rebuild leaves the new file stale already. Checked
+                        # and cleared under one lock, so a write that finds a refresh running
+                        # is always picked up by it.
+                        if self._invalidated_at < started:
+                            self._refreshing = False
+                            return
+                    wait = delay
+            except BaseException:
+                with self._lock:
+                    self._refreshing = False
+                raise
+
+        threading.Thread(target=run, name='influencer-snapshot-refresh', daemon=True).start()
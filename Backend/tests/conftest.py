@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as nanoconnect  # noqa: E402
+from matching import KeywordIndex  # noqa: E402
+from snapshot import InfluencerSnapshot  # noqa: E402
+
+
+# The schema of the first release, as found in a database that predates every migrate-* command.
+BASELINE_SCHEMA = """
+CREATE TABLE brand_user (id INTEGER PRIMARY KEY, email VARCHAR(120) NOT NULL UNIQUE, password_hash VARCHAR(256));
+CREATE TABLE influencer (
+    id INTEGER PRIMARY KEY, email VARCHAR(120) NOT NULL UNIQUE, password_hash VARCHAR(256), name VARCHAR(80) NOT NULL,
+    followers INTEGER, location VARCHAR(80), keywords VARCHAR(200), niche VARCHAR(80), engagement_rate FLOAT,
+    audience_age_range VARCHAR(50), audience_gender_split VARCHAR(50)
+);
+CREATE TABLE campaign (
+    id INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, budget FLOAT NOT NULL, brief TEXT NOT NULL,
+    brand_id INTEGER NOT NULL REFERENCES brand_user (id), status VARCHAR(50) NOT NULL, goal VARCHAR(100),
+    target_audience_notes TEXT, target_location VARCHAR(100), is_public BOOLEAN NOT NULL
+);
+CREATE TABLE invite (
+    id INTEGER PRIMARY KEY, campaign_id INTEGER NOT NULL REFERENCES campaign (id),
+    influencer_id INTEGER NOT NULL REFERENCES influencer (id), status VARCHAR(50) NOT NULL
+);
+CREATE TABLE submission (
+    id INTEGER PRIMARY KEY, invite_id INTEGER NOT NULL REFERENCES invite (id),
+    content_url VARCHAR(255) NOT NULL, status VARCHAR(50) NOT NULL
+);
+CREATE TABLE application (
+    id INTEGER PRIMARY KEY, campaign_id INTEGER NOT NULL REFERENCES campaign (id),
+    influencer_id INTEGER NOT NULL REFERENCES influencer (id), status VARCHAR(50) NOT NULL
+);
+"""
+
+
+def settings_for(tmp_path, **config):
+    """Test settings: a SQLite database in `tmp_path`, with every shared file kept there too."""
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SECRET_KEY': 'test-secret-key-long-enough-for-hs256',
+        # Logins hash passwords; the production KDF cost only slows the tests down.
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'CACHE_BACKEND': 'none',
+        'CACHE_PATH': str(tmp_path / 'cache.db'),
+        'SNAPSHOT_ENABLED': False,
+        'SNAPSHOT_PATH': str(tmp_path / 'snapshot.bin'),
+        'EVENTS_BACKEND': 'memory',
+        'EVENTS_PATH': str(tmp_path / 'events.db'),
+    }
+    settings.update(config)
+    return settings
+
+
+def make_app(tmp_path, **config):
+    """An app on a fresh SQLite database in `tmp_path`, with every shared file kept there too."""
+    app = nanoconnect.create_app(settings_for(tmp_path, **config))
+    with app.app_context():
+        # Only the primary: `db` is shared by every test app, so once one of them configured
+        # a replica bind, an all-binds create_all would look for it in every later app.
+        nanoconnect.db.create_all(bind_key=None)
+    return app
+
+
+def make_baseline_app(tmp_path, statements=(), **config):
+    """An app on a database in `tmp_path` with the first release's schema, the rows `statements` insert and no migrations."""
+    connection = sqlite3.connect(tmp_path / 'test.db')
+    try:
+        connection.executescript(BASELINE_SCHEMA + ''.join(f'{statement};' for statement in statements))
+    finally:
+        connection.close()
+    return nanoconnect.create_app(settings_for(tmp_path, **config))
+
+
+@pytest.fixture(autouse=True)
+def fresh_services(monkeypatch):
+    # The keyword index and the snapshot are per-process singletons; a test must not see
+    # the influencers of the previous test's database.
+    monkeypatch.setattr(nanoconnect, 'keyword_index', KeywordIndex())
+    monkeypatch.setattr(nanoconnect, 'influencer_snapshot', InfluencerSnapshot())
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    with app.app_context():
+        nanoconnect.db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """Adds rows through the models and returns their ids: seed.influencer(...), seed.campaign(...), ..."""
+    return Seeder(app)
+
+
+class Seeder:
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+
+    def _add(self, row):
+        with self.app.app_context():
+            nanoconnect.db.session.add(row)
+            nanoconnect.db.session.commit()
+            return row.id
+
+    def brand(self, email=None, password='secret'):
+        self.count += 1
+        brand = nanoconnect.BrandUser(email=email or f'brand{self.count}@test.example')
+        with self.app.app_context():
+            brand.set_password(password)
+        return self._add(brand)
+
+    def influencer(self, name=None, password='secret', **fields):
+        self.count += 1
+        fields.setdefault('email', f'influencer{self.count}@test.example')
+        influencer = nanoconnect.Influencer(name=name or f'creator{self.count}', **fields)
+        with self.app.app_context():
+            influencer.set_password(password)
+        return self._add(influencer)
+
+    def campaign(self, brand_id, name='Campaign', brief='coffee tacos launch', budget=500.0, **fields):
+        return self._add(nanoconnect.Campaign(name=name, brief=brief, budget=budget, brand_id=brand_id, **fields))
+
+    def invite(self, campaign_id, influencer_id, status='pending'):
+        return self._add(nanoconnect.Invite(campaign_id=campaign_id, influencer_id=influencer_id, status=status))
+
+    def application(self, campaign_id, influencer_id, status='pending'):
+        return self._add(nanoconnect.Application(campaign_id=campaign_id, influencer_id=influencer_id, status=status))
+
+    def submission(self, invite_id, content_url='https://example.com/post', status='pending_review'):
+        return self._add(nanoconnect.Submission(invite_id=invite_id, content_url=content_url, status=status))
@@ -0,0 +1,80 @@
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import Seeder, make_app, nanoconnect
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+def test_create_app_builds_independent_apps(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    first = make_app(tmp_path / 'a', PAGE_MAX_LIMIT=7)
+    second = make_app(tmp_path / 'b')
+    Seeder(first).influencer(name='Only in the first')
+
+    assert first.config['PAGE_MAX_LIMIT'] == 7
+    assert second.config['PAGE_MAX_LIMIT'] != 7
+    assert [i['name'] for i in first.test_client().get('/api/influencers/search').get_json()] == ['Only in the first']
+    assert second.test_client().get('/api/influencers/search').get_json() == []
+    for app in (first, second):
+        with app.app_context():
+            nanoconnect.db.engine.dispose()
+
+
+@pytest.mark.parametrize('snapshot_enabled', [False, True])
+def test_warm_up_primes_the_keyword_index_and_the_snapshot(tmp_path, snapshot_enabled):
+    app = make_app(tmp_path, SNAPSHOT_ENABLED=snapshot_enabled)
+    influencer = Seeder(app).influencer(location='Austin', keywords='coffee')
+
+    seconds = nanoconnect.warm_up(app, connections=2)
+
+    assert seconds >= 0
+    assert not nanoconnect.keyword_index.is_stale
+    assert nanoconnect.keyword_index._entries.keys() == {influencer}
+    with app.app_context():
+        assert (nanoconnect.influencer_snapshot.fresh_view(nanoconnect.snapshot_source_version()) is not None) is snapshot_enabled
+        nanoconnect.db.engine.dispose()
+
+
+@pytest.fixture
+def environ(monkeypatch):
+    # gunicorn.conf.py sets defaults in os.environ; keep them out of the other tests.
+    monkeypatch.setattr(os, 'environ', os.environ.copy())
+    for name in ('CACHE_BACKEND', 'EVENTS_BACKEND', 'EVENTS_WSGI_STREAMING'):
+        os.environ.pop(name, None)
+    return os.environ
+
+
+@pytest.mark.parametrize('workers, threads, expected', [
+    (4, 1, {'CACHE_BACKEND': 'file', 'EVENTS_BACKEND': 'file', 'EVENTS_WSGI_STREAMING': '0'}),
+    (1, 8, {'CACHE_BACKEND': None, 'EVENTS_BACKEND': None, 'EVENTS_WSGI_STREAMING': None}),
+])
+def test_gunicorn_config_picks_backends_for_the_worker_model(environ, workers, threads, expected):
+    environ.update(WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+
+    config = runpy.run_path(GUNICORN_CONF)
+
+    assert config['preload_app'] is True
+    assert (config['workers'], config['threads']) == (workers, threads)
+    assert {name: environ.get(name) for name in expected} == expected
+
+
+def test_gunicorn_config_keeps_explicit_settings(environ):
+    environ.update(WEB_CONCURRENCY='4', CACHE_BACKEND='memory')
+    runpy.run_path(GUNICORN_CONF)
+    assert environ['CACHE_BACKEND'] == 'memory'
+
+
+def test_gunicorn_child_exit_removes_the_worker_metrics_file(environ, tmp_path):
+    (tmp_path / 'metrics-4242.json').write_text('{"GET /api/campaigns": {}}')
+    (tmp_path / 'metrics-4243.json').write_text('{}')
+    environ['METRICS_DIR'] = str(tmp_path)
+    config = runpy.run_path(GUNICORN_CONF)
+
+    config['child_exit'](None, SimpleNamespace(pid=4242))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metrics-4243.json']
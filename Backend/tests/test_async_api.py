@@ -0,0 +1,201 @@
+import asyncio
+import json
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from conftest import make_app, nanoconnect
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+from async_api import AsyncReadPath, async_url  # noqa: E402
+
+
+@pytest.fixture
+def ids(seed):
+    brand = seed.brand()
+    campaign = seed.campaign(brand, is_public=True, brief='x' * 500)
+    seed.campaign(brand, name='Hidden', is_public=False)
+    seed.campaign(brand, name='Second', is_public=True)
+    invited = seed.influencer(location='Austin', niche='food', followers=5000)
+    applicant = seed.influencer(location='Denver', niche='food', followers=200)
+    seed.influencer(location='Austin', niche='tech', followers=90000)
+    seed.submission(seed.invite(campaign, invited))
+    seed.application(campaign, applicant)
+    return {'campaign': campaign, 'invited': invited, 'applicant': applicant}
+
+
+class Response:
+    def __init__(self, messages):
+        self.status_code = messages[0]['status']
+        self.headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+        self.data = b''.join(message.get('body', b'') for message in messages[1:])
+
+
+async def asgi_get(path, url, headers=()):
+    """Sends one GET request through the ASGI app."""
+    raw_path, _, query = url.partition('?')
+    scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'path': raw_path,
+             'root_path': '', 'query_string': query.encode(), 'server': ('localhost', 80),
+             'headers': [(name.lower().encode(), value.encode()) for name, value in headers]}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await path(scope, receive, send)
+    return Response(messages)
+
+
+def run(app, requests, flask_fallback=True):
+    """
+    The ASGI responses to a list of (url, headers) requests, served on one event loop.
+    Without `flask_fallback`, a request handed to the Flask app fails the test.
+    """
+    async def serve():
+        path = AsyncReadPath(app)
+        if not flask_fallback:
+            async def wsgi(scope, receive, send):
+                raise AssertionError(f"{scope['path']} was not served by an async view")
+            path.wsgi = wsgi
+        try:
+            return [await asgi_get(path, url, headers) for url, headers in requests]
+        finally:
+            for engine in path.engines.values():
+                await engine.dispose()
+
+    return asyncio.run(serve())
+
+
+def test_async_url_picks_the_async_driver():
+    assert str(async_url('sqlite:///data/app.db')) == 'sqlite+aiosqlite:///data/app.db'
+    assert async_url('postgresql://u@db/app').drivername == 'postgresql+asyncpg'
+
+
+def test_async_views_return_the_sync_documents_and_etags(app, client, ids):
+    urls = [
+        f"/api/campaigns/{ids['campaign']}/details",
+        f"/api/influencer/{ids['invited']}/projects",
+        f"/api/influencer/{ids['applicant']}/projects",
+        '/api/influencers/search?niche=food',
+        '/api/influencers/search?location=Austin',
+        '/api/influencers/search?limit=2',
+        '/api/influencers/search?location=Austin&radius_km=500',
+        '/api/campaigns/public',
+        '/api/campaigns/public?limit=1',
+    ]
+    for url, response in zip(urls, run(app, [(url, ()) for url in urls], flask_fallback=False)):
+        expected = client.get(url)
+        assert response.status_code == expected.status_code == 200, url
+        assert json.loads(response.data) == expected.get_json(), url
+        assert response.headers.get('etag') == expected.headers.get('ETag'), url
+
+
+def test_async_views_answer_revalidations_and_errors(app, client, ids):
+    url = f"/api/campaigns/{ids['campaign']}/details"
+    etag = client.get(url).headers['ETag']
+    revalidated, missing, bad_filter = run(app, [
+        (url, [('If-None-Match', etag)]),
+        ('/api/campaigns/999/details', ()),
+        ('/api/influencers/search?min_followers=many', ()),
+    ], flask_fallback=False)
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert missing.status_code == 404
+    assert bad_filter.status_code == 400
+
+
+def test_async_views_reject_tokens_of_other_accounts(app, ids):
+    def bearer(influencer_id):
+        return [('Authorization', f"Bearer {nanoconnect.token_service.issue_access_token('influencer', influencer_id)}")]
+
+    own, other, stream = run(app, [
+        (f"/api/influencer/{ids['invited']}/projects", bearer(ids['invited'])),
+        (f"/api/influencer/{ids['invited']}/projects", bearer(ids['applicant'])),
+        (f"/api/influencer/{ids['invited']}/events", bearer(ids['applicant'])),
+    ], flask_fallback=False)
+    assert own.status_code == 200
+    assert other.status_code == stream.status_code == 403
+
+
+def test_other_requests_go_to_the_flask_app(app, client, ids):
+    url = f"/api/campaigns/{ids['campaign']}/applications"
+    response, = run(app, [(url, ())])
+    assert response.status_code == 200
+    assert json.loads(response.data) == client.get(url).get_json()
+
+
+def test_a_write_during_the_request_never_pairs_an_old_body_with_a_new_etag(tmp_path, app, client, ids):
+    written = []
+
+    def write_after_the_state_query(conn, cursor, statement, parameters, context, executemany):
+        if 'count(*)' in statement and not written:
+            written.append(conn)
+            writer = sqlite3.connect(tmp_path / 'test.db')
+            writer.execute("UPDATE campaign SET name = 'Renamed', version = version + 1")
+            writer.commit()
+            writer.close()
+
+    url = f"/api/campaigns/{ids['campaign']}/details"
+
+    async def serve():
+        path = AsyncReadPath(app)
+        engine = path.engines['primary'].sync_engine
+        event.listen(engine, 'after_cursor_execute', write_after_the_state_query)
+        try:
+            return await asgi_get(path, url)
+        finally:
+            await path.engines['primary'].dispose()
+
+    response = asyncio.run(serve())
+    # The body may be newer than its ETag, and then the next revalidation misses.
+    assert json.loads(response.data)['name'] == 'Renamed'
+    again = client.get(url, headers={'If-None-Match': response.headers['etag']})
+    assert again.status_code == 200
+    assert again.get_json()['name'] == 'Renamed'
+
+
+def test_async_views_run_the_teardown_handlers_with_the_error(app, ids):
+    errors = []
+    app.teardown_request(lambda error: errors.append(('request', error)))
+    app.teardown_appcontext(lambda error: errors.append(('app', error)))
+    failure = RuntimeError('broken view')
+
+    async def serve():
+        path = AsyncReadPath(app)
+
+        async def broken(**view_args):
+            raise failure
+        path.views['api.get_public_campaigns'] = broken
+        try:
+            return [await asgi_get(path, '/api/campaigns/public?limit=1'),
+                    await asgi_get(path, f"/api/campaigns/{ids['campaign']}/details")]
+        finally:
+            await path.engines['primary'].dispose()
+
+    failed, served = asyncio.run(serve())
+    assert failed.status_code == 500
+    assert served.status_code == 200
+    assert errors == [('request', failure), ('app', failure), ('request', None), ('app', None)]
+
+
+def test_the_shared_cache_file_is_used_off_the_event_loop(tmp_path, monkeypatch, seed):
+    app = make_app(tmp_path, CACHE_BACKEND='file')
+    seed.campaign(seed.brand(), is_public=True)
+    cache = nanoconnect.response_cache
+    threads = []
+    for name in ('lookup', 'store'):
+        method = getattr(cache, name)
+        monkeypatch.setattr(cache, name, lambda *args, method=method: threads.append(threading.current_thread()) or method(*args))
+
+    first, second = run(app, [('/api/campaigns/public', ()), ('/api/campaigns/public', ())], flask_fallback=False)
+
+    assert json.loads(first.data) == json.loads(second.data)
+    assert second.headers['x-cache'] == 'HIT'
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,99 @@
+import pytest
+
+from conftest import make_app, nanoconnect
+
+
+def expired_access_token(role='brand', user_id=1):
+    return nanoconnect.token_service._encode(role, user_id, 'access', -60)
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_login_issues_tokens_that_authenticate_later_requests(client, seed):
+    seed.brand(email='brand@test.example')
+
+    response = client.post('/api/login', json={'email': 'brand@test.example', 'password': 'secret'})
+    assert response.status_code == 200
+    tokens = response.get_json()
+    assert tokens['token_type'] == 'Bearer'
+
+    assert client.get('/api/campaigns', headers=bearer(tokens['access_token'])).status_code == 200
+    refreshed = client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert refreshed.status_code == 200
+    assert refreshed.get_json()['access_token']
+
+
+def test_refresh_token_is_not_accepted_as_access_token(client, seed):
+    brand = seed.brand()
+    refresh = nanoconnect.token_service.issue_tokens('brand', brand)['refresh_token']
+
+    response = client.get('/api/campaigns', headers=bearer(refresh))
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize('token', ['not-a-jwt', None])
+def test_bad_access_token_is_rejected_on_other_endpoints(client, token):
+    response = client.get('/api/campaigns', headers=bearer(token or expired_access_token()))
+    assert response.status_code == 401
+    assert response.get_json()['error'] in ('Invalid token.', 'Token has expired.')
+
+
+@pytest.mark.parametrize('token', ['not-a-jwt', None])
+def test_token_issuing_endpoints_ignore_a_stale_access_token(client, seed, token):
+    headers = bearer(token or expired_access_token())
+    seed.brand(email='brand@test.example')
+    influencer = seed.influencer(email='creator@test.example')
+
+    assert client.post('/api/login', json={'email': 'brand@test.example', 'password': 'secret'},
+                       headers=headers).status_code == 200
+    assert client.post('/api/influencer/login', json={'email': 'creator@test.example', 'password': 'secret'},
+                       headers=headers).status_code == 200
+    refresh = nanoconnect.token_service.issue_tokens('influencer', influencer)['refresh_token']
+    assert client.post('/api/token/refresh', json={'refresh_token': refresh}, headers=headers).status_code == 200
+    assert client.post('/api/register', json={'email': 'new@test.example', 'password': 'pw'},
+                       headers=headers).status_code == 201
+    assert client.post('/api/influencer/register', json={'email': 'new@test.example', 'password': 'pw', 'name': 'New'},
+                       headers=headers).status_code == 201
+
+
+def test_account_views_reject_tokens_of_other_accounts(client, seed):
+    brand = seed.brand()
+    owner, other = seed.influencer(), seed.influencer()
+    own_token = nanoconnect.token_service.issue_access_token('influencer', owner)
+    for url in (f'/api/influencer/profile?id={owner}', f'/api/influencer/{owner}/invitations',
+                f'/api/influencer/{owner}/projects', f'/api/influencer/{owner}/dashboard'):
+        assert client.get(url, headers=bearer(own_token)).status_code == 200, url
+        for token in (nanoconnect.token_service.issue_access_token('influencer', other),
+                      nanoconnect.token_service.issue_access_token('brand', owner)):
+            assert client.get(url, headers=bearer(token)).status_code == 403, url
+
+    response = client.put(f'/api/influencer/profile?id={owner}', json={'name': 'Hijacked'},
+                          headers=bearer(nanoconnect.token_service.issue_access_token('influencer', other)))
+    assert response.status_code == 403
+    assert client.get(f'/api/influencer/profile?id={owner}').get_json()['name'] != 'Hijacked'
+    assert client.get(f'/api/brand/{brand}/events',
+                      headers=bearer(nanoconnect.token_service.issue_access_token('brand', brand + 1))).status_code == 403
+
+
+def test_anonymous_account_requests_need_a_token_when_auth_is_required(tmp_path, seed):
+    influencer = seed.influencer()
+    client = make_app(tmp_path, AUTH_REQUIRED=True).test_client()
+
+    assert client.get(f'/api/influencer/{influencer}/projects').status_code == 401
+    token = nanoconnect.token_service.issue_access_token('influencer', influencer)
+    assert client.get(f'/api/influencer/{influencer}/projects', headers=bearer(token)).status_code == 200
+
+
+def test_campaigns_are_created_for_the_brand_of_the_token(app, client, seed):
+    seed.brand()
+    brand = seed.brand()
+    token = nanoconnect.token_service.issue_access_token('brand', brand)
+
+    response = client.post('/api/campaigns', json={'name': 'Launch', 'brief': 'Coffee.', 'budget': 100},
+                           headers=bearer(token))
+
+    assert response.status_code == 201
+    with app.app_context():
+        assert nanoconnect.db.session.get(nanoconnect.Campaign, response.get_json()['id']).brand_id == brand
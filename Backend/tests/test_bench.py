@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+
+from bench.run import compare
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_benchmark_runs_every_scenario_without_server_errors(tmp_path):
+    out = tmp_path / 'results.json'
+    run = subprocess.run([sys.executable, '-m', 'bench.run', '--scales', '100', '--iterations', '1',
+                          '--data-dir', str(tmp_path), '--out', str(out)],
+                         cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+    assert run.returncode == 0, run.stderr
+    assert 'no benchmark scenario' not in run.stderr
+    results = json.loads(out.read_text())['scales']['100']
+    assert {'campaign_match', 'search_influencers', 'public_campaigns', 'influencer_events'} <= set(results)
+    for name, result in results.items():
+        assert all(not status.startswith('5') for status in result['status_codes']), (name, result)
+
+
+def test_compare_flags_slowdowns_and_extra_statements():
+    before = {'p50_ms': 10.0, 'p99_ms': 20.0, 'peak_memory_kb': 100.0, 'sql_statements': 3.0}
+    baseline = {'scales': {'1000': {'match': before}}}
+    assert compare(baseline, baseline, 0.25) == []
+    slower = {'scales': {'1000': {'match': {**before, 'p99_ms': 40.0, 'sql_statements': 5.0}}}}
+    assert compare(baseline, slower, 0.25) == ['1000 match: p99_ms 20.0 -> 40.0', '1000 match: sql_statements 3.0 -> 5.0']
+    # New endpoints have nothing to compare against.
+    assert compare(baseline, {'scales': {'1000': {'new': before}}}, 0.25) == []
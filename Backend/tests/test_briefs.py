@@ -0,0 +1,19 @@
+import pytest
+
+LONG_BRIEF = 'coffee ' * 100
+
+
+@pytest.mark.parametrize('url', ['/api/campaigns', '/api/campaigns/public'])
+def test_lists_return_a_brief_preview_and_the_full_brief_is_served_separately(client, seed, url):
+    brand = seed.brand()
+    long_id = seed.campaign(brand, name='Long', brief=LONG_BRIEF, is_public=True)
+    seed.campaign(brand, name='Short', brief='tacos', is_public=True)
+
+    campaigns = {c['name']: c for c in client.get(url).get_json()}
+    assert campaigns['Long']['brief'] == LONG_BRIEF[:280]
+    assert campaigns['Long']['brief_truncated']
+    assert campaigns['Short']['brief'] == 'tacos'
+    assert not campaigns['Short']['brief_truncated']
+
+    assert client.get(f'/api/campaigns/{long_id}/brief').get_json() == {'id': long_id, 'brief': LONG_BRIEF}
+    assert client.get('/api/campaigns/9999/brief').status_code == 404
@@ -0,0 +1,48 @@
+from conftest import nanoconnect
+
+
+def campaign_names(app):
+    with app.app_context():
+        return sorted(c.name for c in nanoconnect.Campaign.query.all())
+
+
+def test_import_campaigns_reports_unknown_brand_ids(app, seed, tmp_path):
+    brand = seed.brand(email='brand@test.example')
+    csv_path = tmp_path / 'campaigns.csv'
+    csv_path.write_text(
+        'name,budget,brief,brand_id,brand_email\n'
+        f'By id,100,coffee launch,{brand},\n'
+        'Unknown id,100,coffee launch,9999,\n'
+        'By email,100,coffee launch,,brand@test.example\n'
+        'Unknown email,100,coffee launch,,nobody@test.example\n'
+    )
+
+    result = app.test_cli_runner().invoke(args=['import-campaigns', str(csv_path)])
+
+    assert result.exit_code == 0, result.output
+    assert 'line 3: unknown brand_id 9999' in result.output
+    assert 'line 5:' in result.output
+    assert 'Imported 2 campaigns' in result.output
+    assert campaign_names(app) == ['By email', 'By id']
+
+
+def test_import_influencers_skips_duplicates_and_invalid_rows(app, seed, tmp_path):
+    seed.influencer(email='taken@test.example')
+    jsonl_path = tmp_path / 'influencers.jsonl'
+    jsonl_path.write_text(
+        '{"email": "new@test.example", "name": "New", "location": "Austin, TX", "password": "pw"}\n'
+        '{"email": "new@test.example", "name": "Again"}\n'
+        '{"email": "taken@test.example", "name": "Taken"}\n'
+        '{"email": "no-at-sign", "name": "Broken"}\n'
+        'not json\n'
+    )
+
+    result = app.test_cli_runner().invoke(args=['import-influencers', str(jsonl_path), '--workers', '1'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Imported 1 influencers' in result.output
+    assert 'skipped 2 duplicates and 2 invalid rows' in result.output
+    with app.app_context():
+        imported = nanoconnect.Influencer.query.filter_by(email='new@test.example').one()
+        assert imported.check_password('pw')
+        assert imported.location_normalized
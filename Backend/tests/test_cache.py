@@ -0,0 +1,62 @@
+import os
+import runpy
+
+import pytest
+
+import app as nanoconnect
+from cache import SharedFileBackend
+from conftest import make_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('backend', ['memory', 'file'])
+def test_cached_list_is_served_until_a_write_bumps_its_version(tmp_path, seed, backend):
+    app = make_app(tmp_path, CACHE_BACKEND=backend)
+    client = app.test_client()
+    brand = seed.brand()
+    seed.campaign(brand, name='First', is_public=True)
+
+    first = client.get('/api/campaigns/public')
+    assert first.headers['X-Cache'] == 'MISS'
+    again = client.get('/api/campaigns/public')
+    assert again.headers['X-Cache'] == 'HIT'
+    assert again.get_json() == first.get_json()
+
+    client.post('/api/campaigns', json={'name': 'Second', 'brief': 'b', 'budget': 10, 'isPublic': True})
+    after_write = client.get('/api/campaigns/public')
+    assert after_write.headers['X-Cache'] == 'MISS'
+    assert [c['name'] for c in after_write.get_json()] == ['First', 'Second']
+
+
+def test_file_backend_versions_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    one, other = SharedFileBackend(path), SharedFileBackend(path)
+    one.bump(['campaigns'])
+    one.set('key', b'value', ttl=60)
+    assert other.get_versions(['campaigns', 'influencers']) == [1, 0]
+    assert other.get('key') == b'value'
+
+
+def test_cli_commands_bump_the_shared_file_even_with_the_memory_backend(tmp_path, seed):
+    app = make_app(tmp_path, CACHE_BACKEND='memory')
+    brand = seed.brand()
+    csv_path = tmp_path / 'campaigns.csv'
+    csv_path.write_text(f'name,budget,brief,brand_id\nImported,100,coffee launch,{brand}\n')
+
+    result = app.test_cli_runner().invoke(args=['import-campaigns', str(csv_path)])
+    assert result.exit_code == 0, result.output
+    assert SharedFileBackend(app.config['CACHE_PATH']).get_versions(['campaigns']) == [1]
+
+
+@pytest.mark.parametrize('workers, expected', [('3', 'file'), ('1', None)])
+def test_gunicorn_defaults_to_the_shared_cache_with_several_workers(monkeypatch, workers, expected):
+    monkeypatch.setenv('WEB_CONCURRENCY', workers)
+    monkeypatch.delenv('CACHE_BACKEND', raising=False)
+    runpy.run_path(os.path.join(BACKEND_DIR, 'gunicorn.conf.py'))
+    assert os.environ.get('CACHE_BACKEND') == expected
+
+
+def test_create_app_binds_the_configured_backend(tmp_path):
+    make_app(tmp_path, CACHE_BACKEND='none')
+    assert not nanoconnect.response_cache.enabled
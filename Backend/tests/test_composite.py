@@ -0,0 +1,63 @@
+import pytest
+
+
+@pytest.fixture
+def ids(seed):
+    brand = seed.brand()
+    campaign = seed.campaign(brand, is_public=True)
+    invited, applicant = seed.influencer(), seed.influencer()
+    seed.submission(seed.invite(campaign, invited))
+    application = seed.application(campaign, applicant)
+    return {'campaign': campaign, 'invited': invited, 'applicant': applicant, 'application': application}
+
+
+def get_json(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.data
+    return response.get_json()
+
+
+def test_campaign_page_combines_details_and_applications(client, ids):
+    campaign = ids['campaign']
+    page = get_json(client, f'/api/campaigns/{campaign}/page')
+
+    assert page['campaign']['id'] == campaign
+    assert page['invites'] == get_json(client, f'/api/campaigns/{campaign}/details')['invites']
+    assert page['applications'] == get_json(client, f'/api/campaigns/{campaign}/applications')
+    assert page['applications'] and page['invites']
+
+    assert get_json(client, f'/api/campaigns/{campaign}/page?fields=applications') == {'applications': page['applications']}
+
+
+def test_influencer_dashboard_combines_profile_and_projects(client, ids):
+    for influencer in (ids['invited'], ids['applicant']):
+        dashboard = get_json(client, f'/api/influencer/{influencer}/dashboard')
+        assert dashboard == {
+            'profile': get_json(client, f'/api/influencer/profile?id={influencer}'),
+            'projects': get_json(client, f'/api/influencer/{influencer}/projects'),
+        }
+        assert dashboard['projects']
+        assert get_json(client, f'/api/influencer/{influencer}/dashboard?fields=projects') == {'projects': dashboard['projects']}
+
+
+def test_composite_endpoints_reject_unknown_fields_and_missing_rows(client, ids):
+    response = client.get(f"/api/campaigns/{ids['campaign']}/page?fields=campaign,budget")
+    assert response.status_code == 400
+    assert 'Unknown fields: budget' in response.get_json()['error']
+    assert client.get(f"/api/influencer/{ids['invited']}/dashboard?fields=posts").status_code == 400
+    assert client.get('/api/campaigns/999/page').status_code == 404
+    assert client.get('/api/influencer/999/dashboard').status_code == 404
+
+
+def test_campaign_page_etag_covers_every_part(client, ids):
+    url = f"/api/campaigns/{ids['campaign']}/page"
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # Approving the application updates it and invites the applicant.
+    assert client.put(f"/api/applications/{ids['application']}", json={'status': 'approved'}).status_code == 200
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    page = response.get_json()
+    assert page['applications'][0]['status'] == 'approved'
+    assert ids['applicant'] in [invite['influencer']['id'] for invite in page['invites']]
@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import nanoconnect
+
+
+@pytest.fixture
+def invited(seed):
+    brand = seed.brand()
+    campaign = seed.campaign(brand)
+    influencer = seed.influencer(location='Austin', keywords='coffee')
+    invite = seed.invite(campaign, influencer)
+    return {'campaign': campaign, 'influencer': influencer, 'invite': invite}
+
+
+def revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+    again = client.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert again.data == b''
+    return etag
+
+
+def test_unchanged_rows_are_answered_with_304(client, invited):
+    for url in (f"/api/campaigns/{invited['campaign']}/details",
+                f"/api/influencer/{invited['influencer']}/projects",
+                f"/api/influencer/{invited['influencer']}/invitations",
+                f"/api/influencer/profile?id={invited['influencer']}"):
+        revalidate(client, url)
+
+
+def test_writes_change_the_etag(client, seed, invited):
+    details = f"/api/campaigns/{invited['campaign']}/details"
+    projects = f"/api/influencer/{invited['influencer']}/projects"
+    etags = {url: revalidate(client, url) for url in (details, projects)}
+
+    client.put(f"/api/invites/{invited['invite']}", json={'status': 'accepted'})
+    for url, etag in etags.items():
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        etags[url] = response.headers['ETag']
+
+    # Rows of another campaign leave the tag alone.
+    seed.invite(seed.campaign(seed.brand()), seed.influencer())
+    assert client.get(details, headers={'If-None-Match': etags[details]}).status_code == 304
+
+    # So does an update that changes nothing.
+    client.put(f"/api/influencer/profile?id={invited['influencer']}", json={'location': 'Austin'})
+    assert client.get(details, headers={'If-None-Match': etags[details]}).status_code == 304
+
+
+def test_etag_depends_on_the_query_string(client, invited):
+    url = f"/api/influencer/profile?id={invited['influencer']}"
+    other = client.get(f"/api/influencer/profile?id={invited['influencer']}&fields=name")
+    assert other.headers['ETag'] != client.get(url).headers['ETag']
+
+
+def test_migrate_versions_adds_the_version_columns(app, seed):
+    seed.influencer()
+    with app.app_context(), nanoconnect.db.engine.begin() as connection:
+        connection.exec_driver_sql('ALTER TABLE influencer DROP COLUMN version')
+
+    result = app.test_cli_runner().invoke(args=['migrate-versions'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Added column influencer.version.' in result.output
+    with app.app_context():
+        assert nanoconnect.db.session.get(nanoconnect.Influencer, 1).version == 1
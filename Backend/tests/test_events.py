@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import runpy
+import threading
+
+import pytest
+
+from conftest import make_app, nanoconnect
+from events import EventFeed, MemoryBroker, SharedFileBroker
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse(body):
+    """The (id, event, data) of every event in a text/event-stream body."""
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@pytest.fixture(params=['memory', 'file'])
+def broker(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBroker()
+    return SharedFileBroker(str(tmp_path / 'events.db'), poll_interval=0.01)
+
+
+def test_broker_reads_a_channel_after_an_id(broker):
+    broker.publish([('a', 'x', '1'), ('b', 'x', '2'), ('a', 'x', '3')])
+    assert [event.data for event in broker.read('a', 0, 10)] == ['1', '3']
+    assert [event.data for event in broker.read('a', 1, 10)] == ['3']
+    assert broker.read('a', 3, 10) == []
+    # An id this broker never handed out.
+    assert broker.read('a', 99, 10) is None
+    assert broker.wait('a', 1, timeout=0.05)
+    assert not broker.wait('a', 3, timeout=0.05)
+
+
+def test_memory_broker_reports_dropped_events_and_stays_bounded():
+    broker = MemoryBroker(max_entries=3)
+    broker.publish([(f'channel:{n}', 'x', str(n)) for n in range(20)])
+    assert len(broker._pruned) <= 3
+    # channel:0 lost its event and has been forgotten since; its clients reset.
+    assert broker.read('channel:0', 0, 10) is None
+    # A client that was caught up reads on.
+    assert [event.data for event in broker.read('channel:19', 19, 10)] == ['19']
+
+
+def test_feed_resets_a_client_whose_events_were_dropped():
+    feed = EventFeed(MemoryBroker(max_entries=1))
+    feed.publish([('a', 'x', {}), ('a', 'x', {})])
+    cursor, chunk = feed.poll('a', 0)
+    assert cursor == 2
+    assert parse(chunk) == [(2, 'reset', {})]
+
+
+def invite_events(client, channel, **headers):
+    response = client.get(f'/api/{channel}/events?timeout=0', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response.get_data(as_text=True)
+
+
+def test_writes_reach_the_influencer_and_brand_streams(client, seed):
+    brand = seed.brand()
+    campaign = seed.campaign(brand)
+    influencer = seed.influencer()
+
+    ready = parse(invite_events(client, f'influencer/{influencer}'))
+    assert [kind for _, kind, _ in ready] == ['ready']
+    last_id = ready[0][0]
+
+    invite = client.post('/api/invites', json={'campaignId': campaign, 'influencerId': influencer}).get_json()
+    for channel in (f'influencer/{influencer}', f'brand/{brand}'):
+        events = parse(invite_events(client, channel, **{'Last-Event-ID': str(last_id)}))
+        assert [(kind, data['invite_id']) for _, kind, data in events] == [('invite.created', invite['invite_id'])]
+
+
+def test_event_stream_rejects_bad_parameters(client):
+    assert client.get('/api/influencer/1/events?last_event_id=abc').status_code == 400
+    assert client.get('/api/influencer/1/events?timeout=3600').status_code == 400
+
+
+def test_wsgi_event_requests_return_at_once_when_streaming_is_off(tmp_path):
+    app = make_app(tmp_path, EVENTS_WSGI_STREAMING=False, EVENTS_POLL_RETRY_MS=7000, EVENTS_STREAM_TIMEOUT=25)
+    nanoconnect.event_feed.publish([('influencer:1', 'invite.created', {'invite_id': 5})])
+
+    # No ?timeout=: a held stream would take EVENTS_STREAM_TIMEOUT seconds.
+    body = app.test_client().get('/api/influencer/1/events', headers={'Last-Event-ID': '0'}).get_data(as_text=True)
+    assert body.startswith('retry: 7000\n')
+    assert [kind for _, kind, _ in parse(body)] == ['invite.created']
+
+
+def gunicorn_settings(monkeypatch, **env):
+    for name in ('CACHE_BACKEND', 'EVENTS_BACKEND', 'EVENTS_WSGI_STREAMING'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    runpy.run_path(os.path.join(BACKEND_DIR, 'gunicorn.conf.py'))
+    return os.environ.get('EVENTS_BACKEND'), os.environ.get('EVENTS_WSGI_STREAMING')
+
+
+def test_gunicorn_shares_events_between_workers_and_keeps_sync_workers_free(monkeypatch):
+    assert gunicorn_settings(monkeypatch, WEB_CONCURRENCY='3', GUNICORN_THREADS='1') == ('file', '0')
+    assert gunicorn_settings(monkeypatch, WEB_CONCURRENCY='1', GUNICORN_THREADS='4') == (None, None)
+
+
+def test_async_stream_polls_the_broker_off_the_event_loop(tmp_path, monkeypatch):
+    pytest.importorskip('aiosqlite')
+    pytest.importorskip('asgiref')
+    from async_api import AsyncReadPath
+
+    app = make_app(tmp_path, EVENTS_POLL_INTERVAL=0.01)
+    path = AsyncReadPath(app)
+    feed = nanoconnect.event_feed
+    threads = []
+    poll = feed.poll
+
+    def recording_poll(channel, cursor):
+        threads.append(threading.current_thread())
+        return poll(channel, cursor)
+
+    monkeypatch.setattr(feed, 'poll', recording_poll)
+    feed.publish([('influencer:1', 'invite.created', {'invite_id': 5})])
+
+    async def get():
+        messages = []
+        scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'path': '/api/influencer/1/events',
+                 'query_string': b'timeout=0.1', 'headers': [(b'last-event-id', b'0')], 'server': ('localhost', 80)}
+
+        async def receive():
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            messages.append(message)
+
+        await path(scope, receive, send)
+        return messages
+
+    messages = asyncio.run(get())
+    assert messages[0]['status'] == 200
+    body = b''.join(message.get('body', b'') for message in messages[1:]).decode()
+    assert [kind for _, kind, _ in parse(body)] == ['invite.created']
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import Seeder, make_app, nanoconnect
+
+
+@pytest.fixture(params=[False, True], ids=['sql', 'snapshot'])
+def app(tmp_path, request):
+    app = make_app(tmp_path, SNAPSHOT_ENABLED=request.param, FACET_MAX_VALUES=2)
+    seed = Seeder(app)
+    seed.influencer(niche='food', location='  AUSTIN ', followers=500, engagement_rate=0.5)
+    seed.influencer(niche='food', location='austin', followers=1000, engagement_rate=4.0)
+    seed.influencer(niche='travel', location='Denver', followers=60000, engagement_rate=12.0)
+    seed.influencer(niche='tech', location='Boston', followers=20000, engagement_rate=None)
+    seed.influencer(niche=None, location='Austin', followers=200000, engagement_rate=2.5)
+    if request.param:
+        assert nanoconnect.refresh_influencer_snapshot(app)
+        with app.app_context():
+            assert nanoconnect.get_influencer_snapshot() is not None
+    yield app
+    with app.app_context():
+        nanoconnect.db.engine.dispose()
+
+
+def counts(entries):
+    return {entry['value']: entry['count'] for entry in entries}
+
+
+def test_facets_count_every_matching_influencer(client):
+    facets = client.get('/api/influencers/facets').get_json()
+
+    assert facets['total'] == 5
+    # Largest counts first, ties by value, cut to FACET_MAX_VALUES.
+    assert facets['niche'] == [{'value': 'food', 'count': 2}, {'value': 'tech', 'count': 1}]
+    assert facets['location'] == [{'value': 'austin', 'count': 3}, {'value': 'boston', 'count': 1}]
+    # Every bucket in order, empty ones included.
+    assert facets['followers'] == [
+        {'value': '0-1000', 'count': 1}, {'value': '1000-5000', 'count': 1}, {'value': '5000-10000', 'count': 0},
+        {'value': '10000-50000', 'count': 1}, {'value': '50000-100000', 'count': 1}, {'value': '100000+', 'count': 1},
+    ]
+    # A NULL rate is in none of the buckets.
+    assert counts(facets['engagement_rate']) == {'0-1': 1, '1-2': 0, '2-3': 1, '3-5': 1, '5-10': 0, '10+': 1}
+
+
+def test_facets_apply_the_search_filters(client):
+    facets = client.get('/api/influencers/facets?location=Austin&min_followers=1000').get_json()
+
+    assert facets['total'] == 2
+    assert counts(facets['niche']) == {'food': 1}
+    assert counts(facets['location']) == {'austin': 2}
+    assert counts(facets['followers'])['100000+'] == 1
+
+
+def test_facets_reject_bad_filters(client):
+    assert client.get('/api/influencers/facets?min_followers=many').status_code == 400
@@ -0,0 +1,141 @@
+import math
+import sqlite3
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
+
+from conftest import Seeder, make_app, make_baseline_app, nanoconnect
+from geo import bounding_boxes, geocode, haversine_km
+
+AUSTIN = (30.2672, -97.7431)
+
+
+@pytest.mark.parametrize('location, expected', [
+    ('Austin', AUSTIN),
+    ('austin,  tx', AUSTIN),
+    ('Austin, Texas, USA', AUSTIN),
+    ('Toronto, Canada', (43.6532, -79.3832)),
+    ('Toronto, Ontario, CA', (43.6532, -79.3832)),
+    ('Mumbai, India', (19.0760, 72.8777)),
+    ('Indianapolis, Indiana', (39.7684, -86.1581)),
+    ('Indianapolis, IN', (39.7684, -86.1581)),
+    # Country names must not match the state codes they share.
+    ('San Diego, Canada', None),
+    ('Indianapolis, India', None),
+    ('Austin, Canada', None),
+    ('Atlantis', None),
+])
+def test_geocode(location, expected):
+    assert geocode(location) == expected
+
+
+def test_haversine_km():
+    assert haversine_km(*AUSTIN, *geocode('Round Rock')) == pytest.approx(27.5, abs=1)
+    assert haversine_km(*AUSTIN, *AUSTIN) == 0
+
+
+def test_bounding_boxes_split_at_the_antimeridian():
+    assert len(bounding_boxes(0.0, 179.9, 50)) == 2
+    assert len(bounding_boxes(0.0, 0.0, 50)) == 1
+
+
+def test_missing_database_url_does_not_break_the_config():
+    app = Flask(__name__)
+    nanoconnect.load_config(app, {'SQLALCHEMY_DATABASE_URI': None})
+    assert app.config['GEO_RTREE'] is False
+
+
+@pytest.fixture(params=[True, False], ids=['rtree', 'grid'])
+def geo_app(tmp_path, request):
+    return make_app(tmp_path, GEO_RTREE=request.param)
+
+
+def test_radius_search_finds_nearby_cities(geo_app):
+    seed = Seeder(geo_app)
+    seed.influencer(name='austin', location='Austin, TX')
+    seed.influencer(name='round rock', location='Round Rock')
+    seed.influencer(name='dallas', location='Dallas')
+    client = geo_app.test_client()
+
+    names = lambda url: sorted(i['name'] for i in client.get(url).get_json())
+    assert names('/api/influencers/search?location=Austin&radius_km=40') == ['austin', 'round rock']
+    assert names('/api/influencers/search?location=Austin&radius_km=400') == ['austin', 'dallas', 'round rock']
+    assert names('/api/influencers/search?location=Austin') == ['austin']
+
+
+@pytest.mark.parametrize('query, error', [
+    ('radius_km=40', 'radius_km requires a location.'),
+    ('location=Atlantis&radius_km=40', 'Unknown location: Atlantis'),
+    ('location=Austin&radius_km=far', 'radius_km must be a number.'),
+    ('location=Austin&radius_km=0', 'radius_km must be greater than 0'),
+])
+def test_radius_search_rejects_bad_parameters(client, query, error):
+    response = client.get(f'/api/influencers/search?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(error)
+
+
+def test_radius_match_includes_influencers_of_nearby_cities(geo_app):
+    seed = Seeder(geo_app)
+    campaign = seed.campaign(seed.brand(), target_location='Austin', brief='coffee launch')
+    near = seed.influencer(location='Round Rock', keywords='coffee')
+    seed.influencer(location='Dallas', keywords='coffee')
+    client = geo_app.test_client()
+
+    assert client.get(f'/api/campaigns/{campaign}/match').get_json() == []
+    matches = client.get(f'/api/campaigns/{campaign}/match?radius_km=40').get_json()
+    assert [m['influencer']['id'] for m in matches] == [near]
+
+
+def test_math_functions_are_registered_on_the_app_engines_only(geo_app):
+    with geo_app.app_context():
+        assert event.contains(nanoconnect.db.engine, 'connect', nanoconnect.register_sqlite_math_functions)
+    assert not event.contains(Engine, 'connect', nanoconnect.register_sqlite_math_functions)
+    assert not event.contains(create_engine('sqlite://'), 'connect', nanoconnect.register_sqlite_math_functions)
+
+
+def test_math_functions_are_added_when_sqlite_lacks_them():
+    class Connection:
+        functions = {}
+
+        def cursor(self):
+            return Cursor()
+
+        def create_function(self, name, arity, function, deterministic):
+            self.functions[name] = function
+
+    class Cursor:
+        def execute(self, statement):
+            raise sqlite3.OperationalError('no such function: sin')
+
+        def close(self):
+            pass
+
+    connection = Connection()
+    nanoconnect.register_sqlite_math_functions(connection, None)
+    assert connection.functions == {'sin': math.sin, 'cos': math.cos}
+
+
+def test_migrate_geo_on_an_existing_database(tmp_path):
+    app = make_baseline_app(tmp_path, statements=[
+        "INSERT INTO influencer (email, name, location) VALUES ('a@test.example', 'A', 'Austin, TX')",
+        "INSERT INTO brand_user (email) VALUES ('b@test.example')",
+        "INSERT INTO campaign (name, budget, brief, brand_id, status, target_location, is_public) "
+        "VALUES ('Launch', 1, 'coffee', 1, 'planning', 'Round Rock', 1)",
+    ])
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['migrate-indexes'])
+    assert 'Skipping index ix_influencer_geo_cell: influencer has no column geo_cell (run migrate-geo first).' in result.output
+    result = runner.invoke(args=['migrate-geo'])
+    assert result.exit_code == 1
+    assert 'run migrate-locations first' in result.output
+
+    assert runner.invoke(args=['migrate-locations']).exit_code == 0
+    result = runner.invoke(args=['migrate-geo'])
+    assert result.exit_code == 0, result.output
+    assert 'Geocoded 1 of 1 influencers.' in result.output
+    with app.app_context():
+        assert 'ix_influencer_geo_cell' in {index['name'] for index in inspect(nanoconnect.db.engine).get_indexes('influencer')}
+    assert 'geo_cell' not in runner.invoke(args=['migrate-indexes']).output
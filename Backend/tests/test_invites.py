@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from conftest import make_app, nanoconnect
+
+
+def invite_pairs(app):
+    with app.app_context():
+        return sorted((i.campaign_id, i.influencer_id) for i in nanoconnect.Invite.query)
+
+
+def test_bulk_invite_creates_skips_and_reports_unknown_influencers(app, client, seed):
+    campaign = seed.campaign(seed.brand())
+    first, second, third = seed.influencer(), seed.influencer(), seed.influencer()
+    seed.invite(campaign, first)
+
+    response = client.post('/api/invites/bulk', json={'campaignId': campaign,
+                                                      'influencerIds': [first, second, third, second, 999]})
+
+    assert response.status_code == 201
+    assert response.get_json() == {'created': [second, third], 'skipped': [first], 'not_found': [999]}
+    assert invite_pairs(app) == [(campaign, first), (campaign, second), (campaign, third)]
+
+    again = client.post('/api/invites/bulk', json={'campaignId': campaign, 'influencerIds': [second]})
+    assert again.status_code == 200
+    assert again.get_json()['skipped'] == [second]
+
+
+@pytest.mark.parametrize('body, status', [
+    ({'campaignId': 1, 'influencerIds': 'x'}, 400),
+    ({'campaignId': 1, 'influencerIds': ['1']}, 400),
+    ({'campaignId': 1, 'influencerIds': [1, 2, 3]}, 400),
+    ({'campaignId': 999, 'influencerIds': [1]}, 404),
+])
+def test_bulk_invite_rejects_bad_requests(tmp_path, body, status):
+    client = make_app(tmp_path, BULK_INVITE_MAX=2).test_client()
+    assert client.post('/api/invites/bulk', json=body).status_code == status
+
+
+def test_single_invites_and_applications_are_not_duplicated(app, client, seed):
+    campaign = seed.campaign(seed.brand(), is_public=True)
+    influencer = seed.influencer()
+    body = {'campaignId': campaign, 'influencerId': influencer}
+
+    assert client.post('/api/invites', json=body).status_code == 201
+    assert client.post('/api/invites', json=body).status_code == 200
+    assert client.post('/api/applications', json=body).status_code == 201
+    assert client.post('/api/applications', json=body).status_code == 409
+    assert invite_pairs(app) == [(campaign, influencer)]
+    with app.app_context():
+        assert nanoconnect.Application.query.count() == 1
+
+
+@pytest.mark.parametrize('model', ['Invite', 'Application'])
+def test_unique_index_rejects_a_duplicate_pair(app, seed, model):
+    campaign = seed.campaign(seed.brand())
+    influencer = seed.influencer()
+    row = getattr(nanoconnect, model)
+    with app.app_context():
+        session = nanoconnect.db.session
+        session.add(row(campaign_id=campaign, influencer_id=influencer, status='pending'))
+        session.commit()
+        session.add(row(campaign_id=campaign, influencer_id=influencer, status='pending'))
+        with pytest.raises(IntegrityError):
+            session.commit()
+        session.rollback()
@@ -0,0 +1,74 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from conftest import make_app
+from json_provider import json_provider_class
+
+pytest.importorskip('orjson')
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: float
+
+
+DOCUMENT = {
+    'text': 'café ☃ <b>',
+    'numbers': [0, -3, 2.5, 1e-7, 12345678901234],
+    'empty': None,
+    'flags': [True, False],
+    'when': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2024, 5, 1),
+    'amount': decimal.Decimal('19.99'),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'point': Point(1, 2.0),
+    'by_id': {2: 'b', 1: 'a'},
+}
+
+
+def providers():
+    app = Flask(__name__)
+    return DefaultJSONProvider(app), json_provider.ORJSONProvider(app)
+
+
+def test_orjson_provider_produces_the_default_documents():
+    std, fast = providers()
+    encoded = fast.dumps(DOCUMENT)
+    assert json.loads(encoded) == json.loads(std.dumps(DOCUMENT))
+    # Keys come out sorted, like the default provider's.
+    assert list(json.loads(encoded)) == sorted(DOCUMENT)
+    assert fast.loads(encoded) == std.loads(encoded)
+    # Options only the json module understands fall back to it.
+    assert fast.dumps(DOCUMENT, indent=2) == std.dumps(DOCUMENT, indent=2)
+
+
+def test_api_responses_do_not_depend_on_the_encoder(tmp_path, seed):
+    brand = seed.brand()
+    seed.campaign(brand, name='Café', budget=1234.5, is_public=True)
+    seed.influencer(location='Austin', followers=10, engagement_rate=3.25)
+    std = make_app(tmp_path, JSON_ENCODER='std').test_client()
+    fast = make_app(tmp_path, JSON_ENCODER='orjson').test_client()
+    assert type(fast.application.json) is json_provider.ORJSONProvider
+
+    for url in ('/api/campaigns', '/api/campaigns/public', '/api/influencers/search'):
+        expected, response = std.get(url), fast.get(url)
+        assert response.mimetype == expected.mimetype == 'application/json'
+        assert response.get_json() == expected.get_json()
+
+
+def test_json_provider_class(monkeypatch):
+    assert json_provider_class('std') is DefaultJSONProvider
+    assert json_provider_class('auto') is json_provider.ORJSONProvider
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert json_provider_class('auto') is DefaultJSONProvider
+    with pytest.raises(RuntimeError, match='orjson is not installed'):
+        json_provider_class('orjson')
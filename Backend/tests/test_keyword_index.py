@@ -0,0 +1,120 @@
+import math
+
+import pytest
+
+from matching import (
+    DEFAULT_WEIGHTS, ENGAGEMENT_CAP, FOLLOWERS_CAP, KeywordIndex, location_prefixes, locations_match,
+    normalize_location, parse_keywords, tokenize_brief,
+)
+
+
+def build(*rows):
+    index = KeywordIndex()
+    index.build([(influencer_id, location, keywords, 0, 0.0, None, None) for influencer_id, location, keywords in rows])
+    return index
+
+
+def ids(ranked):
+    return sorted(influencer_id for influencer_id, _, _ in ranked)
+
+
+def test_text_normalization():
+    assert normalize_location('  Austin,  TX ') == 'austin, tx'
+    assert location_prefixes('austin, tx') == ['austin']
+    assert locations_match('austin', 'austin, tx') and locations_match('austin, tx', 'austin')
+    assert not locations_match('austin', 'denver')
+    assert tokenize_brief('Coffee, coffee. TACOS!') == {'coffee', 'tacos'}
+
+
+def test_index_finds_influencers_by_location_and_keyword():
+    index = build((1, 'Austin, TX', 'coffee, Tacos'), (2, 'austin', 'coffee'), (3, 'Denver', 'coffee'),
+                  (4, 'Austin', None), (5, None, 'coffee'))
+    assert ids(index.top_matches('Austin', {'coffee'})) == [1, 2]
+    assert ids(index.top_matches('Austin, TX', {'tacos'})) == [1]
+    assert index.top_matches('Austin', {'surfing'}) == []
+    assert index.location_of(4) is None and index.location_of(5) is None
+
+
+def test_upsert_and_remove_keep_the_index_current():
+    index = build((1, 'Austin', 'coffee'))
+    index.upsert(1, 'Denver', 'coffee')
+    index.upsert(2, 'Austin', 'coffee')
+    assert ids(index.top_matches('Austin', {'coffee'})) == [2]
+    assert ids(index.top_matches('Denver', {'coffee'})) == [1]
+    index.remove(2)
+    assert index.top_matches('Austin', {'coffee'}) == []
+    assert index.partitions_for('Austin') == []
+
+
+def test_index_is_stale_until_built_and_after_max_age():
+    index = KeywordIndex(max_age=-1)
+    assert index.is_stale
+    index.build([])
+    assert index.is_stale
+    index.max_age = None
+    assert not index.is_stale
+
+
+def reference_scores(rows, target, tokens, weights=DEFAULT_WEIGHTS):
+    """Brute-force version of the scoring described in top_matches_batch()."""
+    local = [row for row in rows if locations_match(normalize_location(target), normalize_location(row[1]))]
+    frequency = {token: sum(token in parse_keywords(row[2]) for row in local) for token in tokens}
+    idf = {token: math.log((1 + len(local)) / (1 + count)) + 1 for token, count in frequency.items() if count}
+    scores = {}
+    for influencer_id, _, keywords, followers, engagement in local:
+        matched = [token for token in idf if token in parse_keywords(keywords)]
+        if matched:
+            keyword_score = sum(idf[token] for token in matched) / sum(idf.values())
+            reach = min(math.log1p(followers) / math.log1p(FOLLOWERS_CAP), 1.0)
+            scores[influencer_id] = (weights['keywords'] * keyword_score + weights['followers'] * reach
+                                     + weights['engagement'] * min(engagement / ENGAGEMENT_CAP, 1.0))
+    return scores
+
+
+SCORED_ROWS = [
+    (1, 'Austin', 'coffee,tacos', 5000, 3.0),
+    (2, 'Austin, TX', 'coffee', 800, 6.0),
+    (3, 'Austin', 'tacos,music', 120000, 1.5),
+    (4, 'Austin', 'music', 50, 12.0),
+    (5, 'Denver', 'coffee,tacos', 9000, 4.0),
+]
+
+
+def scored_index():
+    index = KeywordIndex()
+    index.build([(*row, None, None) for row in SCORED_ROWS])
+    return index
+
+
+def test_top_matches_scores_like_the_reference():
+    tokens = {'coffee', 'tacos', 'launch'}
+    expected = reference_scores(SCORED_ROWS, 'Austin', tokens)
+    ranked = scored_index().top_matches('Austin', tokens, limit=None)
+    assert [influencer_id for influencer_id, _, _ in ranked] == sorted(expected, key=lambda i: -expected[i])
+    for influencer_id, score, matched in ranked:
+        assert score == pytest.approx(expected[influencer_id])
+    assert {influencer_id: matched for influencer_id, _, matched in ranked} == {1: 2, 2: 1, 3: 1}
+
+
+def test_top_matches_applies_limit_min_score_and_weights():
+    index = scored_index()
+    tokens = {'coffee', 'tacos'}
+    everything = index.top_matches('Austin', tokens, limit=None)
+    assert index.top_matches('Austin', tokens, limit=2) == everything[:2]
+    cutoff = everything[1][1]
+    assert index.top_matches('Austin', tokens, min_score=cutoff) == everything[:2]
+    keywords_only = {'keywords': 1.0, 'followers': 0.0, 'engagement': 0.0}
+    assert index.top_matches('Austin', {'coffee'}, weights=keywords_only)[0][1] == pytest.approx(1.0)
+
+
+def test_batch_and_single_influencer_scores_agree_with_top_matches():
+    index = scored_index()
+    briefs = [{'coffee'}, {'tacos', 'music'}, {'surfing'}]
+    batch = index.top_matches_batch('Austin', briefs, limit=None)
+    assert batch == [index.top_matches('Austin', tokens, limit=None) for tokens in briefs]
+    for ranked, tokens in zip(batch, briefs):
+        for influencer_id, score, matched in ranked:
+            [(single_score, single_matched)] = index.score_influencer(influencer_id, 'Austin', [tokens])
+            assert single_score == pytest.approx(score)
+            assert single_matched == matched
+    assert index.score_influencer(5, 'Austin', [{'coffee'}]) == [None]
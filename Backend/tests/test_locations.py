@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import text
+
+from conftest import nanoconnect
+
+
+@pytest.fixture
+def creators(seed):
+    return {
+        'austin': seed.influencer(name='austin', location='  Austin,   TX '),
+        'plain': seed.influencer(name='plain', location='austin'),
+        'percent': seed.influencer(name='percent', location='100% Austin'),
+        'denver': seed.influencer(name='denver', location='Denver'),
+    }
+
+
+def names(client, location):
+    return sorted(i['name'] for i in client.get('/api/influencers/search', query_string={'location': location}).get_json())
+
+
+def test_location_search_matches_in_both_directions(client, creators):
+    assert names(client, 'Austin') == ['austin', 'percent', 'plain']
+    assert names(client, 'AUSTIN, tx') == ['austin', 'plain']
+    assert names(client, 'Denver') == ['denver']
+    # LIKE wildcards in the filter are matched literally.
+    assert names(client, '100%') == ['percent']
+    assert names(client, '%') == ['percent']
+
+
+def test_writes_keep_the_normalized_location_and_lookup_table_in_sync(app, creators):
+    with app.app_context():
+        influencer = nanoconnect.db.session.get(nanoconnect.Influencer, creators['denver'])
+        influencer.location = 'Boulder,  CO'
+        nanoconnect.db.session.commit()
+        assert influencer.location_normalized == 'boulder, co'
+        assert {'austin, tx', 'austin', 'boulder, co'} <= {loc.name for loc in nanoconnect.Location.query}
+
+
+def test_migrate_locations_backfills_an_existing_database(app, creators):
+    with app.app_context(), nanoconnect.db.engine.begin() as connection:
+        connection.execute(text('UPDATE influencer SET location_normalized = NULL'))
+        connection.execute(text('DELETE FROM location'))
+
+    result = app.test_cli_runner().invoke(args=['migrate-locations'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Normalized the location of 4 influencers.' in result.output
+    with app.app_context():
+        assert nanoconnect.db.session.get(nanoconnect.Influencer, creators['austin']).location_normalized == 'austin, tx'
+        assert nanoconnect.Location.query.count() == 4
@@ -0,0 +1,115 @@
+import pytest
+
+from conftest import make_app, nanoconnect
+from matching import tokenize_brief
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path, MATCH_TABLE_SIZE=5)
+    yield app
+    with app.app_context():
+        nanoconnect.db.engine.dispose()
+
+
+def run_worker(app):
+    result = app.test_cli_runner().invoke(args=['match-worker', '--once'])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def matched_ids(client, campaign, **params):
+    response = client.get(f'/api/campaigns/{campaign}/match', query_string=params)
+    assert response.status_code == 200
+    return [match['influencer']['id'] for match in response.get_json()]
+
+
+def stored_ids(app, campaign):
+    with app.app_context():
+        return sorted(m.influencer_id for m in nanoconnect.CampaignMatch.query.filter_by(campaign_id=campaign))
+
+
+def test_worker_builds_and_maintains_the_match_table(app, seed, client):
+    seed.brand()
+    coffee = seed.influencer(location='Austin', keywords='coffee,tacos', followers=5000)
+    tacos = seed.influencer(location='Austin', keywords='tacos', followers=100)
+    surfer = seed.influencer(location='Austin', keywords='surfing')
+    seed.influencer(location='Denver', keywords='coffee')
+
+    campaign = client.post('/api/campaigns', json={'name': 'Launch', 'brief': 'Coffee and tacos', 'budget': 100,
+                                                   'targetLocation': 'Austin'}).get_json()['id']
+    live = matched_ids(client, campaign)
+    assert stored_ids(app, campaign) == []
+
+    assert 'Applied 1 match jobs.' in run_worker(app)
+    assert stored_ids(app, campaign) == sorted([coffee, tacos])
+    assert matched_ids(client, campaign) == live
+
+    # A profile change is applied incrementally: one influencer drops out, another joins.
+    client.put(f'/api/influencer/profile?id={tacos}', json={'keywords': 'surfing'})
+    client.put(f'/api/influencer/profile?id={surfer}', json={'keywords': 'coffee'})
+    run_worker(app)
+    assert stored_ids(app, campaign) == sorted([coffee, surfer])
+    assert matched_ids(client, campaign) == matched_ids(client, campaign, limit=50)
+
+    # Nothing left in the queue.
+    assert 'Applied' not in run_worker(app)
+
+
+def test_table_keeps_only_the_best_matches(app, seed, client):
+    brand = seed.brand()
+    influencers = [seed.influencer(location='Austin', keywords='coffee', followers=10 ** n) for n in range(8)]
+    campaign = seed.campaign(brand, target_location='Austin', brief='coffee')
+    assert 'Queued 1 campaigns' in app.test_cli_runner().invoke(args=['rebuild-matches']).output
+    run_worker(app)
+
+    assert stored_ids(app, campaign) == sorted(influencers[-5:])
+    assert matched_ids(client, campaign, limit=3) == influencers[:-4:-1]
+    # More than the table holds is scored live.
+    assert matched_ids(client, campaign, limit=8) == influencers[::-1]
+
+
+def stored_scores(app, campaign):
+    with app.app_context():
+        return {m.influencer_id: m.score for m in nanoconnect.CampaignMatch.query.filter_by(campaign_id=campaign)}
+
+
+def test_keyword_changes_rescore_everyone_in_the_location(app, seed, client):
+    brand = seed.brand()
+    changing = seed.influencer(location='Austin', keywords='coffee')
+    seed.influencer(location='Austin', keywords='coffee,tacos')
+    unchanged = seed.influencer(location='Austin, TX', keywords='tacos', followers=300)
+    elsewhere = seed.campaign(brand, target_location='Denver', brief='coffee tacos')
+    campaign = seed.campaign(brand, target_location='Austin', brief='coffee tacos')
+    app.test_cli_runner().invoke(args=['rebuild-matches'])
+    run_worker(app)
+    before = stored_scores(app, campaign)[unchanged]
+
+    # "tacos" becomes more common in Austin, so it weighs less for every influencer there.
+    client.put(f'/api/influencer/profile?id={changing}', json={'keywords': 'coffee,tacos'})
+    with app.app_context():
+        queued = {(job.kind, job.target_id) for job in nanoconnect.MatchJob.query}
+    assert queued == {('influencer', changing), ('campaign', campaign)}
+    run_worker(app)
+
+    with app.app_context():
+        index = nanoconnect.get_keyword_index()
+        (live, _), = index.score_influencer(unchanged, 'austin', [tokenize_brief('coffee tacos')])
+    assert stored_scores(app, campaign)[unchanged] == pytest.approx(live)
+    assert live != pytest.approx(before)
+    assert stored_ids(app, elsewhere) == []
+
+
+def test_follower_changes_are_rescored_incrementally(app, seed, client):
+    brand = seed.brand()
+    influencer = seed.influencer(location='Austin', keywords='coffee', engagement_rate=1.0)
+    campaign = seed.campaign(brand, target_location='Austin', brief='coffee')
+    app.test_cli_runner().invoke(args=['rebuild-matches'])
+    run_worker(app)
+    before = stored_scores(app, campaign)[influencer]
+
+    client.put(f'/api/influencer/profile?id={influencer}', json={'engagement_rate': 9.0})
+    with app.app_context():
+        assert [(job.kind, job.target_id) for job in nanoconnect.MatchJob.query] == [('influencer', influencer)]
+    run_worker(app)
+    assert stored_scores(app, campaign)[influencer] > before
@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.fixture
+def campaigns(seed):
+    brand = seed.brand()
+    seed.influencer(location='Austin, TX', keywords='coffee,tacos', followers=5000, engagement_rate=3.0)
+    seed.influencer(location='Austin', keywords='coffee', followers=800, engagement_rate=6.0)
+    seed.influencer(location='Denver', keywords='coffee,tacos', followers=9000, engagement_rate=4.0)
+    return [seed.campaign(brand, target_location='Austin', brief='Coffee and tacos launch'),
+            seed.campaign(brand, target_location='Denver', brief='Tacos tour'),
+            seed.campaign(brand, target_location=None)]
+
+
+def test_batch_matches_every_campaign_like_the_single_endpoint(client, campaigns):
+    response = client.post('/api/campaigns/match/batch?limit=10', json={'campaignIds': campaigns + [999]})
+    assert response.status_code == 200
+    body = response.get_json()
+    for campaign_id in campaigns[:2]:
+        single = client.get(f'/api/campaigns/{campaign_id}/match?limit=10').get_json()
+        assert body['matches'][str(campaign_id)] == single
+    assert body['errors'] == {str(campaigns[2]): "This campaign has no target location specified.",
+                              '999': "Campaign not found"}
+
+
+@pytest.mark.parametrize('campaign_ids', [[1, [2]], [{'id': 1}], ['abc'], [], 'x'])
+def test_batch_rejects_malformed_campaign_ids(client, campaigns, campaign_ids):
+    response = client.post('/api/campaigns/match/batch', json={'campaignIds': campaign_ids})
+    assert response.status_code == 400
+    assert 'campaignIds' in response.get_json()['error']
@@ -0,0 +1,46 @@
+from conftest import make_app, nanoconnect
+from test_query_counts import statements
+
+
+def metrics_app(tmp_path):
+    return make_app(tmp_path, METRICS_ENABLED=True, METRICS_DIR=None)
+
+
+def test_sql_statements_are_counted_once_per_app(tmp_path, seed):
+    seed.brand()
+    # Each create_app installs its own listeners; they must not add up.
+    first = metrics_app(tmp_path)
+    second = metrics_app(tmp_path)
+    client = second.test_client()
+    client.get('/api/campaigns')
+
+    with statements(second) as executed:
+        response = client.get('/api/campaigns')
+
+    assert response.status_code == 200
+    assert f'desc="{len(executed)} queries"' in response.headers.getlist('Server-Timing')[1]
+    assert first.extensions['nanoconnect_metrics'].collect() == {}
+    series = second.extensions['nanoconnect_metrics'].collect()['GET /api/campaigns']
+    assert series['count'] == 2
+    assert series['statuses'] == {'200': 2}
+
+
+def test_metrics_endpoint_renders_prometheus_text(tmp_path):
+    client = metrics_app(tmp_path).test_client()
+    client.get('/api/campaigns')
+
+    body = client.get('/api/_metrics').get_data(as_text=True)
+    assert 'nanoconnect_requests_total{route="/api/campaigns",method="GET",status="200"} 1' in body
+    assert 'nanoconnect_sql_statements_total{route="/api/campaigns",method="GET"}' in body
+
+
+def test_requests_rejected_by_the_token_check_are_counted(tmp_path):
+    client = metrics_app(tmp_path).test_client()
+
+    response = client.get('/api/campaigns', headers={'Authorization': 'Bearer not-a-token'})
+
+    assert response.status_code == 401
+    assert response.headers.getlist('Server-Timing')
+    series = client.application.extensions['nanoconnect_metrics'].collect()['GET /api/campaigns']
+    assert series['statuses'] == {'401': 1}
+
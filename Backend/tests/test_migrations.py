@@ -0,0 +1,95 @@
+from sqlalchemy import inspect, text
+
+from conftest import make_baseline_app, nanoconnect
+
+
+def index_names(app, table):
+    with app.app_context():
+        return {index['name'] for index in inspect(nanoconnect.db.engine).get_indexes(table)}
+
+
+def execute(app, *statements):
+    with app.app_context(), nanoconnect.db.engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+
+def test_migrate_indexes_adds_the_missing_indexes(app):
+    execute(app, 'DROP INDEX ix_invite_influencer_id', 'DROP INDEX uq_application_campaign_influencer')
+
+    result = app.test_cli_runner().invoke(args=['migrate-indexes'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Created index ix_invite_influencer_id on invite.' in result.output
+    assert {'ix_invite_influencer_id', 'uq_invite_campaign_influencer'} <= index_names(app, 'invite')
+    assert 'uq_application_campaign_influencer' in index_names(app, 'application')
+    # Nothing left to do on a second run.
+    assert 'Created' not in app.test_cli_runner().invoke(args=['migrate-indexes']).output
+
+
+def test_migrate_indexes_reports_duplicates_blocking_a_unique_index(app, seed):
+    brand = seed.brand()
+    campaign = seed.campaign(brand)
+    influencer = seed.influencer()
+    execute(app, 'DROP INDEX uq_invite_campaign_influencer',
+            f"INSERT INTO invite (campaign_id, influencer_id, status) VALUES ({campaign}, {influencer}, 'pending')",
+            f"INSERT INTO invite (campaign_id, influencer_id, status) VALUES ({campaign}, {influencer}, 'pending')")
+
+    result = app.test_cli_runner().invoke(args=['migrate-indexes'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Could not create unique index uq_invite_campaign_influencer: invite has duplicate rows.' in result.output
+    assert 'uq_invite_campaign_influencer' not in index_names(app, 'invite')
+
+
+def test_migrate_indexes_skips_columns_a_later_migration_adds(tmp_path):
+    app = make_baseline_app(tmp_path, statements=[
+        "INSERT INTO influencer (email, name, location) VALUES ('a@test.example', 'A', ' Austin ')",
+    ])
+
+    result = app.test_cli_runner().invoke(args=['migrate-indexes'])
+
+    assert result.exit_code == 0, result.output
+    assert ('Skipping index ix_influencer_location_normalized: influencer has no column location_normalized '
+            '(run migrate-locations first).') in result.output
+    assert 'Skipping location: table does not exist (run migrate-locations).' in result.output
+    assert 'Skipping match_job: table does not exist (run migrate-matches).' in result.output
+    assert 'ix_influencer_niche' in index_names(app, 'influencer')
+    assert 'Index migration finished.' in result.output
+
+    assert app.test_cli_runner().invoke(args=['migrate-locations']).exit_code == 0
+    assert 'ix_influencer_location_normalized' in index_names(app, 'influencer')
+    assert 'location_normalized' not in app.test_cli_runner().invoke(args=['migrate-indexes']).output
+
+
+UPGRADE = ['migrate-locations', 'migrate-geo', 'migrate-versions', 'migrate-search', 'migrate-matches', 'migrate-indexes']
+
+
+def test_upgrading_a_first_release_database(tmp_path):
+    app = make_baseline_app(tmp_path, statements=[
+        "INSERT INTO brand_user (email) VALUES ('brand@test.example')",
+        "INSERT INTO influencer (email, name, location, keywords, followers) VALUES ('a@test.example', 'A', 'Austin', 'coffee', 10)",
+        "INSERT INTO campaign (name, budget, brief, brand_id, status, target_location, is_public) "
+        "VALUES ('Old', 1, 'coffee launch', 1, 'planning', 'Austin', 1)",
+    ])
+    runner = app.test_cli_runner()
+    output = {}
+    for command in UPGRADE:
+        result = runner.invoke(args=[command])
+        assert result.exit_code == 0, (command, result.output)
+        output[command] = result.output
+    assert 'Created table match_job.' in output['migrate-matches']
+    assert 'Queued 1 campaigns for the match worker.' in output['migrate-matches']
+    assert 'Skipping' not in output['migrate-indexes']
+
+    client = app.test_client()
+    created = client.post('/api/campaigns', json={'name': 'New', 'brief': 'coffee', 'budget': 5, 'targetLocation': 'Austin'})
+    assert created.status_code == 201
+    assert client.put('/api/influencer/profile?id=1', json={'keywords': 'coffee,tacos'}).status_code == 200
+    assert runner.invoke(args=['match-worker', '--once']).exit_code == 0
+    with app.app_context():
+        assert nanoconnect.db.session.query(nanoconnect.CampaignMatchStatus).count() == 2
+    for campaign in (1, created.get_json()['id']):
+        assert [m['influencer']['id'] for m in client.get(f'/api/campaigns/{campaign}/match').get_json()] == [1]
+    assert [c['name'] for c in client.get('/api/campaigns/public/search?q=launch').get_json()['items']] == ['Old']
+    assert [i['id'] for i in client.get('/api/influencers/search?location=Austin&radius_km=10').get_json()] == [1]
@@ -0,0 +1,66 @@
+import pytest
+
+from conftest import Seeder, make_app
+
+URLS = ['/api/campaigns', '/api/campaigns/public', '/api/influencers/search']
+
+
+@pytest.fixture
+def rows(seed):
+    brand = seed.brand()
+    for n in range(7):
+        seed.campaign(brand, name=f'Campaign {n}', is_public=True)
+        seed.influencer(name=f'creator {n}')
+
+
+def walk(client, url, limit):
+    """Every id of a paged list, following next_cursor, and the number of pages."""
+    ids, after, pages = [], None, 0
+    while True:
+        page = client.get(url, query_string={'limit': limit, **({'after': after} if after else {})}).get_json()
+        pages += 1
+        ids += [item['id'] for item in page['items']]
+        after = page['next_cursor']
+        if after is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_pages_cover_the_plain_list_in_id_order(client, rows, url):
+    everything = sorted(item['id'] for item in client.get(url).get_json())
+    assert walk(client, url, 3) == (everything, 3)
+    assert walk(client, url, 7) == (everything, 1)
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_streamed_list_equals_the_plain_list(client, rows, url):
+    plain = client.get(url).get_json()
+    streamed = client.get(url, query_string={'stream': 1})
+    assert streamed.is_streamed
+    assert sorted(streamed.get_json(), key=lambda item: item['id']) == sorted(plain, key=lambda item: item['id'])
+
+
+def test_streamed_list_spans_several_chunks(tmp_path):
+    app = make_app(tmp_path, STREAM_CHUNK_SIZE=2)
+    seed = Seeder(app)
+    brand = seed.brand()
+    for n in range(5):
+        seed.campaign(brand, name=f'Campaign {n}')
+    assert [c['name'] for c in app.test_client().get('/api/campaigns?stream=1').get_json()] == [f'Campaign {n}' for n in range(5)]
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=x', 'after=x'])
+def test_bad_page_parameters_are_rejected(client, query):
+    response = client.get(f'/api/campaigns?{query}')
+    assert response.status_code == 400
+
+
+def test_limit_is_capped(tmp_path):
+    app = make_app(tmp_path, PAGE_MAX_LIMIT=2)
+    seed = Seeder(app)
+    brand = seed.brand()
+    for _ in range(3):
+        seed.campaign(brand)
+    page = app.test_client().get('/api/campaigns?limit=100').get_json()
+    assert len(page['items']) == 2
+    assert page['next_cursor'] == page['items'][-1]['id']
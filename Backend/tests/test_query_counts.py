@@ -0,0 +1,77 @@
+"""
+The read endpoints run a fixed number of SQL statements however many rows they return
+(eager loading instead of one lazy load per row).
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+
+
+@contextmanager
+def statements(app):
+    with app.app_context():
+        engine = db.engine
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+def statement_count(app, client, url):
+    client.get(url)  # builds lazy per-process state such as the keyword index
+    with statements(app) as executed:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(executed)
+
+
+@pytest.fixture
+def world(seed):
+    brand = seed.brand()
+    campaign = seed.campaign(brand, target_location='Austin', brief='coffee tacos launch')
+    influencer = seed.influencer(location='Austin', keywords='coffee,tacos')
+
+    def grow(n):
+        """Adds n invited influencers (every other one with a submission) and n applicants."""
+        for _ in range(n):
+            invited = seed.influencer(location='Austin', keywords='coffee')
+            invite = seed.invite(campaign, invited, status='accepted')
+            if invite % 2:
+                seed.submission(invite)
+            seed.application(campaign, seed.influencer(location='Austin', keywords='tacos'))
+            other = seed.campaign(brand, target_location='Austin')
+            seed.submission(seed.invite(other, influencer, status='accepted'))
+            seed.application(other, influencer)
+
+    return campaign, influencer, grow
+
+
+URLS = [
+    '/api/campaigns/{campaign}/details',
+    '/api/campaigns/{campaign}/page',
+    '/api/campaigns/{campaign}/applications',
+    '/api/campaigns/{campaign}/match',
+    '/api/influencer/{influencer}/projects',
+    '/api/influencer/{influencer}/invitations',
+    '/api/influencer/{influencer}/dashboard',
+]
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_statement_count_does_not_grow_with_rows(app, client, world, url):
+    campaign, influencer, grow = world
+    url = url.format(campaign=campaign, influencer=influencer)
+    grow(2)
+    few = statement_count(app, client, url)
+    grow(20)
+    assert statement_count(app, client, url) == few
+    assert few <= 6
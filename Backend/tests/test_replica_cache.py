@@ -0,0 +1,78 @@
+"""
+The response cache with a read replica. The "replica" is a second SQLite file that
+only catches up when a test copies the primary over it, i.e. it lags indefinitely.
+"""
+import sqlite3
+
+import pytest
+
+from conftest import Seeder, make_app, nanoconnect
+
+
+@pytest.fixture(params=['memory', 'file'])
+def replica_app(tmp_path, request):
+    app = make_app(tmp_path, DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}",
+                   CACHE_BACKEND=request.param, REPLICA_LAG_WINDOW=60)
+    catch_up(tmp_path)
+    yield app
+    with app.app_context():
+        for engine in nanoconnect.db.engines.values():
+            engine.dispose()
+
+
+def catch_up(tmp_path):
+    """Brings the replica up to date with the primary."""
+    primary = sqlite3.connect(tmp_path / 'test.db')
+    replica = sqlite3.connect(tmp_path / 'replica.db')
+    try:
+        primary.backup(replica)
+    finally:
+        primary.close()
+        replica.close()
+
+
+def public_names(response):
+    return [campaign['name'] for campaign in response.get_json()]
+
+
+def test_primary_reads_never_get_responses_built_from_the_replica(replica_app):
+    seed = Seeder(replica_app)
+    seed.campaign(seed.brand(), name='Launch', is_public=True)
+    client = replica_app.test_client()
+
+    from_replica = client.get('/api/campaigns/public')
+    assert public_names(from_replica) == []
+    assert client.get('/api/campaigns/public').headers['X-Cache'] == 'HIT'
+
+    from_primary = client.get('/api/campaigns/public', headers={'X-Read-Your-Writes': '1'})
+    assert from_primary.headers['X-Cache'] == 'MISS'
+    assert public_names(from_primary) == ['Launch']
+
+
+def test_replica_reads_are_not_stored_within_the_lag_window(replica_app, tmp_path):
+    seed = Seeder(replica_app)
+    brand = seed.brand()
+    catch_up(tmp_path)
+    client = replica_app.test_client()
+
+    # A write the replica has not received yet.
+    seed.campaign(brand, name='Launch', is_public=True)
+    nanoconnect.response_cache.bump('campaigns')
+    for _ in range(2):
+        response = client.get('/api/campaigns/public')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert public_names(response) == []
+
+    catch_up(tmp_path)
+    assert public_names(client.get('/api/campaigns/public')) == ['Launch']
+
+
+def test_keyword_index_is_built_from_the_primary(replica_app):
+    seed = Seeder(replica_app)
+    influencer = seed.influencer(location='Austin', keywords='coffee')
+
+    with replica_app.test_request_context('/api/campaigns/1/match'):
+        nanoconnect.g.use_replica = True
+        index = nanoconnect.get_keyword_index()
+
+    assert index.location_of(influencer) is not None
@@ -0,0 +1,83 @@
+import pytest
+
+from conftest import nanoconnect
+from search import fts5_query
+
+
+def test_fts5_query_quotes_every_word_and_prefixes_the_last():
+    assert fts5_query('Cold brew, launch!') == '"cold" "brew" "launch"*'
+    assert fts5_query('"AND" OR NEAR(') == '"and" "or" "near"*'
+    assert fts5_query(' -*- ') == ''
+
+
+@pytest.fixture
+def campaigns(seed):
+    brand = seed.brand()
+    return {
+        'name': seed.campaign(brand, name='Coffee launch', brief='A new roast for the city.', is_public=True),
+        'brief': seed.campaign(brand, name='Summer tour', brief='We bring coffee to every festival.', is_public=True),
+        'private': seed.campaign(brand, name='Coffee secret', brief='coffee coffee', is_public=False),
+        'other': seed.campaign(brand, name='Tacos', brief='Street food week.', is_public=True),
+    }
+
+
+def search(client, **params):
+    response = client.get('/api/campaigns/public/search', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_search_ranks_public_campaigns_and_highlights_the_brief(client, campaigns):
+    items = search(client, q='coffee')['items']
+    assert [item['id'] for item in items] == [campaigns['name'], campaigns['brief']]
+    assert '<mark>coffee</mark>' in items[1]['snippet']
+    # Stemming and prefix matching.
+    assert [item['id'] for item in search(client, q='festivals')['items']] == [campaigns['brief']]
+    assert [item['id'] for item in search(client, q='tac')['items']] == [campaigns['other']]
+
+
+def test_search_pages_with_offsets(client, campaigns):
+    first = search(client, q='coffee', limit=1)
+    assert first['next_offset'] == 1
+    second = search(client, q='coffee', limit=1, offset=1)
+    assert second['next_offset'] is None
+    assert [first['items'][0]['id'], second['items'][0]['id']] == [campaigns['name'], campaigns['brief']]
+
+
+def test_search_index_follows_updates_and_deletes(app, client, campaigns):
+    with app.app_context():
+        campaign = nanoconnect.db.session.get(nanoconnect.Campaign, campaigns['name'])
+        campaign.name = 'Tea launch'
+        campaign.brief = 'Green tea.'
+        nanoconnect.db.session.delete(nanoconnect.db.session.get(nanoconnect.Campaign, campaigns['other']))
+        nanoconnect.db.session.commit()
+    assert [item['id'] for item in search(client, q='coffee')['items']] == [campaigns['brief']]
+    assert [item['id'] for item in search(client, q='tea')['items']] == [campaigns['name']]
+    assert search(client, q='tacos')['items'] == []
+
+
+@pytest.mark.parametrize('query', ['', 'q=coffee&limit=0', 'q=coffee&offset=-1', 'q=coffee&limit=x'])
+def test_search_rejects_bad_parameters(client, query):
+    assert client.get(f'/api/campaigns/public/search?{query}').status_code == 400
+
+
+def test_migrate_search_builds_the_index_on_an_existing_database(app, client, campaigns):
+    with app.app_context(), nanoconnect.db.engine.begin() as connection:
+        for name in ('insert', 'delete', 'update'):
+            connection.exec_driver_sql(f'DROP TRIGGER campaign_fts_{name}')
+        connection.exec_driver_sql('DROP TABLE campaign_fts')
+
+    result = app.test_cli_runner().invoke(args=['migrate-search'])
+
+    assert result.exit_code == 0, result.output
+    assert [item['id'] for item in search(client, q='coffee')['items']] == [campaigns['name'], campaigns['brief']]
+
+
+def test_search_snippet_escapes_the_brief(client, seed):
+    campaign = seed.campaign(seed.brand(), name='Launch', brief='Coffee <script>alert(1)</script> & cake', is_public=True)
+
+    [item] = search(client, q='coffee')['items']
+
+    assert item['id'] == campaign
+    assert '<script>' not in item['snippet']
+    assert item['snippet'] == '<mark>Coffee</mark> &lt;script&gt;alert(1)&lt;/script&gt; &amp; cake'
@@ -0,0 +1,122 @@
+import fcntl
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from snapshot import InfluencerSnapshot
+
+
+def wait_until_idle(snapshot, timeout=5):
+    deadline = time.monotonic() + timeout
+    while snapshot._refreshing:
+        assert time.monotonic() < deadline, 'background refresh did not finish'
+        time.sleep(0.01)
+
+
+def test_refresh_returns_false_while_another_process_holds_the_lock(tmp_path):
+    snapshot = InfluencerSnapshot(path=str(tmp_path / 'snapshot.bin'))
+    with open(f'{snapshot.path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert snapshot.refresh(lambda: pytest.fail('loaded rows without the lock'), source_version=1) is False
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    assert snapshot.refresh(lambda: [], source_version=1) is True
+    assert snapshot.fresh_view(1) is not None
+
+
+def test_background_refresh_retries_while_another_process_rebuilds():
+    snapshot = InfluencerSnapshot(retry_interval=0.01)
+    results = iter([False, False, True])
+    calls = []
+
+    def refresh():
+        calls.append(time.time())
+        return next(results)
+
+    snapshot.refresh_in_background(refresh)
+    wait_until_idle(snapshot)
+    assert len(calls) == 3
+
+
+def test_background_refresh_runs_again_after_a_write_during_the_rebuild():
+    snapshot = InfluencerSnapshot()
+    rebuilding = threading.Event()
+    written = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(time.time())
+        if len(calls) == 1:
+            rebuilding.set()
+            written.wait(5)
+        return True
+
+    snapshot.refresh_in_background(refresh)
+    rebuilding.wait(5)
+    time.sleep(0.01)
+    snapshot.invalidate()
+    # The write finds the refresh running, which must pick it up.
+    snapshot.refresh_in_background(refresh)
+    written.set()
+    wait_until_idle(snapshot)
+    assert len(calls) == 2
+
+
+SEARCHES = [
+    '', 'niche=food', 'niche=FOOD', 'location=Austin', 'location=austin,%20tx', 'min_followers=1000',
+    'max_followers=5000', 'niche=food&location=Austin&min_followers=100', 'niche=nothing',
+    'limit=2', 'limit=2&after=2', 'niche=food&limit=1&after=1',
+]
+
+
+def test_snapshot_search_returns_the_sql_results(tmp_path):
+    from conftest import Seeder, make_app, nanoconnect
+
+    sql = make_app(tmp_path)
+    seed = Seeder(sql)
+    seed.influencer(niche='Food', location='Austin, TX', followers=5000, engagement_rate=2.0)
+    seed.influencer(niche='food', location='Austin', followers=100)
+    seed.influencer(niche='Travel', location='Denver', followers=90000, engagement_rate=7.5)
+    seed.influencer(niche=None, location=None, followers=1000)
+    seed.influencer(niche='food', location='Boston', followers=20)
+    snapshot = make_app(tmp_path, SNAPSHOT_ENABLED=True, SNAPSHOT_REFRESH_DELAY=0)
+    assert nanoconnect.refresh_influencer_snapshot(snapshot)
+
+    for query in SEARCHES:
+        expected = sql.test_client().get(f'/api/influencers/search?{query}').get_json()
+        assert snapshot.test_client().get(f'/api/influencers/search?{query}').get_json() == expected, query
+
+    # A write makes the snapshot stale; searches fall back to SQL until it is rebuilt.
+    client = snapshot.test_client()
+    client.put('/api/influencer/profile?id=3', json={'niche': 'food'})
+    assert [i['id'] for i in client.get('/api/influencers/search?niche=food').get_json()] == [1, 2, 3, 5]
+    wait_until_idle(nanoconnect.influencer_snapshot)
+    with snapshot.app_context():
+        assert nanoconnect.get_influencer_snapshot() is not None
+    assert [i['id'] for i in client.get('/api/influencers/search?niche=food').get_json()] == [1, 2, 3, 5]
+
+
+def test_snapshot_is_dated_before_its_query_and_only_queried_under_the_lock(tmp_path):
+    from conftest import Seeder, make_app, nanoconnect
+
+    app = make_app(tmp_path, SNAPSHOT_ENABLED=True)
+    Seeder(app).influencer()
+    queried_at = []
+
+    def record_catalog_scan(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT influencer.id, influencer.name'):
+            queried_at.append(time.time())
+
+    with app.app_context():
+        event.listen(nanoconnect.db.engine, 'before_cursor_execute', record_catalog_scan)
+    with open(f'{nanoconnect.influencer_snapshot.path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert nanoconnect.refresh_influencer_snapshot(app) is False
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    assert queried_at == []
+
+    assert nanoconnect.refresh_influencer_snapshot(app) is True
+    assert len(queried_at) == 1
+    # A write committed just before the query would be newer than the snapshot, never hidden by it.
+    assert nanoconnect.influencer_snapshot.view().built_at <= queried_at[0]
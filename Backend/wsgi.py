@@ -0,0 +1,6 @@
+"""
+WSGI entry point: gunicorn -c gunicorn.conf.py (or gunicorn wsgi:app).
+"""
+from app import create_app
+
+app = create_app()
@@ -23,24 +23,16 @@ function CampaignDetailPage() {
   // that prevents the function from being recreated on every render, which can optimize performance.
   const fetchPageData = useCallback(() => {
     setIsLoading(true);
-    // Promise.all lets us make multiple API calls in parallel. The page will only
-    // stop loading after ALL of them have successfully completed.
-    Promise.all([
-      fetch(`${process.env.REACT_APP_API_BASE_URL}/api/campaigns/${campaignId}/details`),
-      fetch(`${process.env.REACT_APP_API_BASE_URL}/api/campaigns/${campaignId}/applications`)
-    ])
-    .then(async ([detailsRes, appsRes]) => {
-      // Check if both server responses were successful
-      if (!detailsRes.ok) throw new Error('Failed to load campaign details.');
-      if (!appsRes.ok) throw new Error('Failed to load campaign applications.');
-      
-      // Parse the JSON data from both responses
-      const detailsData = await detailsRes.json();
-      const appsData = await appsRes.json();
-      
+    // The composite /page endpoint returns the campaign, its invites and its
+    // applications in a single request.
+    fetch(`${process.env.REACT_APP_API_BASE_URL}/api/campaigns/${campaignId}/page`)
+    .then(async (res) => {
+      if (!res.ok) throw new Error('Failed to load campaign details.');
+      const pageData = await res.json();
+
       // Update our component's state with the new data
-      setCampaignDetails(detailsData);
-      setApplications(appsData);
+      setCampaignDetails({ ...pageData.campaign, invites: pageData.invites });
+      setApplications(pageData.applications);
     })
     .catch(err => {
       // If any part of the process fails, we set an error message
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
+import toast from 'react-hot-toast';
 import './Dashboard.css';
 import CreateCampaign from './CreateCampaign';
 import LoadingSpinner from './LoadingSpinner';
@@ -8,6 +9,8 @@ import ApiErrorMessage from './ApiErrorMessage';
 function Dashboard({ onLogout }) {
   const [isCreating, setIsCreating] = useState(false);
   const [campaigns, setCampaigns] = useState([]);
+  // The list only contains a preview of each brief; full briefs are fetched on demand
+  const [fullBriefs, setFullBriefs] = useState({});
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -26,6 +29,17 @@ function Dashboard({ onLogout }) {
       });
   }, []);
 
+  // Handle the "Read more" click on a truncated brief. The card is a link to the
+  // campaign, so the click must not also navigate.
+  const handleReadMore = (event, campaignId) => {
+    event.preventDefault();
+    event.stopPropagation();
+    fetch(`${process.env.REACT_APP_API_BASE_URL}/api/campaigns/${campaignId}/brief`)
+      .then(res => res.ok ? res.json() : Promise.reject(new Error('Failed to load the brief.')))
+      .then(data => setFullBriefs(prev => ({ ...prev, [campaignId]: data.brief })))
+      .catch(err => toast.error(err.message || 'An error occurred.'));
+  };
+
   const handleCampaignCreated = (newCampaign) => {
     setCampaigns(prevCampaigns => [...prevCampaigns, newCampaign]);
     setIsCreating(false);
@@ -42,7 +56,12 @@ function Dashboard({ onLogout }) {
               <div className="campaign-item">
                 <h3>{campaign.name}</h3>
                 <p className="campaign-budget">Budget: ${campaign.budget}</p>
-                <p className="campaign-brief">{campaign.brief}</p>
+                <p className="campaign-brief">
+                  {fullBriefs[campaign.id] || (campaign.brief_truncated ? `${campaign.brief}…` : campaign.brief)}
+                  {campaign.brief_truncated && !fullBriefs[campaign.id] && (
+                    <button type="button" className="read-more-button" onClick={(e) => handleReadMore(e, campaign.id)}>Read more</button>
+                  )}
+                </p>
               </div>
             </Link>
           ))}
@@ -55,18 +55,15 @@ function InfluencerDashboard({ user, onLogout }) {
   const [isProfileIncomplete, setIsProfileIncomplete] = useState(false);
 
   // This function fetches all data needed for the dashboard. It will now be inside the useEffect hook.
-  const fetchDashboardData = () => {
+  // Background reloads (triggered by the change feed below) keep the current list on screen.
+  const fetchDashboardData = (background = false) => {
     if (!user) return;
-    setIsLoading(true);
+    if (!background) setIsLoading(true);
 
-    // We define two separate API calls as promises.
-    const projectsPromise = fetch(`${process.env.REACT_APP_API_BASE_URL}/api/influencer/${user.id}/projects`).then(res => res.json());
-    const profilePromise = fetch(`${process.env.REACT_APP_API_BASE_URL}/api/influencer/profile?id=${user.id}`).then(res => res.json());
-
-    // Promise.all runs both promises and waits for them both to finish.
-    Promise.all([projectsPromise, profilePromise])
-      .then(([projectsData, profileData]) => {
-        // This part runs only after both API calls have succeeded.
+    // The composite /dashboard endpoint returns the projects and the profile in one request.
+    fetch(`${process.env.REACT_APP_API_BASE_URL}/api/influencer/${user.id}/dashboard`)
+      .then(res => res.ok ? res.json() : Promise.reject(new Error('Failed to load dashboard data.')))
+      .then(({ projects: projectsData, profile: profileData }) => {
         setProjects(projectsData);
         
         // --- CHANGE 2: THE NEW LOGIC TO CHECK THE PROFILE ---
@@ -86,7 +83,38 @@ function InfluencerDashboard({ user, onLogout }) {
   };
 
   // This useEffect hook now simply calls our main data fetching function.
-  useEffect(fetchDashboardData, [user]);
+  useEffect(() => fetchDashboardData(), [user]);
+
+  // Updates the fields of one project in place.
+  const patchProject = (projectId, fields) => {
+    setProjects(prev => prev.map(p => (p.project_id === projectId ? { ...p, ...fields } : p)));
+  };
+
+  // Live updates: the change feed streams this influencer's invite, application and
+  // submission changes, which are patched into the list instead of reloading the dashboard.
+  // EventSource reconnects on its own and resumes from the last event it received.
+  useEffect(() => {
+    if (!user) return undefined;
+    const source = new EventSource(`${process.env.REACT_APP_API_BASE_URL}/api/influencer/${user.id}/events`);
+    const on = (kind, handler) => source.addEventListener(kind, e => handler(JSON.parse(e.data)));
+
+    on('invite.updated', d => patchProject(`invite_${d.invite_id}`, { status: d.status }));
+    on('submission.created', d => patchProject(`invite_${d.invite_id}`, { submission_status: d.status }));
+    on('submission.updated', d => patchProject(`invite_${d.invite_id}`, { submission_status: d.status }));
+    on('application.updated', d => {
+      if (d.status === 'approved') {
+        // An approved application is listed through the invite created with it.
+        setProjects(prev => prev.filter(p => p.project_id !== `app_${d.application_id}`));
+      } else {
+        patchProject(`app_${d.application_id}`, { status: d.status });
+      }
+    });
+    // New projects need their campaign's details, and "reset" means events were missed.
+    ['invite.created', 'application.created', 'reset'].forEach(kind => {
+      source.addEventListener(kind, () => fetchDashboardData(true));
+    });
+    return () => source.close();
+  }, [user]);
 
   const handleInvitationResponse = (inviteId, status) => {
     fetch(`${process.env.REACT_APP_API_BASE_URL}/api/invites/${inviteId}`, {
@@ -95,7 +123,7 @@ function InfluencerDashboard({ user, onLogout }) {
       body: JSON.stringify({ status: status }),
     }).then(res => {
       if (res.ok) {
-        fetchDashboardData(); // Refresh all data on success
+        patchProject(`invite_${inviteId}`, { status: status });
       } else {
         Promise.reject('Update failed.');
       }
@@ -103,8 +131,9 @@ function InfluencerDashboard({ user, onLogout }) {
   };
   
   const handleContentSubmitted = () => {
+    // Show the new "Under Review" status right away; the change feed confirms it.
+    patchProject(submittingProject.project_id, { submission_status: 'pending_review' });
     setSubmittingProject(null); // Close the modal
-    fetchDashboardData(); // Refresh all data to show the new "Under Review" status
   };
 
   if (isLoading) return <LoadingSpinner />;
@@ -51,6 +51,27 @@ function MatchPage() {
     .catch(error => console.error("Error sending invite:", error));
   };
 
+  // Invites every matched influencer who hasn't been invited yet in a single request.
+  const handleInviteAll = () => {
+    const influencerIds = matches
+      .map(match => match.influencer.id)
+      .filter(id => !invitedInfluencerIds.has(id));
+    if (influencerIds.length === 0) return;
+
+    fetch(`${process.env.REACT_APP_API_BASE_URL}/api/invites/bulk`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ campaignId: parseInt(campaignId), influencerIds: influencerIds }),
+    })
+    .then(response => response.json())
+    .then(data => {
+      // Both newly created and already existing invites count as invited.
+      const invited = [...(data.created || []), ...(data.skipped || [])];
+      setInvitedInfluencerIds(prevIds => new Set([...prevIds, ...invited]));
+    })
+    .catch(error => console.error("Error sending invites:", error));
+  };
+
   // --- NEW RENDER LOGIC ---
   if (isLoading) {
     return <LoadingSpinner />;
@@ -72,6 +93,9 @@ function MatchPage() {
       <div className="match-page-header">
         <Link to="/" className="back-button">← Back to Dashboard</Link>
         <h1>Influencer Matches for Campaign #{campaignId}</h1>
+        {matches.length > 0 && (
+          <button onClick={handleInviteAll} className="invite-button">Invite All</button>
+        )}
       </div>
       
       <div className="matches-container">
@@ -9,6 +9,8 @@ function ProjectExchangePage({ user }) {
   const [campaigns, setCampaigns] = useState([]);
   // Keep track of which campaigns the user has already applied to
   const [appliedCampaignIds, setAppliedCampaignIds] = useState(new Set());
+  // The list only contains a preview of each brief; full briefs are fetched on demand
+  const [fullBriefs, setFullBriefs] = useState({});
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -27,6 +29,14 @@ function ProjectExchangePage({ user }) {
       });
   }, []);
 
+  // Handle the "Read more" click on a truncated brief
+  const handleReadMore = (campaignId) => {
+    fetch(`${process.env.REACT_APP_API_BASE_URL}/api/campaigns/${campaignId}/brief`)
+      .then(res => res.ok ? res.json() : Promise.reject(new Error('Failed to load the brief.')))
+      .then(data => setFullBriefs(prev => ({ ...prev, [campaignId]: data.brief })))
+      .catch(err => toast.error(err.message || 'An error occurred.'));
+  };
+
   // Handle the "Apply" button click
   const handleApply = (campaignId) => {
     // Send the application to the backend
@@ -76,7 +86,12 @@ function ProjectExchangePage({ user }) {
                 <span><strong>Budget:</strong> ${c.budget}</span>
                 <span><strong>Location:</strong> {c.target_location}</span>
               </div>
-              <p className="project-brief">{c.brief}</p>
+              <p className="project-brief">
+                {fullBriefs[c.id] || (c.brief_truncated ? `${c.brief}…` : c.brief)}
+                {c.brief_truncated && !fullBriefs[c.id] && (
+                  <button type="button" className="read-more-button" onClick={() => handleReadMore(c.id)}>Read more</button>
+                )}
+              </p>
               <div className="project-actions">
                 <button
                   className={`save-button ${hasApplied ? 'invited' : ''}`}